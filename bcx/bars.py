@@ -0,0 +1,286 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import List
+
+from bcx.stores import CandleStore
+
+
+def _merge_candles(first: List, second: List) -> List:
+    """Merge ``[open, high, low, close, volume]`` of two consecutive candles"""
+    if first is None:
+        return list(second)
+    return [
+        first[0],
+        max(first[1], second[1]),
+        min(first[2], second[2]),
+        second[3],
+        first[4] + second[4],
+    ]
+
+
+class CandleAggregator:
+    """Incrementally derive candles of coarser granularity from finer ones
+
+    Source candles may be updated in place while they are still open. The
+    aggregator keeps OHLCV of already finished source candles within the
+    current coarse candle separately from the latest source candle, so every
+    update is O(1) regardless of how many times the open candle changes.
+
+    Parameters
+    ----------
+    granularity : int
+        Granularity of derived candles in seconds, should be a multiple of
+        source candles granularity
+    max_candles : int
+        Maximum number of derived candles to keep, unlimited if ``None``
+    timestamp_unit : int
+        Number of candle timestamp units per second, ``1000`` for epoch
+        milliseconds used by the exchange
+    max_age : float
+        Maximum age of derived candles in seconds, unlimited if ``None``
+
+    Attributes
+    ----------
+    granularity : int
+    candles : CandleStore
+    """
+    def __init__(self, granularity: int, max_candles: int = None, timestamp_unit: int = 1000,
+                 max_age: float = None):
+        self.granularity = granularity
+        self.timestamp_unit = timestamp_unit
+        self.candles = CandleStore(max_candles=max_candles, max_age=max_age, timestamp_unit=timestamp_unit)
+        self._period = granularity * timestamp_unit
+        self._open_time = None
+        self._finished = None
+        self._current = None
+        self._source_time = None
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(granularity={self.granularity}, candles={len(self.candles)})"
+
+    def update(self, candle: List):
+        """Apply new or updated source candle
+
+        Parameters
+        ----------
+        candle : List
+            ``[timestamp, open, high, low, close, volume]`` of a source candle
+        """
+        timestamp = candle[0]
+        if self._source_time is not None and timestamp < self._source_time:
+            return
+
+        open_time = timestamp - timestamp % self._period
+        if open_time != self._open_time:
+            self._open_time = open_time
+            self._finished = None
+        elif timestamp != self._source_time:
+            self._finished = self._current
+        self._source_time = timestamp
+        self._current = _merge_candles(self._finished, candle[1:])
+        self.candles.update([open_time] + self._current)
+
+    def clear(self):
+        """Remove all derived candles and reset aggregation state"""
+        self.candles.clear()
+        self._open_time = None
+        self._finished = None
+        self._current = None
+        self._source_time = None
+
+
+class BarBuilder:
+    """Base class for building OHLCV bars from trades
+
+    Every trade is applied in O(1). Closed bars are appended to ``bars`` and
+    passed to all callbacks registered with :meth:`add_callback`, while the
+    bar being built is available as ``current``.
+
+    Parameters
+    ----------
+    max_bars : int
+        Maximum number of closed bars to keep, unlimited if ``None``
+
+    Attributes
+    ----------
+    bars : CandleStore
+        Closed bars as ``[timestamp, open, high, low, close, volume]``, where
+        timestamp is bar open time in epoch nanoseconds
+    current : List
+        Bar which is being built, ``None`` before the first trade
+    """
+    def __init__(self, max_bars: int = None):
+        self.bars = CandleStore(max_candles=max_bars, timestamp_unit=10 ** 9)
+        self.current = None
+        self._callbacks = []
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(bars={len(self.bars)})"
+
+    def add_callback(self, callback: callable):
+        """Register function called with every closed bar"""
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: callable):
+        """Unregister function previously added with :meth:`add_callback`"""
+        self._callbacks.remove(callback)
+
+    def update(self, timestamp: int, price: float, qty: float):
+        """Apply a single trade
+
+        Parameters
+        ----------
+        timestamp : int
+            Epoch nanoseconds
+        price : float
+        qty : float
+        """
+        bar = self.current
+        if bar is not None and self._starts_new_bar(timestamp):
+            self._close()
+            bar = None
+
+        if bar is None:
+            self.current = [self._open_time(timestamp), price, price, price, price, qty]
+            self._on_open()
+        else:
+            if price > bar[2]:
+                bar[2] = price
+            elif price < bar[3]:
+                bar[3] = price
+            bar[4] = price
+            bar[5] += qty
+
+        if self._is_complete(price, qty):
+            self._close()
+
+    def flush(self, timestamp: int):
+        """Close current bar if it should not receive trades after ``timestamp``
+
+        Time bars are closed by the first trade of the next period, so this
+        can be used to close them on time when trading is slow.
+        """
+        if self.current is not None and self._starts_new_bar(timestamp):
+            self._close()
+
+    def _close(self):
+        bar = self.current
+        self.current = None
+        self.bars.append(bar)
+        for callback in self._callbacks:
+            try:
+                callback(bar)
+            except Exception as e:
+                logging.error(f"Error running bar callback {callback}: {e}")
+
+    def _open_time(self, timestamp: int) -> int:
+        return timestamp
+
+    def _on_open(self):
+        pass
+
+    def _starts_new_bar(self, timestamp: int) -> bool:
+        return False
+
+    def _is_complete(self, price: float, qty: float) -> bool:
+        return False
+
+
+class TimeBarBuilder(BarBuilder):
+    """Build bars of fixed duration from trades
+
+    Parameters
+    ----------
+    seconds : float
+        Duration of each bar, bars are aligned to multiples of it since epoch
+    max_bars : int
+        Maximum number of closed bars to keep, unlimited if ``None``
+    """
+    def __init__(self, seconds: float, max_bars: int = None):
+        super().__init__(max_bars=max_bars)
+        self.seconds = seconds
+        self._period = int(seconds * 1e9)
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(seconds={self.seconds}, bars={len(self.bars)})"
+
+    def _open_time(self, timestamp: int) -> int:
+        return timestamp - timestamp % self._period
+
+    def _starts_new_bar(self, timestamp: int) -> bool:
+        return timestamp >= self.current[0] + self._period
+
+
+class ThresholdBarBuilder(BarBuilder, ABC):
+    """Base class for bars which close once accumulated measure of trades reaches a threshold
+
+    Parameters
+    ----------
+    threshold : float
+    max_bars : int
+        Maximum number of closed bars to keep, unlimited if ``None``
+    """
+    def __init__(self, threshold: float, max_bars: int = None):
+        super().__init__(max_bars=max_bars)
+        self.threshold = threshold
+        self._accumulated = 0.0
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(threshold={self.threshold}, bars={len(self.bars)})"
+
+    def _on_open(self):
+        self._accumulated = 0.0
+
+    def _is_complete(self, price: float, qty: float) -> bool:
+        self._accumulated += self._measure(price, qty)
+        return self._accumulated >= self.threshold
+
+    @abstractmethod
+    def _measure(self, price: float, qty: float) -> float:
+        """Contribution of a trade to the accumulated measure"""
+
+
+class TickBarBuilder(ThresholdBarBuilder):
+    """Build bars containing a fixed number of trades
+
+    Parameters
+    ----------
+    threshold : int
+        Number of trades per bar
+    max_bars : int
+        Maximum number of closed bars to keep, unlimited if ``None``
+    """
+    def _measure(self, price: float, qty: float) -> float:
+        return 1
+
+
+class VolumeBarBuilder(ThresholdBarBuilder):
+    """Build bars which close once traded quantity reaches a threshold
+
+    Parameters
+    ----------
+    threshold : float
+        Traded quantity per bar
+    max_bars : int
+        Maximum number of closed bars to keep, unlimited if ``None``
+    """
+    def _measure(self, price: float, qty: float) -> float:
+        return qty
+
+
+class DollarBarBuilder(ThresholdBarBuilder):
+    """Build bars which close once traded value (price times quantity) reaches a threshold
+
+    Parameters
+    ----------
+    threshold : float
+        Traded value per bar in quote currency
+    max_bars : int
+        Maximum number of closed bars to keep, unlimited if ``None``
+    """
+    def _measure(self, price: float, qty: float) -> float:
+        return price * qty
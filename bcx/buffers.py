@@ -0,0 +1,139 @@
+import time
+from typing import Any, List
+
+
+class RetentionPolicy:
+    """Policy describing how much history a channel keeps in memory
+
+    Parameters
+    ----------
+    max_items : int
+        Maximum number of items to keep, the oldest ones are dropped first.
+        Unlimited if ``None``
+    max_age : float
+        Maximum age of items in seconds since they were received.
+        Unlimited if ``None``
+    """
+    def __init__(self, max_items: int = None, max_age: float = None):
+        if max_items is not None and max_items <= 0:
+            raise ValueError(f"Retention 'max_items' should be positive: {max_items}")
+        if max_age is not None and max_age <= 0:
+            raise ValueError(f"Retention 'max_age' should be positive: {max_age}")
+        self.max_items = max_items
+        self.max_age = max_age
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(max_items={self.max_items}, max_age={self.max_age})"
+
+    @property
+    def is_bounded(self) -> bool:
+        """Whether this policy limits amount of kept history"""
+        return self.max_items is not None or self.max_age is not None
+
+
+class RingBuffer:
+    """List-like buffer of fixed capacity which drops the oldest items first
+
+    Items are stored in a preallocated circular array, so appending an item
+    or accessing it by index is O(1) and memory usage stays constant once
+    ``max_items`` is reached. When only ``max_age`` is set, capacity grows as
+    needed while expired items are dropped on every access.
+
+    Parameters
+    ----------
+    retention : RetentionPolicy
+        Unbounded (behaves like a list) if ``None``
+    clock : callable
+        Source of current time in seconds, used for ``max_age``
+    """
+    def __init__(self, retention: RetentionPolicy = None, clock: callable = time.time):
+        self.retention = retention if retention is not None else RetentionPolicy()
+        self._clock = clock
+        self._capacity = self.retention.max_items or 16
+        self._items = [None] * self._capacity
+        self._times = [0.0] * self._capacity if self.retention.max_age is not None else None
+        self._start = 0
+        self._size = 0
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(size={len(self)}, retention={self.retention})"
+
+    def __len__(self):
+        self._expire()
+        return self._size
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        self._expire()
+        items = self._items
+        capacity = self._capacity
+        start = self._start
+        for i in range(self._size):
+            yield items[(start + i) % capacity]
+
+    def __getitem__(self, index):
+        self._expire()
+        if isinstance(index, slice):
+            return [self._items[(self._start + i) % self._capacity] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("RingBuffer index out of range")
+        return self._items[(self._start + index) % self._capacity]
+
+    def __eq__(self, other):
+        if isinstance(other, (RingBuffer, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def append(self, item: Any):
+        """Add item to the end of the buffer, dropping the oldest one if it is full"""
+        self._expire()
+        if self._size == self._capacity:
+            if self.retention.max_items is not None:
+                self._popleft()
+            else:
+                self._grow()
+
+        idx = (self._start + self._size) % self._capacity
+        self._items[idx] = item
+        if self._times is not None:
+            self._times[idx] = self._clock()
+        self._size += 1
+
+    def clear(self):
+        """Remove all items"""
+        self._items = [None] * self._capacity
+        self._start = 0
+        self._size = 0
+
+    def to_list(self) -> List:
+        """Copy of all items in the buffer starting from the oldest"""
+        return list(self)
+
+    def _popleft(self):
+        self._items[self._start] = None
+        self._start = (self._start + 1) % self._capacity
+        self._size -= 1
+
+    def _grow(self):
+        items = self.to_list()
+        times = [self._times[(self._start + i) % self._capacity] for i in range(self._size)] if self._times else None
+
+        self._capacity *= 2
+        self._items = items + [None] * (self._capacity - len(items))
+        if times is not None:
+            self._times = times + [0.0] * (self._capacity - len(times))
+        self._start = 0
+
+    def _expire(self):
+        if self._times is None or not self._size:
+            return
+        deadline = self._clock() - self.retention.max_age
+        times = self._times
+        while self._size and times[self._start] < deadline:
+            self._popleft()
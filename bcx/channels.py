@@ -1,34 +1,240 @@
 import os
 import logging
-from typing import Dict, List
+from concurrent.futures import Executor, Future, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Tuple
 
-from bcx.utils import timestamp_to_datetime
+from bcx.utils import timestamp_to_datetime, timestamp_to_nanoseconds
 from bcx.websocket import BlockchainWebsocket
 from bcx.orders import Order
+from bcx.buffers import RetentionPolicy, RingBuffer
+from bcx.stores import CandleStore, TradeStore
+from bcx.bars import BarBuilder, CandleAggregator
+from bcx.conflation import Conflator
+from bcx.orderbook import Orderbook, OrderbookL3
+
+
+class SubscriptionRejected(Exception):
+    """Exchange rejected subscription to a channel
+
+    Parameters
+    ----------
+    channel : Channel
+    response : Dict
+        Message of the **rejected** event
+    """
+    def __init__(self, channel: "Channel", response: Dict):
+        super().__init__(f"Subscription to {channel} was rejected: {response}")
+        self.channel = channel
+        self.response = response
 
 
 class Channel:
-    """Base class for all channels"""
-    def __init__(self, name: str, ws: BlockchainWebsocket):
+    """Base class for all channels
+
+    Parameters
+    ----------
+    name : str
+    ws : BlockchainWebsocket
+    retention : RetentionPolicy
+        How much history to keep in memory, unlimited by default
+
+    Attributes
+    ----------
+    is_pending : bool
+        Whether subscription was requested and awaits acknowledgement
+    events : Tuple[str]
+        Events which listeners can be added for with :meth:`add_listener`
+    """
+    events: Tuple[str] = ()
+
+    def __init__(self, name: str, ws: BlockchainWebsocket, retention: RetentionPolicy = None):
         self.name = name
         self._ws = ws
         self.is_subscribed = False
+        self.is_desired = False
+        self.is_pending = False
+        self.retention = retention if retention is not None else RetentionPolicy()
+        self._subscribed = Future()
+        self._unsubscribed = Future()
+        self._listeners = dict()
+
+    @property
+    def ws(self) -> BlockchainWebsocket:
+        """Connection used to communicate with the exchange"""
+        return self._ws
+
+    @ws.setter
+    def ws(self, ws: BlockchainWebsocket):
+        self._ws = ws
+
+    def _create_history(self) -> RingBuffer:
+        """Create container for history of messages according to retention policy"""
+        return RingBuffer(self.retention)
 
     @property
     def extra_message(self) -> Dict:
         """Additional message to be send to server"""
         return dict()
 
+    @property
+    def subscription(self) -> Future:
+        """Future resolved once subscription is acknowledged or failed with :class:`SubscriptionRejected`"""
+        return self._subscribed
+
+    def wait_subscribed(self, timeout: float = None) -> "Channel":
+        """Block until subscription to the channel is acknowledged
+
+        Parameters
+        ----------
+        timeout : float
+            Seconds to wait, forever if ``None``
+
+        Returns
+        -------
+        channel : Channel
+
+        Raises
+        ------
+        SubscriptionRejected
+            As soon as exchange rejects subscription
+        TimeoutError
+            If subscription is not acknowledged within ``timeout``
+        """
+        if not self.is_subscribed:
+            self._wait(self._subscribed, timeout)
+        return self
+
+    def wait_unsubscribed(self, timeout: float = None) -> "Channel":
+        """Block until unsubscription from the channel is acknowledged, see :meth:`wait_subscribed`"""
+        if self.is_subscribed:
+            self._wait(self._unsubscribed, timeout)
+        return self
+
+    def _wait(self, future: Future, timeout: float = None):
+        try:
+            future.result(timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"{self} did not receive acknowledgement within {timeout} seconds")
+
+    def add_listener(self, event: str, callback: callable, executor: Executor = None,
+                     conflate: float = None) -> callable:
+        """Call a function with every event of a kind as soon as it is applied to the channel
+
+        Parameters
+        ----------
+        event : str
+            One of :attr:`events`, e.g. ``"trade"``
+        callback : callable
+            Called with a single argument, the event
+        executor : Executor
+            Executor running the callback, e.g. a ``ThreadPoolExecutor``.
+            Called on the thread handling messages if ``None``, which should
+            then return quickly
+        conflate : float
+            Maximum number of calls per second. Events received in between are
+            merged, so that the callback gets only the latest value of every
+            price level or ticker field, see :class:`~bcx.conflation.Conflator`.
+            Called with every event if ``None``
+
+        Returns
+        -------
+        callback : callable
+        """
+        if event not in self.events:
+            raise ValueError(f"Event '{event}' is not supported by {self}. Should be one of {self.events}")
+        conflator = None
+        if conflate is not None:
+            conflator = Conflator(
+                event, lambda payload: self._call_listener(event, callback, executor, payload), rate=conflate
+            )
+        self._listeners[event] = self._listeners.get(event, ()) + ((callback, executor, conflator),)
+        return callback
+
+    def remove_listener(self, event: str, callback: callable):
+        """Stop calling function added with :meth:`add_listener`"""
+        listeners = []
+        for listener in self._listeners.get(event, ()):
+            if listener[0] != callback:
+                listeners.append(listener)
+            elif listener[2] is not None:
+                listener[2].cancel()
+        if listeners:
+            self._listeners[event] = tuple(listeners)
+        else:
+            self._listeners.pop(event, None)
+
+    def _emit(self, event: str, payload):
+        """Pass event to its listeners"""
+        for callback, executor, conflator in self._listeners.get(event, ()):
+            if conflator is not None:
+                conflator.put(payload)
+            else:
+                self._call_listener(event, callback, executor, payload)
+
+    def _call_listener(self, event: str, callback: callable, executor: Executor, payload):
+        if executor is not None:
+            executor.submit(callback, payload).add_done_callback(self._log_listener_error)
+            return
+        try:
+            callback(payload)
+        except Exception as e:
+            logging.error(f"Error in listener of '{event}' events of {self}: {e}")
+
+    def _log_listener_error(self, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            logging.error(f"Error in listener of {self}: {future.exception()}")
+
+    def _set_subscribed(self, is_subscribed: bool):
+        """Update subscription state and resolve futures waiting for it
+
+        The future of the opposite state is renewed once resolved, so that
+        :attr:`subscription` of an unsubscribed channel is not done.
+        """
+        self.is_subscribed = is_subscribed
+        if is_subscribed:
+            self.is_pending = False
+            self.on_subscribe()
+            future = self._subscribed
+            if self._unsubscribed.done():
+                self._unsubscribed = Future()
+        else:
+            self.on_unsubscribe()
+            future = self._unsubscribed
+            if self._subscribed.done():
+                self._subscribed = Future()
+        if not future.done():
+            future.set_result(self)
+
+    def _request_subscription(self):
+        """Mark subscription as requested, renewing the future resolved by its acknowledgement"""
+        self.is_desired = True
+        self.is_pending = True
+        if self._subscribed.done():
+            self._subscribed = Future()
+
     def subscribe(self):
-        """Subscribe to a channel"""
+        """Subscribe to a channel, it is subscribed again whenever connection is restored"""
+        self._request_subscription()
         self._ws.send_json({
             "action": "subscribe",
             "channel": self.name,
             **self.extra_message
         })
 
+    def subscribe_after(self, future: Future):
+        """Subscribe to a channel once ``future`` is resolved, e.g. authentication is acknowledged
+
+        The channel is pending right away, so :attr:`subscription` can be awaited.
+        """
+        self._request_subscription()
+        future.add_done_callback(lambda _: self.subscribe())
+
     def unsubscribe(self):
         """Unsubscribe from a channel"""
+        self.is_desired = False
+        self.is_pending = False
+        if self._unsubscribed.done():
+            self._unsubscribed = Future()
         self._ws.send_json({
             "action": "unsubscribe",
             "channel": self.name,
@@ -44,18 +250,26 @@ class Channel:
         event_response : Dict
         """
         if event_type == "subscribed":
-            self.is_subscribed = True
-            self.on_subscribe()
+            self._set_subscribed(True)
         elif event_type == "unsubscribed":
-            self.is_subscribed = False
-            self.on_unsubscribe()
+            self._set_subscribed(False)
         elif event_type == "rejected":
+            self.is_pending = False
             self.on_reject(event_response)
+            if not self._subscribed.done():
+                self._subscribed.set_exception(SubscriptionRejected(self, event_response))
         elif event_type == "snapshot":
             self.on_snapshot(event_response)
         elif event_type == "updated":
             self.on_update(event_response)
 
+    def on_reconnect(self):
+        """Reset state once connection to the server was lost, before subscribing again"""
+        self.is_subscribed = False
+        self.is_pending = False
+        if self._subscribed.done():
+            self._subscribed = Future()
+
     def on_subscribe(self):
         """Perform action upon **subscribe** event message received from server"""
         pass
@@ -99,14 +313,18 @@ class HeartbeatChannel(Channel):
     ----------
     name : str
     ws : BlockchainWebsocket
+    retention : RetentionPolicy
+        Not used, heartbeats are not kept
 
     Attributes
     ----------
     is_subscribed : bool
     last_heartbeat : datetime
     """
-    def __init__(self, ws, name):
-        super().__init__(ws=ws, name=name)
+    events = ("heartbeat",)
+
+    def __init__(self, ws, name, retention=None):
+        super().__init__(ws=ws, name=name, retention=retention)
         self.last_heartbeat = None
 
     def __repr__(self):
@@ -115,6 +333,10 @@ class HeartbeatChannel(Channel):
 
     def on_update(self, event_response):
         self.last_heartbeat = timestamp_to_datetime(event_response["timestamp"])
+        self._emit("heartbeat", self.last_heartbeat)
+
+
+DEFAULT_BOOK_RETENTION = RetentionPolicy(max_items=1000)
 
 
 class OrderbookChannel(Channel):
@@ -125,18 +347,34 @@ class OrderbookChannel(Channel):
     symbol : str
     name : str
     ws : BlockchainWebsocket
+    retention : RetentionPolicy
+        How many raw updates to keep in ``updates``, the latest 1000 of each side by default
 
     Attributes
     ----------
     is_subscribed : bool
     snapshot : Dict[str, List]
-    updates : Dict[str, List]
+    updates : Dict[str, RingBuffer]
+    book : Union[Orderbook, OrderbookL3]
+        Live order book with all updates applied
+    awaiting_snapshot : bool
+        Whether updates are discarded until a new snapshot arrives
+    resyncs : int
+        Number of times a fresh snapshot was requested after missed messages
+    events : Tuple[str]
+        ``"book_snapshot"`` and ``"book_update"`` with ``bids`` and ``asks``
+        once they are applied to ``book``
     """
-    def __init__(self, symbol, ws, name):
-        super().__init__(ws=ws, name=name)
+    events = ("book_snapshot", "book_update")
+
+    def __init__(self, symbol, ws, name, retention=None):
+        super().__init__(ws=ws, name=name, retention=retention if retention is not None else DEFAULT_BOOK_RETENTION)
         self.symbol = symbol
         self.snapshot = {"asks": [], "bids": []}
-        self.updates = {"asks": [], "bids": []}
+        self.updates = {"asks": self._create_history(), "bids": self._create_history()}
+        self.book = None
+        self.awaiting_snapshot = False
+        self.resyncs = 0
 
     def __repr__(self):
         class_name = self.__class__.__name__
@@ -148,16 +386,77 @@ class OrderbookChannel(Channel):
             "symbol": self.symbol
         }
 
+    def on_event(self, event_type: str, event_response: Dict):
+        if event_type == "updated" and self.awaiting_snapshot:
+            return
+        if event_type == "snapshot":
+            self.awaiting_snapshot = False
+        super().on_event(event_type, event_response)
+
+    def on_reconnect(self):
+        super().on_reconnect()
+        self.book.clear()
+        self.awaiting_snapshot = True
+
+    def resync(self):
+        """Subscribe again to get a fresh snapshot
+
+        The book is cleared, since it is known to miss updates, and updates are
+        discarded until the snapshot arrives.
+        """
+        if self.awaiting_snapshot or not self.is_desired:
+            return
+        self.book.clear()
+        self.awaiting_snapshot = True
+        self.resyncs += 1
+        logging.warning(f"Requesting a fresh snapshot of {self} after missed messages")
+        self.unsubscribe()
+        self.subscribe()
+
     def on_snapshot(self, event_response):
         for key in self.snapshot:
             self.snapshot[key] = event_response.pop(key)
 
     def on_update(self, event_response):
+        if "book_update" in self._listeners:
+            self._emit("book_update", {"bids": event_response["bids"], "asks": event_response["asks"]})
         for key in self.updates:
             update = event_response.pop(key)
             if update:
                 self.updates[key].append(update)
 
+    def best_bid(self) -> Optional[Dict]:
+        """Best (highest) bid price level"""
+        return self.book.best_bid()
+
+    def best_ask(self) -> Optional[Dict]:
+        """Best (lowest) ask price level"""
+        return self.book.best_ask()
+
+    def spread(self) -> Optional[float]:
+        """Difference between best ask and best bid prices"""
+        return self.book.spread()
+
+    def depth(self, n: int = 10) -> Dict[str, List[Dict]]:
+        """Best ``n`` price levels for each side of the order book"""
+        return self.book.depth(n)
+
+    def level(self, side: str, px: float) -> Optional[Dict]:
+        """Get price level by side (``"bids"`` or ``"asks"``) and price"""
+        return self.book.level(side, px)
+
+    def cumulative_depth(self, side: str, n: int = 10):
+        """Cumulative quantity of the best ``n`` price levels of one side"""
+        return self.book.cumulative_depth(side, n)
+
+    def vwap(self, side: str, qty: float) -> Optional[float]:
+        """Volume weighted average price to fill ``qty`` against one side of the order book"""
+        return self.book.vwap(side, qty)
+
+    def imbalance(self, n: int = 10) -> Optional[float]:
+        """Order book imbalance over the best ``n`` price levels"""
+        return self.book.imbalance(n)
+
 
 class OrderbookL2Channel(OrderbookChannel):
     """Representation of `L2 order book <https://exchange.blockchain.com/api/#l2-order-book>`_ channel
@@ -167,15 +466,26 @@ class OrderbookL2Channel(OrderbookChannel):
     symbol : str
     name : str
     ws : BlockchainWebsocket
+    backend : str
+        Storage of price levels, either ``"python"`` or ``"numpy"``
+    tick_size : float
+        Minimal price increment, required for ``"numpy"`` backend
+    ladder_size : int
+        Number of ticks covered by each side of the book for ``"numpy"`` backend
+    retention : RetentionPolicy
+        How many raw updates to keep in ``updates``, the latest 1000 of each side by default
 
     Attributes
     ----------
     is_subscribed : bool
     snapshot : Dict[str, List]
-    updates : Dict[str, List]
+    updates : Dict[str, RingBuffer]
+    book : Orderbook
+        Live price level order book with all updates applied
     """
-    def __init__(self, symbol, ws, name):
-        super().__init__(symbol=symbol, ws=ws, name=name)
+    def __init__(self, symbol, ws, name, backend="python", tick_size=None, ladder_size=4096, retention=None):
+        super().__init__(symbol=symbol, ws=ws, name=name, retention=retention)
+        self.book = Orderbook(backend=backend, tick_size=tick_size, ladder_size=ladder_size)
 
     @property
     def extra_message(self) -> Dict:
@@ -183,8 +493,11 @@ class OrderbookL2Channel(OrderbookChannel):
 
     def on_snapshot(self, event_response):
         super().on_snapshot(event_response)
+        self.book.apply_snapshot(self.snapshot)
+        self._emit("book_snapshot", dict(self.snapshot))
 
     def on_update(self, event_response):
+        self.book.apply_update(event_response)
         super().on_update(event_response)
 
 
@@ -196,15 +509,26 @@ class OrderbookL3Channel(OrderbookChannel):
     symbol : str
     name : str
     ws : BlockchainWebsocket
+    backend : str
+        Storage of price levels, either ``"python"`` or ``"numpy"``
+    tick_size : float
+        Minimal price increment, required for ``"numpy"`` backend
+    ladder_size : int
+        Number of ticks covered by each side of the book for ``"numpy"`` backend
+    retention : RetentionPolicy
+        How many raw updates to keep in ``updates``, the latest 1000 of each side by default
 
     Attributes
     ----------
     is_subscribed : bool
     snapshot : Dict[str, List]
-    updates : Dict[str, List]
+    updates : Dict[str, RingBuffer]
+    book : OrderbookL3
+        Live order level book with all updates applied
     """
-    def __init__(self, symbol, ws, name):
-        super().__init__(symbol=symbol, ws=ws, name=name)
+    def __init__(self, symbol, ws, name, backend="python", tick_size=None, ladder_size=4096, retention=None):
+        super().__init__(symbol=symbol, ws=ws, name=name, retention=retention)
+        self.book = OrderbookL3(backend=backend, tick_size=tick_size, ladder_size=ladder_size)
 
     @property
     def extra_message(self) -> Dict:
@@ -212,10 +536,21 @@ class OrderbookL3Channel(OrderbookChannel):
 
     def on_snapshot(self, event_response):
         super().on_snapshot(event_response)
+        self.book.apply_snapshot(self.snapshot)
+        self._emit("book_snapshot", dict(self.snapshot))
 
     def on_update(self, event_response):
+        self.book.apply_update(event_response)
         super().on_update(event_response)
 
+    def order(self, order_id: str) -> Optional[Dict]:
+        """Get resting order by its id"""
+        return self.book.order(order_id)
+
+    def orders_at(self, side: str, px: float) -> List[Dict]:
+        """Orders resting at a price level in time priority order"""
+        return self.book.orders_at(side, px)
+
 
 class PricesChannel(Channel):
     """Representation of `prices <https://exchange.blockchain.com/api/#prices>`_ channel
@@ -226,17 +561,27 @@ class PricesChannel(Channel):
     granularity : int
     name : str
     ws : BlockchainWebsocket
+    retention : RetentionPolicy
+        How many candles to keep, ``max_age`` is measured from the open time of the latest candle
 
     Attributes
     ----------
     is_subscribed : bool
-    updates : List
+    candles : CandleStore
+        Candles keyed by their open time, updates of the open candle overwrite it in place
+    derived_channels : List[DerivedPricesChannel]
+        Channels with coarser candles derived locally from this one
+    events : Tuple[str]
+        ``"candle"`` with every new or updated candle
     """
-    def __init__(self, symbol, granularity, ws, name):
-        super().__init__(ws=ws, name=name)
+    events = ("candle",)
+
+    def __init__(self, symbol, granularity, ws, name, retention=None):
+        super().__init__(ws=ws, name=name, retention=retention)
         self.symbol = symbol
         self.granularity = granularity
-        self.updates = []
+        self.candles = CandleStore(max_candles=self.retention.max_items, max_age=self.retention.max_age)
+        self.derived_channels = []
 
     def __repr__(self):
         class_name = self.__class__.__name__
@@ -249,13 +594,107 @@ class PricesChannel(Channel):
             "granularity": self.granularity
         }
 
+    @property
+    def updates(self) -> List[List]:
+        """All available candles as ``[timestamp, open, high, low, close, volume]``"""
+        return self.candles.to_list()
+
     @property
     def last_price(self) -> List:
         """Last available price from this channel"""
-        return self.updates[-1] if len(self.updates) > 0 else []
+        return self.candles.last
+
+    def on_subscribe(self):
+        for channel in self.derived_channels:
+            channel._set_subscribed(True)
+
+    def on_unsubscribe(self):
+        for channel in self.derived_channels:
+            channel._set_subscribed(False)
+
+    def on_reject(self, event_response: Dict):
+        for channel in self.derived_channels:
+            channel.on_event("rejected", event_response)
 
     def on_update(self, event_response):
-        self.updates.append(event_response.pop("price"))
+        candle = event_response.pop("price")
+        self.candles.update(candle)
+        self._emit("candle", candle)
+        for channel in self.derived_channels:
+            channel.on_source_update(candle)
+
+
+class DerivedPricesChannel(PricesChannel):
+    """Prices channel with candles derived locally from a channel of finer granularity
+
+    It behaves like a separate subscription to `prices
+    <https://exchange.blockchain.com/api/#prices>`_ channel, but does not
+    send anything to the exchange. Candles are aggregated incrementally from
+    every update of the source channel.
+
+    Parameters
+    ----------
+    source : PricesChannel
+        Channel subscribed on the exchange, its granularity should divide ``granularity``
+    granularity : int
+    retention : RetentionPolicy
+        How many candles to keep, ``max_age`` is measured from the open time of the latest candle
+
+    Attributes
+    ----------
+    is_subscribed : bool
+    candles : CandleStore
+    source : PricesChannel
+    """
+    def __init__(self, source: PricesChannel, granularity: int, retention=None):
+        super().__init__(symbol=source.symbol, granularity=granularity, ws=source._ws, name=source.name,
+                         retention=retention)
+        self.source = source
+        self._aggregator = CandleAggregator(granularity, max_candles=self.retention.max_items,
+                                            max_age=self.retention.max_age)
+        self.candles = self._aggregator.candles
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return (f"{class_name}(symbol={self.symbol}, granularity={self.granularity}, "
+                f"source_granularity={self.source.granularity}, is_subscribed={self.is_subscribed})")
+
+    def subscribe(self):
+        """Start deriving candles from the source channel, subscribing to it if necessary
+
+        The channel is subscribed once the source channel is, and rejected
+        together with it.
+        """
+        self._request_subscription()
+        if self not in self.source.derived_channels:
+            self._aggregator.clear()
+            for candle in self.source.candles.to_list():
+                self._aggregator.update(candle)
+            self.source.derived_channels.append(self)
+        if self.source.is_subscribed:
+            self._set_subscribed(True)
+        elif not self.source.is_pending:
+            self.source.subscribe()
+
+    def unsubscribe(self):
+        """Stop deriving candles, the source channel stays subscribed"""
+        self.is_desired = False
+        self.is_pending = False
+        if self in self.source.derived_channels:
+            self.source.derived_channels.remove(self)
+        self._set_subscribed(False)
+
+    def on_source_update(self, candle: List):
+        """Apply new or updated candle of the source channel
+
+        Parameters
+        ----------
+        candle : List
+            ``[timestamp, open, high, low, close, volume]``
+        """
+        self._aggregator.update(candle)
+        if "candle" in self._listeners:
+            self._emit("candle", self.candles.last)
 
 
 class SymbolsChannel(Channel):
@@ -265,15 +704,17 @@ class SymbolsChannel(Channel):
     ----------
     name : str
     ws : BlockchainWebsocket
+    retention : RetentionPolicy
+        How many updates of every symbol to keep in ``updates``
 
     Attributes
     ----------
     is_subscribed : bool
     snapshot : Dict[str, List]
-    updates : Dict[str, List]
+    updates : Dict[str, RingBuffer]
     """
-    def __init__(self, ws, name):
-        super().__init__(ws=ws, name=name)
+    def __init__(self, ws, name, retention=None):
+        super().__init__(ws=ws, name=name, retention=retention)
         self.snapshot = dict()
         self.updates = dict()
 
@@ -286,10 +727,9 @@ class SymbolsChannel(Channel):
 
     def on_update(self, event_response):
         symbol = event_response.pop("symbol")
-        if symbol in self.updates and self.updates[symbol]:
-            self.updates[symbol].append(event_response)
-        else:
-            self.updates[symbol] = list(event_response)
+        if symbol not in self.updates:
+            self.updates[symbol] = self._create_history()
+        self.updates[symbol].append(event_response)
 
 
 class TickerChannel(Channel):
@@ -300,18 +740,24 @@ class TickerChannel(Channel):
     symbol : str
     name : str
     ws : BlockchainWebsocket
+    retention : RetentionPolicy
+        How many messages to keep in ``snapshots`` and ``updates``
 
     Attributes
     ----------
     is_subscribed : bool
-    snapshots : List
-    updates : List
+    snapshots : RingBuffer
+    updates : RingBuffer
+    events : Tuple[str]
+        ``"ticker"`` with every snapshot and update
     """
-    def __init__(self, symbol, ws, name):
-        super().__init__(ws=ws, name=name)
+    events = ("ticker",)
+
+    def __init__(self, symbol, ws, name, retention=None):
+        super().__init__(ws=ws, name=name, retention=retention)
         self.symbol = symbol
-        self.snapshots = []
-        self.updates = []
+        self.snapshots = self._create_history()
+        self.updates = self._create_history()
 
     def __repr__(self):
         class_name = self.__class__.__name__
@@ -325,9 +771,11 @@ class TickerChannel(Channel):
 
     def on_snapshot(self, event_response: Dict):
         self.snapshots.append(event_response)
+        self._emit("ticker", event_response)
 
     def on_update(self, event_response: Dict):
         self.updates.append(event_response)
+        self._emit("ticker", event_response)
 
 
 class TradesChannel(Channel):
@@ -338,16 +786,33 @@ class TradesChannel(Channel):
     symbol : str
     name : str
     ws : BlockchainWebsocket
+    retention : RetentionPolicy
+        How many trades to keep in ``updates`` or ``trades``
+    columnar : bool
+        Keep trades in a compact :class:`~bcx.stores.TradeStore` instead of
+        ``updates`` list of raw messages
 
     Attributes
     ----------
     is_subscribed : bool
-    updates : List
+    updates : RingBuffer
+    trades : TradeStore
+        Columnar storage of trades, ``None`` unless ``columnar`` is set
+    bar_builders : List[BarBuilder]
+        Builders of bars updated with every trade
+    events : Tuple[str]
+        ``"trade"`` with every trade
     """
-    def __init__(self, symbol, ws, name):
-        super().__init__(ws=ws, name=name)
+    events = ("trade",)
+
+    def __init__(self, symbol, ws, name, retention=None, columnar=False):
+        super().__init__(ws=ws, name=name, retention=retention)
         self.symbol = symbol
-        self.updates = []
+        self.updates = self._create_history()
+        self.trades = (
+            TradeStore(max_items=self.retention.max_items, max_age=self.retention.max_age) if columnar else None
+        )
+        self.bar_builders = []
 
     def __repr__(self):
         class_name = self.__class__.__name__
@@ -359,8 +824,47 @@ class TradesChannel(Channel):
             "symbol": self.symbol
         }
 
+    def add_bar_builder(self, builder: BarBuilder) -> BarBuilder:
+        """Build bars from every trade received after this call
+
+        Parameters
+        ----------
+        builder : BarBuilder
+            e.g. ``TimeBarBuilder(seconds=10)`` or ``VolumeBarBuilder(threshold=5.0)``
+
+        Returns
+        -------
+        builder : BarBuilder
+        """
+        self.bar_builders.append(builder)
+        return builder
+
+    def remove_bar_builder(self, builder: BarBuilder):
+        """Stop updating bar builder previously added with :meth:`add_bar_builder`"""
+        self.bar_builders.remove(builder)
+
     def on_update(self, event_response: Dict):
-        self.updates.append(event_response)
+        self._emit("trade", event_response)
+        if self.trades is None and not self.bar_builders:
+            self.updates.append(event_response)
+            return
+
+        timestamp = timestamp_to_nanoseconds(event_response["timestamp"])
+        price = event_response["price"]
+        qty = event_response["qty"]
+        for builder in self.bar_builders:
+            builder.update(timestamp, price, qty)
+
+        if self.trades is not None:
+            self.trades.append(
+                timestamp=timestamp,
+                price=price,
+                qty=qty,
+                side=TradeStore.SIDES[event_response["side"]],
+                trade_id=int(event_response["trade_id"]),
+            )
+        else:
+            self.updates.append(event_response)
 
 
 class AuthChannel(Channel):
@@ -370,6 +874,8 @@ class AuthChannel(Channel):
     ----------
     name : str
     ws : BlockchainWebsocket
+    retention : RetentionPolicy
+        Not used, authentication keeps no history
 
     Attributes
     ----------
@@ -377,8 +883,8 @@ class AuthChannel(Channel):
     api_secret : str
     is_authenticated : bool
     """
-    def __init__(self, ws, name):
-        super().__init__(ws=ws, name=name)
+    def __init__(self, ws, name, retention=None):
+        super().__init__(ws=ws, name=name, retention=retention)
         api_secret = os.environ.get("BLOCKCHAIN_API_SECRET")
         if not api_secret:
             logging.warning("Missing credentials for subscriptions to authenticated channel")
@@ -396,6 +902,10 @@ class AuthChannel(Channel):
             "token": self.api_secret
         }
 
+    def on_reconnect(self):
+        super().on_reconnect()
+        self.is_authenticated = False
+
     def on_subscribe(self):
         self.is_authenticated = True
 
@@ -407,32 +917,44 @@ class TradingChannel(Channel):
     ----------
     name : str
     ws : BlockchainWebsocket
+    retention : RetentionPolicy
+        How many messages to keep in ``updates`` and ``rejects``
 
     Attributes
     ----------
     is_subscribed : bool
     snapshot : List
-    updates : List
-    rejects : List
+    updates : RingBuffer
+    rejects : RingBuffer
     open_orders : set
+        Ids of open orders, replaced by every snapshot and reset on reconnect
+    events : Tuple[str]
+        ``"execution_report"`` with every update of an order and
+        ``"order_rejected"`` with every rejected request
     """
-    def __init__(self, ws, name):
-        super().__init__(ws=ws, name=name)
+    events = ("execution_report", "order_rejected")
+
+    def __init__(self, ws, name, retention=None):
+        super().__init__(ws=ws, name=name, retention=retention)
         self.is_authenticated = False
         self.snapshot = []
-        self.updates = []
-        self.rejects = []
+        self.updates = self._create_history()
+        self.rejects = self._create_history()
         self.open_orders = set()
 
     def __repr__(self):
         class_name = self.__class__.__name__
         return f"{class_name}(is_subscribed={self.is_subscribed})"
 
+    def on_reconnect(self):
+        super().on_reconnect()
+        self.snapshot = []
+        self.open_orders = set()
+
     def on_snapshot(self, event_response: Dict):
         orders = event_response.pop("orders")
         self.snapshot = orders
-        for order in orders:
-            self.open_orders.add(order["orderID"])
+        self.open_orders = {order["orderID"] for order in orders}
 
     def on_update(self, event_response: Dict):
         self.updates.append(event_response)
@@ -440,10 +962,12 @@ class TradingChannel(Channel):
         if event_response["ordStatus"] == "open":
             self.open_orders.add(event_response["orderID"])
         elif event_response["ordStatus"] == "filled":
-            self.open_orders.remove(event_response["orderID"])
+            self.open_orders.discard(event_response["orderID"])
+        self._emit("execution_report", event_response)
 
     def on_reject(self, event_response: Dict):
         self.rejects.append(event_response)
+        self._emit("order_rejected", event_response)
 
     def create_order(self, order: Order):
         """Send create order message
@@ -485,16 +1009,22 @@ class BalancesChannel(Channel):
     ----------
     name : str
     ws : BlockchainWebsocket
+    retention : RetentionPolicy
+        How many snapshots to keep in ``snapshots``
 
     Attributes
     ----------
     is_subscribed : bool
-    snapshots : List
+    snapshots : RingBuffer
+    events : Tuple[str]
+        ``"balance"`` with every snapshot of balances
     """
-    def __init__(self, ws, name):
-        super().__init__(ws=ws, name=name)
+    events = ("balance",)
+
+    def __init__(self, ws, name, retention=None):
+        super().__init__(ws=ws, name=name, retention=retention)
         self.is_authenticated = False
-        self.snapshots = []
+        self.snapshots = self._create_history()
 
     def __repr__(self):
         class_name = self.__class__.__name__
@@ -502,6 +1032,7 @@ class BalancesChannel(Channel):
 
     def on_snapshot(self, event_response):
         self.snapshots.append(event_response["balances"])
+        self._emit("balance", event_response)
 
 
 class ChannelFactory:
@@ -525,17 +1056,21 @@ class ChannelFactory:
             "balances": BalancesChannel,
         }
 
-    def create_channel(self, name, ws, **kwargs):
+    def create_channel(self, name, ws, options=None, **kwargs):
         """Create channel
 
         Parameters
         ----------
         name : str
         ws : BlockchainWebsocket
+        options : dict
+            Channel options which do not identify the channel on the exchange,
+            e.g. ``retention`` policy or ``backend`` of an order book
         kwargs : dict
+            Parameters used to subscribe to channel
 
         Returns
         -------
         Channel
         """
-        return self.channels[name](ws=ws, name=name, **kwargs)
+        return self.channels[name](ws=ws, name=name, **kwargs, **(options or dict()))
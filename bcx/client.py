@@ -1,27 +1,50 @@
-import time
+import asyncio
 import logging
+from concurrent.futures import Executor
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Tuple, Union
 
+from bcx.codec import JsonCodec, get_codec
+from bcx.dispatch import Dispatcher
 from bcx.orders import Order, MarketOrder, LimitOrder
 from bcx.manager import ChannelManager
-from bcx.channels import Channel, TradingChannel, HeartbeatChannel, AuthChannel, PricesChannel
-
-
-class BlockchainWebsocketClient:
-    """High level API to interact with Blockchain Exchange
+from bcx.pool import ConnectionPool
+from bcx.ingest import ProcessConnection
+from bcx.streams import EventStream, AsyncEventStream
+from bcx.websocket import BlockchainWebsocket, AsyncBlockchainWebsocket
+from bcx.channels import (
+    Channel, TradingChannel, HeartbeatChannel, AuthChannel, PricesChannel, OrderbookChannel, TickerChannel,
+    TradesChannel, BalancesChannel,
+)
+
+
+SUPPORTED_GRANULARITIES = [60, 300, 900, 3600, 21600, 86400]
+STREAM_EVENTS = {
+    "heartbeat": "heartbeat",
+    "l2": "book_update",
+    "l3": "book_update",
+    "prices": "candle",
+    "ticker": "ticker",
+    "trades": "trade",
+    "trading": "execution_report",
+    "balances": "balance",
+}
+
+
+class BaseWebsocketClient:
+    """Parts of the client API shared by :class:`BlockchainWebsocketClient` and
+    :class:`AsyncBlockchainWebsocketClient` which neither send messages nor wait
+    for the exchange
 
     Attributes
     ----------
     channel_manager : ChannelManager
+    timeout : float
     """
-    def __init__(self):
-        self.channel_manager = ChannelManager()
-
-    def _subscribe_to_channel(self, name: str, **channel_params):
-        """Generic interface to subscribe to channels"""
-        channel = self.get_channel(name, **channel_params)
-        if channel and not channel.is_subscribed:
+    def _send_subscription(self, name: str, options: Dict = None, **channel_params):
+        """Send subscription to a channel unless it is subscribed already, without waiting for acknowledgement"""
+        channel = self.get_channel(name, options=options, **channel_params)
+        if channel and not channel.is_subscribed and not channel.is_pending:
             channel.subscribe()
 
     def _unsubscribe_from_channel(self, name: str, **channel_params):
@@ -36,6 +59,144 @@ class BlockchainWebsocketClient:
         channel: AuthChannel = self.get_channel("auth")
         return channel.is_authenticated
 
+    def _get_subscription_channels(self, subscriptions: List[Dict]) -> List[Channel]:
+        """Channels described by subscriptions of :meth:`subscribe_many`, including ``auth`` if needed"""
+        channels = []
+        for subscription in subscriptions:
+            channel_params = dict(subscription)
+            name = channel_params.pop("channel")
+            options = channel_params.pop("options", None)
+            if name == "prices" and channel_params.get("granularity") not in SUPPORTED_GRANULARITIES:
+                logging.error(f"Granularity '{channel_params.get('granularity')}' is not supported. "
+                              f"Should be one of {SUPPORTED_GRANULARITIES}.")
+                continue
+            if name in ("trading", "balances"):
+                channels.append(self.get_channel("auth"))
+            channel = self.get_channel(name, options=options, **channel_params)
+            if channel is not None:
+                channels.append(channel)
+        return channels
+
+    def _add_listener(self, name: str, event: str, callback: callable, executor: Executor = None,
+                      conflate: float = None, **channel_params) -> Channel:
+        """Add listener to a channel before subscribing to it, so that no event is missed"""
+        channel = self.get_channel(name, **channel_params)
+        channel.add_listener(event, callback, executor, conflate=conflate)
+        return channel
+
+    def _stream_channel(self, name: str, event: str = None, **channel_params) -> Tuple[Channel, str]:
+        """Channel and event read by a stream"""
+        if name not in STREAM_EVENTS:
+            raise ValueError(f"Channel '{name}' can not be streamed. Select one from {list(STREAM_EVENTS)}")
+        return self.get_channel(name, **channel_params), event or STREAM_EVENTS[name]
+
+    @property
+    def available_channels(self) -> List[str]:
+        """List of all available channels on Blockchain Exchange"""
+        return self.channel_manager.available_channel_names
+
+    @property
+    def connected_channels(self) -> List[Channel]:
+        """List of all channels that you can interact with"""
+        return self.channel_manager.get_all_channels()
+
+    def get_channel(self, name: str, options: Dict = None, **channel_params) -> Channel:
+        """Get connection to a channel of interest
+
+        Parameters
+        ----------
+        name: str
+            Name of the channel
+        options: Dict
+            Channel options, only used when the channel is created
+        channel_params: Dict
+            Parameters used to subscribe to channel
+
+        Returns
+        -------
+        channel: Channel
+        """
+        channel = None
+        if name not in self.available_channels:
+            logging.error(f"Channel '{name}' is not supported. Select one from {self.available_channels}")
+        else:
+            channel = self.channel_manager.get_channel(name=name, options=options, **channel_params)
+        return channel
+
+    def get_last_heartbeat(self) -> datetime:
+        """Get last heartbeat"""
+        channel: HeartbeatChannel = self.get_channel("heartbeat")
+        return channel.last_heartbeat
+
+
+class BlockchainWebsocketClient(BaseWebsocketClient):
+    """High level API to interact with Blockchain Exchange
+
+    Parameters
+    ----------
+    codec : Union[str, JsonCodec]
+        JSON codec used for messages, one of ``"orjson"``, ``"msgspec"``, ``"ujson"``
+        or ``"json"``. The fastest installed one by default
+    dispatcher : Dispatcher
+        Bounded queue with worker threads processing received messages, so that
+        slow handlers do not stall reading from the socket. Messages are
+        processed on the reader thread if ``None``
+    trading_connection : bool
+        Whether to open a separate connection for ``auth``, ``trading`` and
+        ``balances`` channels, so that orders and execution reports are never
+        held up by market data sharing the same socket
+    connections : int
+        Number of connections sharing market data channels
+    sharding : str
+        How market data channels are spread over ``connections``, either
+        ``"hash"`` of their symbol or to the ``"least_loaded"`` connection by
+        message rate
+    processes : bool
+        Whether market data connections should receive and decode messages in
+        worker processes, one per connection, which deliver them through
+        shared memory. The separate trading connection stays in this process
+    timeout : float
+        Seconds to wait for the exchange to acknowledge subscriptions before
+        raising ``TimeoutError``, forever if ``None``
+    reconnect_delay : float
+        Upper bound of delay in seconds before the second connection attempt,
+        doubled after every failed attempt
+    reconnect_max_delay : float
+        Ceiling of delay between connection attempts in seconds
+    max_attempts : int
+        Number of connection attempts before giving up with ``ConnectionError``,
+        unlimited if ``None``
+
+    Attributes
+    ----------
+    channel_manager : ChannelManager
+    timeout : float
+    """
+    def __init__(self, codec: Union[str, JsonCodec] = None, dispatcher: Dispatcher = None,
+                 trading_connection: bool = False, connections: int = 1, sharding: str = "hash",
+                 processes: bool = False, timeout: float = 10.0, reconnect_delay: float = 0.5,
+                 reconnect_max_delay: float = 30.0, max_attempts: int = None):
+        codec = get_codec(codec)
+        self.timeout = timeout
+        ws_factory = ProcessConnection if processes else BlockchainWebsocket
+        ws_options = dict(
+            reconnect_delay=reconnect_delay,
+            reconnect_max_delay=reconnect_max_delay,
+            max_attempts=max_attempts,
+        )
+        self.channel_manager = ChannelManager(
+            codec=codec,
+            ws=ws_factory(codec=codec, **ws_options) if connections == 1 else None,
+            dispatcher=dispatcher,
+            trading_ws=BlockchainWebsocket(codec=codec, **ws_options) if trading_connection else None,
+            pool=ConnectionPool(size=connections, policy=sharding, codec=codec, ws_factory=ws_factory, **ws_options)
+            if connections > 1 else None,
+        )
+
+    def _subscribe_to_channel(self, name: str, options: Dict = None, **channel_params):
+        """Generic interface to subscribe to channels"""
+        self._send_subscription(name, options=options, **channel_params)
+
     def _auth(self):
         """Subscribe to `auth <https://exchange.blockchain.com/api/#authenticated-channels>`_ channel"""
         self._subscribe_to_channel(
@@ -48,28 +209,60 @@ class BlockchainWebsocketClient:
             name="heartbeat"
         )
 
-    def subscribe_to_orderbook_l2(self, symbol: str):
-        """Subscribe to `L2 order book <https://exchange.blockchain.com/api/#l2-order-book>`_ channel"""
+    def subscribe_to_orderbook_l2(self, symbol: str, **options):
+        """Subscribe to `L2 order book <https://exchange.blockchain.com/api/#l2-order-book>`_ channel
+
+        Parameters
+        ----------
+        symbol : str
+        options : Dict
+            Channel options, e.g. ``retention`` policy for raw updates or
+            ``backend="numpy"`` together with ``tick_size`` to keep the order
+            book in NumPy arrays
+        """
         self._subscribe_to_channel(
             name="l2",
+            options=options,
             symbol=symbol,
         )
 
-    def subscribe_to_orderbook_l3(self, symbol: str):
-        """Subscribe to `L3 order book <https://exchange.blockchain.com/api/#l3-order-book>`_ channel"""
+    def subscribe_to_orderbook_l3(self, symbol: str, **options):
+        """Subscribe to `L3 order book <https://exchange.blockchain.com/api/#l3-order-book>`_ channel
+
+        Parameters
+        ----------
+        symbol : str
+        options : Dict
+            Channel options, e.g. ``retention`` policy for raw updates or
+            ``backend="numpy"`` together with ``tick_size`` to keep aggregated
+            price levels in NumPy arrays
+        """
         self._subscribe_to_channel(
             name="l3",
+            options=options,
             symbol=symbol,
         )
 
-    def subscribe_to_prices(self, symbol: str, granularity: int):
-        """Subscribe to `prices <https://exchange.blockchain.com/api/#prices>`_ channel"""
-        supported_granularities = [60, 300, 900, 3600, 21600, 86400]
-        if granularity not in supported_granularities:
-            logging.error(f"Granularity '{granularity}' is not supported. Should be one of {supported_granularities}.")
+    def subscribe_to_prices(self, symbol: str, granularity: int, **options):
+        """Subscribe to `prices <https://exchange.blockchain.com/api/#prices>`_ channel
+
+        The exchange allows a single granularity per symbol, so once subscribed,
+        candles of coarser granularities for the same symbol are derived locally
+        from it. Subscribe to the finest granularity first.
+
+        Parameters
+        ----------
+        symbol : str
+        granularity : int
+        options : Dict
+            Channel options, e.g. ``retention`` policy
+        """
+        if granularity not in SUPPORTED_GRANULARITIES:
+            logging.error(f"Granularity '{granularity}' is not supported. Should be one of {SUPPORTED_GRANULARITIES}.")
         else:
             self._subscribe_to_channel(
                 name="prices",
+                options=options,
                 symbol=symbol,
                 granularity=granularity,
             )
@@ -80,98 +273,266 @@ class BlockchainWebsocketClient:
             name="symbols",
         )
 
-    def subscribe_to_ticker(self, symbol: str):
-        """Subscribe to `ticker <https://exchange.blockchain.com/api/#ticker>`_ channel"""
+    def subscribe_to_ticker(self, symbol: str, **options):
+        """Subscribe to `ticker <https://exchange.blockchain.com/api/#ticker>`_ channel
+
+        Parameters
+        ----------
+        symbol : str
+        options : Dict
+            Channel options, e.g. ``retention`` policy
+        """
         channel_params = {
             "symbol": symbol
         }
         self._subscribe_to_channel(
             name="ticker",
+            options=options,
             **channel_params
         )
 
-    def subscribe_to_trades(self, symbol: str):
-        """Subscribe to `trades <https://exchange.blockchain.com/api/#trades>`_ channel"""
+    def subscribe_to_trades(self, symbol: str, **options):
+        """Subscribe to `trades <https://exchange.blockchain.com/api/#trades>`_ channel
+
+        Parameters
+        ----------
+        symbol : str
+        options : Dict
+            Channel options, e.g. ``retention`` policy or ``columnar=True``
+            to keep trades in compact columnar storage
+        """
         self._subscribe_to_channel(
             name="trades",
+            options=options,
             symbol=symbol,
         )
 
-    def subscribe_to_trading(self):
-        """Subscribe to `trading <https://exchange.blockchain.com/api/#trading>`_ channel"""
+    def subscribe_to_trading(self, **options):
+        """Subscribe to `trading <https://exchange.blockchain.com/api/#trading>`_ channel
+
+        Waits until authentication is acknowledged, raises ``SubscriptionRejected``
+        if it is rejected or ``TimeoutError`` if it takes longer than ``timeout``.
+
+        Parameters
+        ----------
+        options : Dict
+            Channel options, e.g. ``retention`` policy
+        """
         self._auth()
-        while not self._is_authenticated:
-            logging.info("Waiting for authentication")
-            time.sleep(0.5)
+        self.get_channel("auth").wait_subscribed(self.timeout)
 
         self._subscribe_to_channel(
             name="trading",
+            options=options,
         )
 
-    def subscribe_to_balances(self):
-        """Subscribe to `balances <https://exchange.blockchain.com/api/#balances>`_ channel"""
+    def subscribe_to_balances(self, **options):
+        """Subscribe to `balances <https://exchange.blockchain.com/api/#balances>`_ channel
+
+        Waits until authentication is acknowledged, raises ``SubscriptionRejected``
+        if it is rejected or ``TimeoutError`` if it takes longer than ``timeout``.
+
+        Parameters
+        ----------
+        options : Dict
+            Channel options, e.g. ``retention`` policy
+        """
         self._auth()
-        while not self._is_authenticated:
-            logging.info("Waiting for authentication")
-            time.sleep(0.5)
+        self.get_channel("auth").wait_subscribed(self.timeout)
 
         self._subscribe_to_channel(
             name="balances",
+            options=options,
         )
 
-    @property
-    def available_channels(self) -> List[str]:
-        """List of all available channels on Blockchain Exchange"""
-        return self.channel_manager.available_channel_names
+    def subscribe_many(self, subscriptions: List[Dict]) -> Dict[str, List[Channel]]:
+        """Subscribe to many channels at once
 
-    @property
-    def connected_channels(self) -> List[Channel]:
-        """List of all channels that you can interact with"""
-        return self.channel_manager.get_all_channels()
+        All subscription messages are sent back to back, including
+        authentication if needed, and acknowledgements are awaited once for all
+        of them up to ``timeout``.
 
-    def get_channel(self, name: str, **channel_params) -> Channel:
-        """Get connection to a channel of interest
+        Parameters
+        ----------
+        subscriptions : List[Dict]
+            Channel name under ``"channel"`` key together with channel parameters
+            and optional ``"options"``, e.g. ``{"channel": "l2", "symbol": "BTC-USD"}``
+
+        Returns
+        -------
+        result : Dict[str, List[Channel]]
+            Channels which were ``"subscribed"``, ``"rejected"`` or are still
+            ``"pending"`` when timeout expired
+        """
+        channels = self._get_subscription_channels(subscriptions)
+        return self.channel_manager.subscribe_many(channels, timeout=self.timeout)
+
+    def on_trade(self, symbol: str, callback: callable, executor: Executor = None) -> TradesChannel:
+        """Call a function with every trade of a symbol, subscribing to `trades` channel if needed
 
         Parameters
         ----------
-        name: str
-            Name of the channel
-        channel_params: Dict
-            Parameters used to subscribe to channel
+        symbol : str
+        callback : callable
+            Called with trade message, e.g. ``{"price": 8723.45, "qty": 1.45, ...}``
+        executor : Executor
+            Executor running the callback, called on the thread handling messages if ``None``
 
         Returns
         -------
-        channel: Channel
+        channel : TradesChannel
+            Channel to remove the listener from with :meth:`Channel.remove_listener`
         """
-        channel = None
-        if name not in self.available_channels:
-            logging.error(f"Channel '{name}' is not supported. Select one from {self.available_channels}")
-        else:
-            channel = self.channel_manager.get_channel(name=name, **channel_params)
+        channel = self._add_listener("trades", "trade", callback, executor, symbol=symbol)
+        self.subscribe_to_trades(symbol)
         return channel
 
-    def get_last_heartbeat(self) -> datetime:
-        """Get last heartbeat"""
-        channel: HeartbeatChannel = self.get_channel("heartbeat")
-        return channel.last_heartbeat
+    def on_book_update(self, symbol: str, callback: callable, executor: Executor = None,
+                       level: str = "l2", conflate: float = None) -> OrderbookChannel:
+        """Call a function with every update of an order book once it is applied, see :meth:`on_trade`
+
+        Parameters
+        ----------
+        symbol : str
+        callback : callable
+            Called with ``{"bids": [...], "asks": [...]}`` levels which changed
+        executor : Executor
+        level : str
+            Order book channel, either ``"l2"`` or ``"l3"``
+        conflate : float
+            Maximum number of calls per second, updates received in between are
+            merged into one with the latest state of every changed level.
+            Called with every update if ``None``
+        """
+        channel = self._add_listener(level, "book_update", callback, executor, conflate, symbol=symbol)
+        self._subscribe_to_channel(level, symbol=symbol)
+        return channel
+
+    def on_ticker(self, symbol: str, callback: callable, executor: Executor = None,
+                  conflate: float = None) -> TickerChannel:
+        """Call a function with every ticker snapshot and update of a symbol, see :meth:`on_trade`
+
+        Parameters
+        ----------
+        symbol : str
+        callback : callable
+        executor : Executor
+        conflate : float
+            Maximum number of calls per second, tickers received in between are
+            merged into one with the latest value of every field
+        """
+        channel = self._add_listener("ticker", "ticker", callback, executor, conflate, symbol=symbol)
+        self.subscribe_to_ticker(symbol)
+        return channel
+
+    def on_candle(self, symbol: str, granularity: int, callback: callable,
+                  executor: Executor = None, conflate: float = None) -> PricesChannel:
+        """Call a function with every new or updated candle, see :meth:`on_trade`
+
+        Parameters
+        ----------
+        symbol : str
+        granularity : int
+        callback : callable
+            Called with ``[timestamp, open, high, low, close, volume]``
+        executor : Executor
+        conflate : float
+            Maximum number of calls per second, only the latest candle is passed
+        """
+        channel = self._add_listener("prices", "candle", callback, executor, conflate,
+                                     symbol=symbol, granularity=granularity)
+        self.subscribe_to_prices(symbol, granularity)
+        return channel
+
+    def on_execution_report(self, callback: callable, executor: Executor = None) -> TradingChannel:
+        """Call a function with every update of own orders, subscribing to `trading` channel if needed
+
+        Rejected order requests are passed to listeners of ``"order_rejected"``
+        event of the channel.
+
+        Parameters
+        ----------
+        callback : callable
+            Called with execution report, e.g. ``{"orderID": "12891", "ordStatus": "open", ...}``
+        executor : Executor
+            Executor running the callback, called on the thread handling messages if ``None``
+
+        Returns
+        -------
+        channel : TradingChannel
+        """
+        channel = self._add_listener("trading", "execution_report", callback, executor)
+        self.subscribe_to_trading()
+        return channel
+
+    def on_balance(self, callback: callable, executor: Executor = None) -> BalancesChannel:
+        """Call a function with every snapshot of balances, see :meth:`on_execution_report`"""
+        channel = self._add_listener("balances", "balance", callback, executor)
+        self.subscribe_to_balances()
+        return channel
+
+    def stream(self, name: str, max_size: int = 1000, overflow: str = "drop_oldest", event: str = None,
+               conflate: float = None, **channel_params) -> EventStream:
+        """Iterate over events of a channel, subscribing to it if needed
+
+        Every stream has its own bounded buffer, so several consumers can read
+        the same channel at their own pace, e.g.
+
+        .. code-block:: python
+
+            for trade in client.stream("trades", symbol="BTC-USD"):
+                ...
+
+        Parameters
+        ----------
+        name : str
+            Name of the channel
+        max_size : int
+            Maximum number of buffered events
+        overflow : str
+            What to do when the buffer is full, one of ``"block"``, ``"drop_oldest"``
+            or ``"drop_newest"``, see :class:`~bcx.streams.EventStream`
+        event : str
+            One of events of the channel, e.g. ``"book_snapshot"``. Trades,
+            order book updates, candles, tickers, heartbeats, execution
+            reports or balances by default
+        conflate : float
+            Maximum number of events per second. Order book updates or tickers
+            received in between are merged into one with the latest value of
+            every price level or field, other events are dropped but the latest.
+            Every event is streamed if ``None``
+        channel_params : Dict
+            Parameters used to subscribe to channel
+
+        Returns
+        -------
+        stream : EventStream
+            Iterator over events, close it to stop receiving them
+        """
+        channel, event = self._stream_channel(name, event, **channel_params)
+        stream = EventStream(channel, event, max_size=max_size, overflow=overflow, conflate=conflate)
+        self.subscribe_many([{"channel": name, **channel_params}])
+        return stream
 
     def get_trading_channel(self) -> TradingChannel:
         """Get connection to `trading <https://exchange.blockchain.com/api/#trading>`_ channel
 
+        Waits until subscription to the channel is acknowledged, see :meth:`subscribe_to_trading`
+
         Returns
         -------
         channel : TradingChannel
         """
         channel = self.get_channel("trading")
-
-        while not channel.is_subscribed:
-            time.sleep(0.5)
-            logging.warning("You need to be subscribed to 'trading' channel before you can communicate with it")
-        return channel
+        if not channel.is_subscribed:
+            logging.info("Waiting for subscription to 'trading' channel")
+        return channel.wait_subscribed(self.timeout)
 
     def get_prices_channel(self, symbol:str, granularity: int) -> PricesChannel:
         """Get connection to `prices <https://exchange.blockchain.com/api/#prices>`_ channel
 
+        Waits until subscription to the channel is acknowledged
+
         Parameters
         ----------
         symbol
@@ -186,11 +547,9 @@ class BlockchainWebsocketClient:
             symbol=symbol,
             granularity=granularity,
         )
-
-        while not channel.is_subscribed:
-            time.sleep(0.5)
-            logging.warning("You need to be subscribed to 'prices' channel before you can communicate with it")
-        return channel
+        if not channel.is_subscribed:
+            logging.info("Waiting for subscription to 'prices' channel")
+        return channel.wait_subscribed(self.timeout)
 
     def create_order(self, order: Order):
         """Create generic order
@@ -261,3 +620,315 @@ class BlockchainWebsocketClient:
         """Cancel all orders"""
         channel = self.get_trading_channel()
         channel.cancel_all_orders()
+
+
+class AsyncBlockchainWebsocketClient(BaseWebsocketClient):
+    """High level asyncio API to interact with Blockchain Exchange
+
+    Mirrors :class:`BlockchainWebsocketClient`, but methods that send messages
+    or wait for the exchange are coroutines. Messages are received on the
+    event loop running the client, so a single loop can drive many clients
+    without a thread per connection. Requires ``websockets``.
+
+    Parameters
+    ----------
+    codec : Union[str, JsonCodec]
+        JSON codec used for messages, the fastest installed one by default
+    dispatcher : Dispatcher
+        Bounded queue with worker threads processing received messages.
+        Messages are processed on the event loop if ``None``
+    trading_connection : bool
+        Whether to open a separate connection for ``auth``, ``trading`` and
+        ``balances`` channels
+    timeout : float
+        Seconds to wait for the exchange to acknowledge subscriptions before
+        raising ``TimeoutError``, forever if ``None``
+    reconnect_delay : float
+        Upper bound of delay in seconds before the second connection attempt,
+        doubled after every failed attempt
+    reconnect_max_delay : float
+        Ceiling of delay between connection attempts in seconds
+    max_attempts : int
+        Number of connection attempts before giving up with ``ConnectionError``,
+        unlimited if ``None``
+
+    Attributes
+    ----------
+    channel_manager : ChannelManager
+    timeout : float
+    """
+    def __init__(self, codec: Union[str, JsonCodec] = None, dispatcher: Dispatcher = None,
+                 trading_connection: bool = False, timeout: float = 10.0, reconnect_delay: float = 0.5,
+                 reconnect_max_delay: float = 30.0, max_attempts: int = None):
+        codec = get_codec(codec)
+        self.timeout = timeout
+        ws_options = dict(
+            reconnect_delay=reconnect_delay,
+            reconnect_max_delay=reconnect_max_delay,
+            max_attempts=max_attempts,
+        )
+        self.channel_manager = ChannelManager(
+            ws=AsyncBlockchainWebsocket(codec=codec, **ws_options),
+            dispatcher=dispatcher,
+            trading_ws=AsyncBlockchainWebsocket(codec=codec, **ws_options) if trading_connection else None,
+        )
+
+    async def connect(self, name: str = None):
+        """Connect to the exchange, called automatically on the first subscription
+
+        Parameters
+        ----------
+        name : str
+            Connect only the connection used by channels with this name, all
+            connections if ``None``
+        """
+        if name is not None:
+            await self.channel_manager.get_channel_ws(name).connect()
+        else:
+            for ws in self._connections:
+                await ws.connect()
+
+    async def close(self):
+        """Close connections to the exchange"""
+        for ws in self._connections:
+            await ws.close()
+
+    @property
+    def _connections(self) -> List[AsyncBlockchainWebsocket]:
+        manager = self.channel_manager
+        return [manager.ws] if manager.trading_ws is manager.ws else [manager.ws, manager.trading_ws]
+
+    async def _wait_subscribed(self, channel: Channel) -> Channel:
+        """Wait for subscription to be acknowledged without blocking the event loop"""
+        if not channel.is_subscribed:
+            try:
+                await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(channel.subscription)), self.timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"{channel} did not receive acknowledgement within {self.timeout} seconds")
+        return channel
+
+    async def _subscribe_to_channel(self, name: str, options: Dict = None, **channel_params):
+        await self.connect(name)
+        self._send_subscription(name, options=options, **channel_params)
+
+    async def subscribe_many(self, subscriptions: List[Dict]) -> Dict[str, List[Channel]]:
+        """Subscribe to many channels at once, see :meth:`BlockchainWebsocketClient.subscribe_many`"""
+        channels = self._get_subscription_channels(subscriptions)
+        for name in {channel.name for channel in channels}:
+            await self.connect(name)
+        subscriptions = self.channel_manager.send_subscriptions(channels)
+        if subscriptions:
+            await asyncio.wait(
+                [asyncio.shield(asyncio.wrap_future(future)) for future in subscriptions.values()],
+                timeout=self.timeout,
+            )
+        return self.channel_manager.subscription_results(subscriptions)
+
+    async def _auth(self):
+        await self._subscribe_to_channel(
+            name="auth",
+        )
+
+    async def subscribe_to_heartbeat(self):
+        """Subscribe to `heartbeat <https://exchange.blockchain.com/api/#heartbeat>`_ channel"""
+        await self._subscribe_to_channel(
+            name="heartbeat"
+        )
+
+    async def subscribe_to_orderbook_l2(self, symbol: str, **options):
+        """Subscribe to `L2 order book <https://exchange.blockchain.com/api/#l2-order-book>`_ channel"""
+        await self._subscribe_to_channel(
+            name="l2",
+            options=options,
+            symbol=symbol,
+        )
+
+    async def subscribe_to_orderbook_l3(self, symbol: str, **options):
+        """Subscribe to `L3 order book <https://exchange.blockchain.com/api/#l3-order-book>`_ channel"""
+        await self._subscribe_to_channel(
+            name="l3",
+            options=options,
+            symbol=symbol,
+        )
+
+    async def subscribe_to_prices(self, symbol: str, granularity: int, **options):
+        """Subscribe to `prices <https://exchange.blockchain.com/api/#prices>`_ channel"""
+        if granularity not in SUPPORTED_GRANULARITIES:
+            logging.error(f"Granularity '{granularity}' is not supported. Should be one of {SUPPORTED_GRANULARITIES}.")
+        else:
+            await self._subscribe_to_channel(
+                name="prices",
+                options=options,
+                symbol=symbol,
+                granularity=granularity,
+            )
+
+    async def subscribe_to_symbols(self):
+        """Subscribe to `symbols <https://exchange.blockchain.com/api/#symbols>`_ channel"""
+        await self._subscribe_to_channel(
+            name="symbols",
+        )
+
+    async def subscribe_to_ticker(self, symbol: str, **options):
+        """Subscribe to `ticker <https://exchange.blockchain.com/api/#ticker>`_ channel"""
+        await self._subscribe_to_channel(
+            name="ticker",
+            options=options,
+            symbol=symbol,
+        )
+
+    async def subscribe_to_trades(self, symbol: str, **options):
+        """Subscribe to `trades <https://exchange.blockchain.com/api/#trades>`_ channel"""
+        await self._subscribe_to_channel(
+            name="trades",
+            options=options,
+            symbol=symbol,
+        )
+
+    async def subscribe_to_trading(self, **options):
+        """Subscribe to `trading <https://exchange.blockchain.com/api/#trading>`_ channel"""
+        await self._auth()
+        await self._wait_subscribed(self.get_channel("auth"))
+
+        await self._subscribe_to_channel(
+            name="trading",
+            options=options,
+        )
+
+    async def subscribe_to_balances(self, **options):
+        """Subscribe to `balances <https://exchange.blockchain.com/api/#balances>`_ channel"""
+        await self._auth()
+        await self._wait_subscribed(self.get_channel("auth"))
+
+        await self._subscribe_to_channel(
+            name="balances",
+            options=options,
+        )
+
+    async def on_trade(self, symbol: str, callback: callable, executor: Executor = None) -> TradesChannel:
+        """Call a function with every trade of a symbol, see :meth:`BlockchainWebsocketClient.on_trade`
+
+        Callbacks without executor are called on the event loop thread.
+        """
+        channel = self._add_listener("trades", "trade", callback, executor, symbol=symbol)
+        await self.subscribe_to_trades(symbol)
+        return channel
+
+    async def on_book_update(self, symbol: str, callback: callable, executor: Executor = None,
+                             level: str = "l2", conflate: float = None) -> OrderbookChannel:
+        """Call a function with every update of an order book, see :meth:`BlockchainWebsocketClient.on_book_update`"""
+        channel = self._add_listener(level, "book_update", callback, executor, conflate, symbol=symbol)
+        await self._subscribe_to_channel(level, symbol=symbol)
+        return channel
+
+    async def on_ticker(self, symbol: str, callback: callable, executor: Executor = None,
+                        conflate: float = None) -> TickerChannel:
+        """Call a function with every ticker of a symbol, see :meth:`BlockchainWebsocketClient.on_ticker`"""
+        channel = self._add_listener("ticker", "ticker", callback, executor, conflate, symbol=symbol)
+        await self.subscribe_to_ticker(symbol)
+        return channel
+
+    async def on_candle(self, symbol: str, granularity: int, callback: callable,
+                        executor: Executor = None, conflate: float = None) -> PricesChannel:
+        """Call a function with every candle, see :meth:`BlockchainWebsocketClient.on_candle`"""
+        channel = self._add_listener("prices", "candle", callback, executor, conflate,
+                                     symbol=symbol, granularity=granularity)
+        await self.subscribe_to_prices(symbol, granularity)
+        return channel
+
+    async def on_execution_report(self, callback: callable, executor: Executor = None) -> TradingChannel:
+        """Call a function with every update of own orders, see :meth:`BlockchainWebsocketClient.on_execution_report`"""
+        channel = self._add_listener("trading", "execution_report", callback, executor)
+        await self.subscribe_to_trading()
+        return channel
+
+    async def on_balance(self, callback: callable, executor: Executor = None) -> BalancesChannel:
+        """Call a function with every snapshot of balances, see :meth:`BlockchainWebsocketClient.on_balance`"""
+        channel = self._add_listener("balances", "balance", callback, executor)
+        await self.subscribe_to_balances()
+        return channel
+
+    def astream(self, name: str, max_size: int = 1000, overflow: str = "drop_oldest", event: str = None,
+                conflate: float = None, **channel_params) -> AsyncEventStream:
+        """Iterate asynchronously over events of a channel, see :meth:`BlockchainWebsocketClient.stream`
+
+        Subscription is sent once the first event is awaited, e.g.
+
+        .. code-block:: python
+
+            async for update in client.astream("l2", symbol="BTC-USD"):
+                ...
+
+        Parameters
+        ----------
+        name : str
+        max_size : int
+        overflow : str
+            Either ``"drop_oldest"`` or ``"drop_newest"``
+        event : str
+        conflate : float
+        channel_params : Dict
+
+        Returns
+        -------
+        stream : AsyncEventStream
+        """
+        channel, event = self._stream_channel(name, event, **channel_params)
+        return AsyncEventStream(
+            channel, event, max_size=max_size, overflow=overflow, conflate=conflate,
+            subscribe=lambda: self.subscribe_many([{"channel": name, **channel_params}]),
+        )
+
+    async def get_trading_channel(self) -> TradingChannel:
+        """Get connection to `trading <https://exchange.blockchain.com/api/#trading>`_ channel"""
+        return await self._wait_subscribed(self.get_channel("trading"))
+
+    async def get_prices_channel(self, symbol: str, granularity: int) -> PricesChannel:
+        """Get connection to `prices <https://exchange.blockchain.com/api/#prices>`_ channel"""
+        channel = self.get_channel(
+            "prices",
+            symbol=symbol,
+            granularity=granularity,
+        )
+        return await self._wait_subscribed(channel)
+
+    async def create_order(self, order: Order):
+        """Create generic order"""
+        if order.is_valid:
+            channel = await self.get_trading_channel()
+            channel.create_order(order=order)
+        else:
+            logging.error(f"Order is not valid: {order.to_json()}")
+
+    async def create_market_order(self, symbol: str, side: str, quantity: float, time_in_force: str, order_id: str = None):
+        """Create market order"""
+        order = MarketOrder(
+            symbol=symbol,
+            side=side,
+            quantity=quantity,
+            time_in_force=time_in_force,
+            order_id=order_id,
+        )
+        await self.create_order(order=order)
+
+    async def create_limit_order(self, price: float, symbol: str, side: str, quantity: float, time_in_force: str, order_id: str = None):
+        """Create limit order"""
+        order = LimitOrder(
+            price=price,
+            symbol=symbol,
+            side=side,
+            quantity=quantity,
+            time_in_force=time_in_force,
+            order_id=order_id,
+        )
+        await self.create_order(order=order)
+
+    async def cancel_order(self, order_id):
+        """Cancel order"""
+        channel = await self.get_trading_channel()
+        channel.cancel_order(order_id=order_id)
+
+    async def cancel_all_orders(self):
+        """Cancel all orders"""
+        channel = await self.get_trading_channel()
+        channel.cancel_all_orders()
@@ -0,0 +1,98 @@
+import json
+import logging
+from typing import Union
+
+
+class JsonCodec:
+    """Encoder and decoder of JSON messages based on the standard library ``json``
+
+    Encoding and decoding functions of the underlying library are bound
+    directly as attributes to avoid extra call overhead on every message.
+
+    Attributes
+    ----------
+    name : str
+    loads : callable
+        Decode JSON message given as ``str`` or ``bytes``
+    dumps : callable
+        Encode message as JSON ``str``
+    """
+    name = "json"
+
+    def __init__(self):
+        self.loads = json.loads
+        self.dumps = json.dumps
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(name={self.name})"
+
+
+class OrjsonCodec(JsonCodec):
+    """Encoder and decoder of JSON messages based on `orjson <https://github.com/ijl/orjson>`_"""
+    name = "orjson"
+
+    def __init__(self):
+        super().__init__()
+        import orjson
+        encode = orjson.dumps
+        self.loads = orjson.loads
+        self.dumps = lambda message: encode(message).decode()
+
+
+class MsgspecCodec(JsonCodec):
+    """Encoder and decoder of JSON messages based on `msgspec <https://github.com/jcrist/msgspec>`_"""
+    name = "msgspec"
+
+    def __init__(self):
+        super().__init__()
+        import msgspec
+        encode = msgspec.json.Encoder().encode
+        self.loads = msgspec.json.Decoder().decode
+        self.dumps = lambda message: encode(message).decode()
+
+
+class UjsonCodec(JsonCodec):
+    """Encoder and decoder of JSON messages based on `ujson <https://github.com/ultrajson/ultrajson>`_"""
+    name = "ujson"
+
+    def __init__(self):
+        super().__init__()
+        import ujson
+        self.loads = ujson.loads
+        self.dumps = ujson.dumps
+
+
+CODECS = {
+    codec.name: codec
+    for codec in (OrjsonCodec, MsgspecCodec, UjsonCodec, JsonCodec)
+}
+
+
+def get_codec(codec: Union[str, JsonCodec] = None) -> JsonCodec:
+    """Get JSON codec by its name
+
+    Parameters
+    ----------
+    codec : Union[str, JsonCodec]
+        One of ``"orjson"``, ``"msgspec"``, ``"ujson"`` or ``"json"``. If ``None``,
+        the fastest installed one is used in that order. Codec instances are
+        returned as is.
+
+    Returns
+    -------
+    codec : JsonCodec
+    """
+    if isinstance(codec, JsonCodec):
+        return codec
+    if codec is not None:
+        if codec not in CODECS:
+            raise ValueError(f"JSON codec '{codec}' is not supported. Should be one of {list(CODECS)}")
+        return CODECS[codec]()
+
+    for codec_class in CODECS.values():
+        try:
+            return codec_class()
+        except ImportError:
+            logging.debug(f"JSON codec '{codec_class.name}' is not installed")
+    return JsonCodec()
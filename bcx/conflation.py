@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Dict, List
+
+
+def _merge_book_update(pending: Dict, update: Dict) -> Dict:
+    """Latest level of every side and price, or order id of ``l3`` books"""
+    if pending is None:
+        pending = {"bids": dict(), "asks": dict()}
+    for side, levels in pending.items():
+        for level in update[side]:
+            levels[level.get("id", level["px"])] = level
+    return pending
+
+
+def _finish_book_update(pending: Dict) -> List[Dict]:
+    return [{side: list(levels.values()) for side, levels in pending.items()}]
+
+
+def _merge_fields(pending: Dict, update: Dict) -> Dict:
+    """Latest value of every field"""
+    if pending is None:
+        pending = dict()
+    pending.update(update)
+    return pending
+
+
+def _merge_candles(pending: Dict, candle: List) -> Dict:
+    """Latest state of every candle by its open time"""
+    if pending is None:
+        pending = dict()
+    pending[candle[0]] = candle
+    return pending
+
+
+def _finish_candles(pending: Dict) -> List[List]:
+    return [pending[timestamp] for timestamp in sorted(pending)]
+
+
+def _replace(pending, update):
+    return update
+
+
+def _single(pending) -> List:
+    return [pending]
+
+
+_MERGES = {
+    "book_update": (_merge_book_update, _finish_book_update),
+    "ticker": (_merge_fields, _single),
+    "candle": (_merge_candles, _finish_candles),
+}
+
+
+class Conflator:
+    """Coalesce events per key and deliver merged ones at most ``rate`` times per second
+
+    Order book updates are merged per side and price level, or order id of
+    ``l3`` books, and tickers per field, so that the latest value of every
+    key wins and applying merged events converges to the same state as
+    applying all of them. Candles are merged by their open time and the
+    latest state of each one is delivered separately in chronological order,
+    so that the final values of a candle closed in between are not lost.
+    Other events are conflated as a whole, only the latest one is delivered.
+
+    The first event is delivered right away, later ones once ``1 / rate``
+    seconds passed since the previous delivery, either on the thread
+    handling messages or on a timer thread.
+
+    Parameters
+    ----------
+    event : str
+        Name of conflated event, e.g. ``"book_update"``
+    deliver : callable
+        Called with every merged event
+    rate : float
+        Maximum number of deliveries per second
+    clock : callable
+        Source of current monotonic time in seconds
+
+    Attributes
+    ----------
+    received : int
+        Number of events put into the conflator
+    delivered : int
+        Number of merged events delivered
+    """
+    def __init__(self, event: str, deliver: callable, rate: float = 10.0, clock: callable = time.monotonic):
+        if rate <= 0:
+            raise ValueError(f"Conflation rate should be positive: {rate}")
+
+        self.event = event
+        self.rate = rate
+        self.received = 0
+        self.delivered = 0
+        self._deliver = deliver
+        self._merge, self._finish = _MERGES.get(event, (_replace, _single))
+        self._clock = clock
+        self._interval = 1.0 / rate
+        self._last_delivery = None
+        self._pending = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(event={self.event}, rate={self.rate}, received={self.received}, delivered={self.delivered})"
+
+    def put(self, event):
+        """Merge event into pending ones, delivering them if allowed by the rate"""
+        with self._lock:
+            self.received += 1
+            self._pending = self._merge(self._pending, event)
+            if self._timer is not None:
+                return
+            if self._last_delivery is not None:
+                delay = self._last_delivery + self._interval - self._clock()
+                if delay > 0:
+                    self._timer = threading.Timer(delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                    return
+        self.flush()
+
+    def flush(self):
+        """Deliver pending events right away"""
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._timer = None
+            if pending is None:
+                return
+            self._last_delivery = self._clock()
+            merged = self._finish(pending)
+            self.delivered += len(merged)
+        for event in merged:
+            self._deliver(event)
+
+    def cancel(self):
+        """Drop pending events and stop the timer"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = None
@@ -0,0 +1,327 @@
+import logging
+from collections import deque
+from threading import Condition, Lock, Thread
+from typing import Dict, List, Tuple
+
+
+CRITICAL_CHANNELS = frozenset(["auth", "trading", "balances"])
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+def _find_field(frame: str, name: str) -> str:
+    """Value of a top level string field found by scanning raw JSON frame without decoding it
+
+    Returns
+    -------
+    value : str
+        ``None`` if the field was not found or its value is not a string
+    """
+    idx = frame.find(f'"{name}"')
+    if idx < 0:
+        return None
+    idx = frame.find(":", idx + len(name) + 2)
+    if idx < 0:
+        return None
+    start = frame.find('"', idx + 1)
+    if start < 0 or frame[idx + 1:start].strip():
+        return None
+    end = frame.find('"', start + 1)
+    if end < 0:
+        return None
+    return frame[start + 1:end]
+
+
+def classify_frame(frame) -> Tuple[str, str]:
+    """Channel name and symbol of a raw frame
+
+    Parameters
+    ----------
+    frame : Union[str, bytes, Dict]
+        Raw JSON message received from the exchange or already decoded one
+
+    Returns
+    -------
+    key : Tuple[str, str]
+        ``(channel, symbol)``, either may be ``None`` if not present
+    """
+    if isinstance(frame, dict):
+        return frame.get("channel"), frame.get("symbol")
+    if isinstance(frame, (bytes, bytearray)):
+        frame = frame.decode()
+    return _find_field(frame, "channel"), _find_field(frame, "symbol")
+
+
+def _is_update(frame) -> bool:
+    """Whether a frame is an **updated** event, the only kind of frames which may be dropped"""
+    if isinstance(frame, dict):
+        return frame.get("event") == "updated"
+    if isinstance(frame, (bytes, bytearray)):
+        frame = frame.decode()
+    return _find_field(frame, "event") == "updated"
+
+
+class _Lane:
+    """FIFO of frames processed by a single worker thread"""
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size
+        self.frames = deque()
+        self.condition = Condition()
+        self.received = 0
+        self.processed = 0
+        self.dropped = dict()
+        self.max_depth = 0
+
+    def count_drop(self, channel: str):
+        self.dropped[channel] = self.dropped.get(channel, 0) + 1
+
+
+class Dispatcher:
+    """Bounded queue decoupling frame reception from message processing
+
+    The websocket reader thread only enqueues raw frames, while worker threads
+    decode and route them. Frames of the same channel and symbol are always
+    processed by the same worker, so per-channel ordering is preserved.
+
+    Frames of priority channels, ``auth``, ``trading`` and ``balances`` by
+    default, are classified by scanning the raw frame and queued in a
+    separate priority lane. Market data workers process queued priority
+    frames before each market data frame of theirs, and a dedicated worker
+    processes them while market data is idle, so execution reports wait
+    behind at most the market data frames being processed at the moment
+    rather than behind a whole burst. Priority frames are processed one at
+    a time in the order they were received. They are never dropped nor
+    blocked on. The bound applies to
+    market data frames and when their queue is full, ``overflow`` policy
+    decides what happens:
+
+    * ``"block"`` - reader waits for workers, pushing back on the socket
+    * ``"drop_oldest"`` - the oldest queued update is dropped
+    * ``"drop_newest"`` - the received update is dropped
+
+    Only **updated** events are dropped, subscription acknowledgements,
+    rejections and snapshots are always queued, even beyond the bound.
+    Channel and symbol of every dropped frame are passed to the drop
+    handler, so that order books missing an update can request a fresh
+    snapshot.
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker threads processing market data
+    max_size : int
+        Maximum number of queued market data frames per worker
+    overflow : str
+        One of ``"block"``, ``"drop_oldest"`` or ``"drop_newest"``
+    priority_channels : List[str]
+        Names of channels processed ahead of market data
+    """
+    def __init__(self, workers: int = 1, max_size: int = 10000, overflow: str = "block",
+                 priority_channels: List[str] = CRITICAL_CHANNELS):
+        if workers < 1:
+            raise ValueError(f"Dispatcher needs at least one worker: {workers}")
+        if max_size < 1:
+            raise ValueError(f"Dispatcher queue size should be positive: {max_size}")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Overflow policy '{overflow}' is not supported. Should be one of {OVERFLOW_POLICIES}")
+
+        self.workers = workers
+        self.max_size = max_size
+        self.overflow = overflow
+        self.priority_channels = frozenset(priority_channels)
+
+        self._handler = lambda x: x
+        self._drop_handler = lambda channel, symbol: None
+        self._priority_lane = _Lane()
+        self._priority_lock = Lock()
+        self._lanes = [_Lane(max_size=max_size) for _ in range(workers)]
+        self._threads = []
+        self._is_running = False
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(workers={self.workers}, max_size={self.max_size}, overflow={self.overflow})"
+
+    @property
+    def _all_lanes(self) -> List[_Lane]:
+        return [self._priority_lane] + self._lanes
+
+    @property
+    def depth(self) -> int:
+        """Number of frames currently queued"""
+        return sum(len(lane.frames) for lane in self._all_lanes)
+
+    @property
+    def priority_depth(self) -> int:
+        """Number of priority frames currently queued"""
+        return len(self._priority_lane.frames)
+
+    @property
+    def received(self) -> int:
+        """Number of frames enqueued"""
+        return sum(lane.received for lane in self._all_lanes)
+
+    @property
+    def processed(self) -> int:
+        """Number of frames passed to the message handler"""
+        return sum(lane.processed for lane in self._all_lanes)
+
+    @property
+    def dropped(self) -> Dict[str, int]:
+        """Number of dropped frames per channel"""
+        dropped = dict()
+        for lane in self._lanes:
+            for channel, count in list(lane.dropped.items()):
+                dropped[channel] = dropped.get(channel, 0) + count
+        return dropped
+
+    @property
+    def max_depth(self) -> int:
+        """Largest number of frames observed in a single worker queue"""
+        return max(lane.max_depth for lane in self._all_lanes)
+
+    @property
+    def stats(self) -> Dict:
+        """Snapshot of dispatcher counters"""
+        return {
+            "depth": self.depth,
+            "priority_depth": self.priority_depth,
+            "max_depth": self.max_depth,
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+        }
+
+    def set_message_handler(self, handler: callable):
+        """Set method which decodes and routes frames, called from worker threads"""
+        self._handler = handler
+
+    def set_drop_handler(self, handler: callable):
+        """Set method called with channel and symbol of every dropped frame, called from the thread enqueuing frames"""
+        self._drop_handler = handler
+
+    def start(self):
+        """Start worker threads, called automatically on the first frame"""
+        if self._is_running:
+            return
+        self._is_running = True
+        targets = [(self._run_priority_worker, ())] + [(self._run_worker, (lane,)) for lane in self._lanes]
+        for target, args in targets:
+            thread = Thread(target=target, args=args)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = None):
+        """Stop worker threads once they process already queued frames"""
+        self._is_running = False
+        for lane in self._all_lanes:
+            with lane.condition:
+                lane.condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def put(self, frame):
+        """Enqueue raw frame received from the exchange
+
+        Parameters
+        ----------
+        frame : Union[str, bytes, Dict]
+        """
+        if not self._is_running:
+            self.start()
+
+        channel, symbol = classify_frame(frame)
+        if channel in self.priority_channels:
+            lane = self._priority_lane
+        elif self.workers == 1:
+            lane = self._lanes[0]
+        else:
+            lane = self._lanes[hash((channel, symbol)) % self.workers]
+
+        frames = lane.frames
+        dropped = None
+        with lane.condition:
+            if lane.max_size is not None and len(frames) >= lane.max_size:
+                if self.overflow == "block":
+                    while len(frames) >= lane.max_size and self._is_running:
+                        lane.condition.wait()
+                elif self.overflow == "drop_newest":
+                    if _is_update(frame):
+                        lane.count_drop(channel)
+                        dropped = (channel, symbol)
+                        frame = None
+                else:
+                    dropped = self._drop_oldest_update(lane)
+
+            if frame is not None:
+                self._append(lane, frame)
+
+        if dropped is not None:
+            self._drop_handler(*dropped)
+
+    def _drop_oldest_update(self, lane: _Lane) -> Tuple[str, str]:
+        """Remove the oldest queued update, returns its channel and symbol or ``None`` if there is none"""
+        frames = lane.frames
+        for idx, queued in enumerate(frames):
+            if _is_update(queued):
+                del frames[idx]
+                key = classify_frame(queued)
+                lane.count_drop(key[0])
+                return key
+        return None
+
+    def _append(self, lane: _Lane, frame):
+        """Queue a frame, called holding lane condition"""
+        frames = lane.frames
+        frames.append(frame)
+        lane.received += 1
+        if len(frames) > lane.max_depth:
+            lane.max_depth = len(frames)
+        lane.condition.notify_all()
+
+    def _handle(self, lane: _Lane, frame):
+        try:
+            self._handler(frame)
+        except Exception as e:
+            logging.error(f"Error handling message {frame}: {e}")
+        lane.processed += 1
+
+    def _drain_priority(self):
+        """Process all queued priority frames, one at a time and in order on whichever thread holds the lock"""
+        lane = self._priority_lane
+        with self._priority_lock:
+            while True:
+                with lane.condition:
+                    if not lane.frames:
+                        return
+                    frame = lane.frames.popleft()
+                self._handle(lane, frame)
+
+    def _run_priority_worker(self):
+        lane = self._priority_lane
+        while True:
+            with lane.condition:
+                while not lane.frames and self._is_running:
+                    lane.condition.wait()
+                if not lane.frames and not self._is_running:
+                    return
+            self._drain_priority()
+
+    def _run_worker(self, lane: _Lane):
+        frames = lane.frames
+        condition = lane.condition
+        priority_frames = self._priority_lane.frames
+        while True:
+            with condition:
+                while not frames and self._is_running:
+                    condition.wait()
+                if not frames:
+                    return
+                frame = frames.popleft()
+                if lane.max_size is not None:
+                    condition.notify_all()
+
+            if priority_frames:
+                self._drain_priority()
+            self._handle(lane, frame)
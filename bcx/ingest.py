@@ -0,0 +1,468 @@
+import logging
+import multiprocessing
+import struct
+import time
+from threading import Thread, current_thread
+from typing import Dict, List, Union
+
+from bcx.codec import JsonCodec, get_codec
+from bcx.dispatch import classify_frame
+from bcx.websocket import BlockchainWebsocket
+
+
+RAW = 0
+SYMBOL = 1
+L2_UPDATE = 2
+L3_UPDATE = 3
+TRADE = 4
+OPEN = 5
+L2_SNAPSHOT = 6
+L3_SNAPSHOT = 7
+
+_LENGTH = struct.Struct("<I")
+_PADDING = 0xFFFFFFFF
+_HEADER = struct.Struct("<BHqII")
+_L2_LEVEL = struct.Struct("<ddI")
+_L3_LEVEL = struct.Struct("<ddH")
+_TRADE = struct.Struct("<BHqddbqB")
+_SIDES = ("sell", "buy")
+_OPEN = struct.Struct("<Bd")
+_BOOK_KINDS = {
+    ("l2", "updated"): L2_UPDATE,
+    ("l3", "updated"): L3_UPDATE,
+    ("l2", "snapshot"): L2_SNAPSHOT,
+    ("l3", "snapshot"): L3_SNAPSHOT,
+}
+_BOOK_EVENTS = {kind: key for key, kind in _BOOK_KINDS.items()}
+_PACKED_CODECS = ("ujson", "json")
+_BOOK_KEYS = frozenset(("seqnum", "event", "channel", "symbol", "bids", "asks"))
+_TRADE_KEYS = frozenset(("seqnum", "event", "channel", "symbol", "timestamp", "side", "qty", "price", "trade_id"))
+
+
+class SharedRingBuffer:
+    """Single producer, single consumer ring of byte records in shared memory
+
+    Records are written by one process and read by another one without
+    pickling or copying through a pipe. Each record is prefixed by its length
+    and records never wrap around the end of the buffer.
+
+    Parameters
+    ----------
+    capacity : int
+        Size of the buffer in bytes
+    context : multiprocessing.context.BaseContext
+        Multiprocessing context used to allocate shared memory, the default one if ``None``
+    """
+    def __init__(self, capacity: int = 1 << 25, context=None):
+        context = context or multiprocessing.get_context()
+        self.capacity = capacity
+        self._data = context.RawArray("B", capacity)
+        self._head = context.RawValue("q", 0)
+        self._tail = context.RawValue("q", 0)
+        self._is_waiting = context.RawValue("b", 0)
+        self._ready = context.Event()
+        self._view = None
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(capacity={self.capacity}, size={len(self)})"
+
+    def __len__(self):
+        return self._head.value - self._tail.value
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_view"] = None
+        return state
+
+    @property
+    def view(self) -> memoryview:
+        if self._view is None:
+            self._view = memoryview(self._data).cast("B")
+        return self._view
+
+    def put(self, record: bytes) -> bool:
+        """Write a record, called only by the producer
+
+        Returns
+        -------
+        is_written : bool
+            ``False`` if there is not enough free space
+        """
+        size = _LENGTH.size + len(record)
+        if size > self.capacity // 2:
+            raise ValueError(f"Record of {len(record)} bytes does not fit into {self}")
+
+        head = self._head.value
+        pos = head % self.capacity
+        contiguous = self.capacity - pos
+        required = size if contiguous >= size else contiguous + size
+        if self.capacity - (head - self._tail.value) < required:
+            return False
+
+        view = self.view
+        if contiguous < size:
+            if contiguous >= _LENGTH.size:
+                _LENGTH.pack_into(view, pos, _PADDING)
+            head += contiguous
+            pos = 0
+        _LENGTH.pack_into(view, pos, len(record))
+        view[pos + _LENGTH.size:pos + size] = record
+        self._head.value = head + size
+
+        if self._is_waiting.value:
+            self._ready.set()
+        return True
+
+    def get(self) -> bytes:
+        """Read the oldest record, called only by the consumer
+
+        Returns
+        -------
+        record : bytes
+            ``None`` if the buffer is empty
+        """
+        tail = self._tail.value
+        if tail == self._head.value:
+            return None
+
+        view = self.view
+        pos = tail % self.capacity
+        contiguous = self.capacity - pos
+        if contiguous < _LENGTH.size or _LENGTH.unpack_from(view, pos)[0] == _PADDING:
+            tail += contiguous
+            pos = 0
+        length = _LENGTH.unpack_from(view, pos)[0]
+        start = pos + _LENGTH.size
+        record = bytes(view[start:start + length])
+        self._tail.value = tail + _LENGTH.size + length
+        return record
+
+    def wait(self, timeout: float = None):
+        """Block consumer until a record is written or timeout expires"""
+        self._is_waiting.value = 1
+        if self._head.value == self._tail.value:
+            self._ready.wait(timeout)
+        self._ready.clear()
+        self._is_waiting.value = 0
+
+
+class EventEncoder:
+    """Encode frames received from the exchange as compact binary records
+
+    Snapshots and updates of ``l2`` and ``l3`` order books and trades are
+    decoded and packed with ``struct``, which is much cheaper to unpack than
+    JSON. Other frames and frames with unexpected fields are passed as they
+    are.
+
+    Unpacking records only pays off against the slower JSON codecs. With
+    ``orjson`` or ``msgspec`` decoding JSON is faster than unpacking records
+    (see ``benchmarks/bench-ingest.py``), so by default all frames are
+    passed as they are for these codecs.
+
+    Parameters
+    ----------
+    codec : JsonCodec
+        Codec used to decode frames
+    pack : bool
+        Pack frames as binary records, if ``None`` only for ``ujson`` and ``json`` codecs
+    """
+    def __init__(self, codec: JsonCodec, pack: bool = None):
+        self.codec = codec
+        self.pack = codec.name in _PACKED_CODECS if pack is None else pack
+        self._symbols = dict()
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(codec={self.codec.name}, pack={self.pack})"
+
+    def encode(self, frame: Union[str, bytes]) -> List[bytes]:
+        """Binary records representing a frame"""
+        if isinstance(frame, str):
+            frame = frame.encode()
+        if not self.pack:
+            return [bytes((RAW,)) + frame]
+        channel, symbol = classify_frame(frame)
+        if channel not in ("l2", "l3", "trades"):
+            return [bytes((RAW,)) + frame]
+
+        msg = self.codec.loads(frame)
+        event = msg.get("event")
+        if event != "updated" and (channel, event) not in _BOOK_KINDS:
+            return [bytes((RAW,)) + frame]
+
+        records = []
+        symbol_id = self._symbols.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._symbols[symbol] = len(self._symbols)
+            records.append(struct.pack("<BH", SYMBOL, symbol_id) + symbol.encode())
+
+        try:
+            if channel == "trades":
+                record = self._encode_trade(symbol_id, msg)
+            else:
+                record = self._encode_book(_BOOK_KINDS[channel, event], symbol_id, msg)
+        except (AttributeError, KeyError, TypeError, ValueError, struct.error):
+            record = None
+        records.append(record if record is not None else bytes((RAW,)) + frame)
+        return records
+
+    def _encode_book(self, kind: int, symbol_id: int, msg: Dict) -> bytes:
+        if msg.keys() != _BOOK_KEYS:
+            return None
+        bids, asks = msg["bids"], msg["asks"]
+        parts = [_HEADER.pack(kind, symbol_id, msg["seqnum"], len(bids), len(asks))]
+        if kind == L2_UPDATE or kind == L2_SNAPSHOT:
+            for level in bids + asks:
+                parts.append(_L2_LEVEL.pack(level["px"], level["qty"], level["num"]))
+        else:
+            for level in bids + asks:
+                order_id = level["id"].encode()
+                parts.append(_L3_LEVEL.pack(level["px"], level["qty"], len(order_id)) + order_id)
+        return b"".join(parts)
+
+    def _encode_trade(self, symbol_id: int, msg: Dict) -> bytes:
+        if msg.keys() != _TRADE_KEYS:
+            return None
+        timestamp = msg["timestamp"].encode()
+        return _TRADE.pack(
+            TRADE, symbol_id, msg["seqnum"], msg["price"], msg["qty"],
+            _SIDES.index(msg["side"]), int(msg["trade_id"]), len(timestamp),
+        ) + timestamp
+
+
+class EventDecoder:
+    """Decode records written by :class:`EventEncoder`
+
+    Returns messages in the same format as decoded frames of the exchange,
+    or raw frames as ``bytes`` for records which were not packed.
+    """
+    def __init__(self):
+        self._symbols = dict()
+
+    def decode(self, record: bytes) -> Union[Dict, bytes]:
+        """Message represented by a record, ``None`` for internal records"""
+        kind = record[0]
+        if kind == RAW:
+            return record[1:]
+        if kind == TRADE:
+            _, symbol_id, seqnum, price, qty, side, trade_id, size = _TRADE.unpack_from(record)
+            return {
+                "seqnum": seqnum,
+                "event": "updated",
+                "channel": "trades",
+                "symbol": self._symbols[symbol_id],
+                "timestamp": record[_TRADE.size:_TRADE.size + size].decode(),
+                "side": _SIDES[side],
+                "qty": qty,
+                "price": price,
+                "trade_id": str(trade_id),
+            }
+        if kind in _BOOK_EVENTS:
+            return self._decode_book(kind, record)
+        if kind == SYMBOL:
+            self._symbols[struct.unpack_from("<H", record, 1)[0]] = record[3:].decode()
+        return None
+
+    def _decode_book(self, kind: int, record: bytes) -> Dict:
+        _, symbol_id, seqnum, n_bids, n_asks = _HEADER.unpack_from(record)
+        offset = _HEADER.size
+        channel, event = _BOOK_EVENTS[kind]
+        if channel == "l2":
+            levels = [{"px": px, "qty": qty, "num": num}
+                      for px, qty, num in _L2_LEVEL.iter_unpack(memoryview(record)[offset:])]
+        else:
+            levels = []
+            for _ in range(n_bids + n_asks):
+                px, qty, size = _L3_LEVEL.unpack_from(record, offset)
+                offset += _L3_LEVEL.size
+                levels.append({"id": record[offset:offset + size].decode(), "px": px, "qty": qty})
+                offset += size
+        return {
+            "seqnum": seqnum,
+            "event": event,
+            "channel": channel,
+            "symbol": self._symbols[symbol_id],
+            "bids": levels[:n_bids],
+            "asks": levels[n_bids:],
+        }
+
+
+def _run_ingestion_worker(ring: SharedRingBuffer, control, codec_name: str, ws_factory: callable,
+                          ws_options: Dict):
+    """Receive frames in a worker process and write them into shared memory"""
+    codec = get_codec(codec_name)
+    encoder = EventEncoder(codec)
+    ws = ws_factory(codec=codec, **ws_options)
+
+    def write(record: bytes):
+        while not ring.put(record):
+            time.sleep(0.0005)
+
+    def handle(frame):
+        for record in encoder.encode(frame):
+            write(record)
+
+    def on_open():
+        write(_OPEN.pack(OPEN, ws.disconnected_at or 0.0))
+
+    ws.set_ws_message_handler(handle)
+    ws.set_ws_reconnect_handler(on_open)
+    ws.connect()
+    on_open()
+
+    while True:
+        command, message = control.recv()
+        if command == "send":
+            ws.send(message)
+        elif command == "reconnect":
+            ws.reconnect()
+        elif command == "close":
+            return
+
+
+class ProcessConnection(BlockchainWebsocket):
+    """Connection to the exchange running in a separate worker process
+
+    The worker process reads the socket, so that it does not compete for the
+    GIL with processing of messages, and packs frames as binary records when
+    the codec is slower than unpacking them (see :class:`EventEncoder`).
+    Received events are delivered through a :class:`SharedRingBuffer` and
+    passed to the message handler by a reader thread, while outgoing
+    messages are sent to the worker through a pipe.
+
+    Parameters
+    ----------
+    codec : Union[str, JsonCodec]
+        JSON codec used to encode and decode messages, the fastest installed one by default
+    capacity : int
+        Size of the shared ring buffer in bytes
+    ws_factory : callable
+        Creates connection in the worker process given a codec and connection settings
+    reconnect_delay : float
+        Upper bound of delay in seconds before the second connection attempt
+        of the worker, doubled after every failed attempt
+    reconnect_max_delay : float
+        Ceiling of delay between connection attempts in seconds
+    max_attempts : int
+        Number of connection attempts of the worker before it gives up and
+        ``connect`` raises ``ConnectionError``, unlimited if ``None``
+    """
+    def __init__(self, codec: Union[str, JsonCodec] = None, capacity: int = 1 << 25,
+                 ws_factory: callable = BlockchainWebsocket, reconnect_delay: float = 0.5,
+                 reconnect_max_delay: float = 30.0, max_attempts: int = None):
+        super().__init__(codec=codec, reconnect_delay=reconnect_delay, reconnect_max_delay=reconnect_max_delay,
+                         max_attempts=max_attempts)
+        self._context = multiprocessing.get_context()
+        self._ring = SharedRingBuffer(capacity=capacity, context=self._context)
+        self._ws_factory = ws_factory
+        self._control = None
+        self._process = None
+        self._reader = None
+        self._is_closing = False
+
+    @property
+    def ws(self) -> multiprocessing.Process:
+        """Worker process receiving messages from the exchange"""
+        return self._process
+
+    def send(self, message: str) -> None:
+        """Send raw string message to blockchain exchange
+
+        Parameters
+        ----------
+        message : str
+        """
+        if self._process is None or not self._process.is_alive():
+            self.connect()
+        self._control.send(("send", message))
+
+    def connect(self) -> None:
+        """Start worker process and wait until it connects to the exchange
+
+        Raises
+        ------
+        ConnectionError
+            If worker process exits before it connects, e.g. after ``max_attempts``
+        """
+        with self._ws_connect_lock:
+            if self._process is not None and not self._process.is_alive():
+                self._forget_process()
+            if self._process is None:
+                self._is_closing = False
+                self._control, worker_control = self._context.Pipe()
+                self._process = self._context.Process(
+                    target=_run_ingestion_worker,
+                    args=(self._ring, worker_control, self.codec.name, self._ws_factory, self._ws_options),
+                )
+                self._process.daemon = True
+                self._process.start()
+
+                self._reader = Thread(target=self._read)
+                self._reader.daemon = True
+                self._reader.start()
+            process = self._process
+        while not self._is_ready.wait(0.1):
+            if not process.is_alive():
+                with self._ws_connect_lock:
+                    if self._process is process:
+                        self._forget_process()
+                raise ConnectionError(f"Worker process exited with code {process.exitcode} "
+                                      "before connecting to the exchange")
+
+    @property
+    def _ws_options(self) -> Dict:
+        """Settings of connection created by the worker process"""
+        return {
+            "reconnect_delay": self.reconnect_delay,
+            "reconnect_max_delay": self.reconnect_max_delay,
+            "max_attempts": self.max_attempts,
+        }
+
+    def _forget_process(self):
+        """Clean up after worker process exited, so that the next ``connect`` starts a new one"""
+        self._is_closing = True
+        if current_thread() is not self._reader:
+            self._reader.join()
+        self._process = None
+        self._is_ready.clear()
+
+    def reconnect(self) -> None:
+        """Reconnect worker process to blockchain exchange websocket"""
+        if self._process is not None:
+            self._control.send(("reconnect", None))
+
+    def close(self) -> None:
+        """Stop worker process"""
+        if self._process is None:
+            return
+        self._is_closing = True
+        self._control.send(("close", None))
+        self._process.join(5)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._reader.join()
+        self._process = None
+        self._is_ready.clear()
+
+    def _read(self) -> None:
+        ring = self._ring
+        decoder = EventDecoder()
+        while not self._is_closing or len(ring):
+            record = ring.get()
+            if record is None:
+                ring.wait(0.1)
+                continue
+
+            if record[0] == OPEN:
+                self.disconnected_at = _OPEN.unpack_from(record)[1] or None
+                self._is_ready.set()
+                self._on_open()
+                continue
+            message = decoder.decode(record)
+            if message is None:
+                continue
+            try:
+                self._ws_message_handler(message)
+            except Exception as e:
+                logging.error(f"Error handling message {message}: {e}")
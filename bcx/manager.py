@@ -1,21 +1,128 @@
-import json
+import time
 import logging
-from typing import Dict, List
+import threading
+from concurrent.futures import Future, wait
+from typing import Dict, List, Union
 
+from bcx.codec import JsonCodec, get_codec
+from bcx.dispatch import Dispatcher
+from bcx.pool import ConnectionPool
+from bcx.sequence import SequenceTracker, frame_seqnum
 from bcx.websocket import BlockchainWebsocket
-from bcx.channels import ChannelFactory, Channel
+from bcx.buffers import RetentionPolicy, RingBuffer
+from bcx.channels import ChannelFactory, Channel, OrderbookChannel, PricesChannel, DerivedPricesChannel
+
+
+AUTHENTICATED_CHANNELS = frozenset(["auth", "trading", "balances"])
+ROUTING_PARAMS = frozenset(["symbol", "granularity"])
 
 
 class ChannelManager:
-    """Class to manage connections to blockchain exchange channels"""
-    def __init__(self):
-        self._ws = BlockchainWebsocket()
+    """Class to manage connections to blockchain exchange channels
+
+    Parameters
+    ----------
+    codec : Union[str, JsonCodec]
+        JSON codec used to decode and encode messages, the fastest installed one by default
+    ws : BlockchainWebsocket
+        Connection to the exchange, a new :class:`BlockchainWebsocket` by default
+    dispatcher : Dispatcher
+        Queue with worker threads processing messages, so that the websocket
+        reader thread only enqueues them. Messages are processed on the reader
+        thread if ``None``
+    trading_ws : BlockchainWebsocket
+        Separate connection used only for ``auth``, ``trading`` and ``balances``
+        channels, so that order entry does not share a socket with market data.
+        All channels use ``ws`` if ``None``
+    pool : ConnectionPool
+        Connections sharing market data channels, used instead of ``ws``.
+        Channels without symbol use the first connection of the pool
+
+    Attributes
+    ----------
+    recovery_times : RingBuffer
+        Seconds it took to subscribe again to all channels after recent
+        reconnects, measured from the moment connection was lost
+    sequences : Dict[BlockchainWebsocket, SequenceTracker]
+        Sequence numbers of messages received by every connection. Duplicate
+        messages are dropped and all order books of a connection which missed
+        messages request a fresh snapshot
+    """
+    def __init__(self, codec: Union[str, JsonCodec] = None, ws: BlockchainWebsocket = None,
+                 dispatcher: Dispatcher = None, trading_ws: BlockchainWebsocket = None,
+                 pool: ConnectionPool = None):
+        if pool is not None:
+            if ws is not None:
+                raise ValueError("Either a single connection or a connection pool should be given, not both")
+            ws = pool.connections[0]
+        self._codec = get_codec(codec) if ws is None or codec is not None else ws.codec
+        self._ws = ws if ws is not None else BlockchainWebsocket(codec=self._codec)
+        self._trading_ws = trading_ws if trading_ws is not None else self._ws
+        self._pool = pool
         self._channels_factory = ChannelFactory()
 
         self._channels = {channel_name: dict() for channel_name in self._channels_factory.channels}
-        self._ws.set_ws_message_handler(
-            handler=self._handle_messages
-        )
+        self._routes = dict()
+        self._dispatcher = dispatcher
+        self._recoveries = []
+        self._recoveries_lock = threading.Lock()
+        self.recovery_times = RingBuffer(RetentionPolicy(max_items=100))
+        handler = dispatcher.put if dispatcher is not None else self._handle_messages
+        if dispatcher is not None:
+            dispatcher.set_message_handler(self._handle_messages)
+            dispatcher.set_drop_handler(self._on_frame_dropped)
+        self.sequences = dict()
+        for connection in [self._ws, self._trading_ws] + (pool.connections if pool is not None else []):
+            self.sequences.setdefault(connection, SequenceTracker())
+        for connection in self.sequences:
+            if pool is None or connection not in pool.connections:
+                connection.set_ws_message_handler(
+                    handler=self._sequenced_handler(connection, handler)
+                )
+        if pool is not None:
+            for idx, connection in enumerate(pool.connections):
+                pool.set_connection_message_handler(idx, self._sequenced_handler(connection, handler))
+            pool.set_reconnect_handler(self._on_reconnect)
+        for connection in {self._ws, self._trading_ws}:
+            if pool is None or connection not in pool.connections:
+                connection.set_ws_reconnect_handler(self._reconnect_callback(connection))
+
+    @property
+    def ws(self) -> BlockchainWebsocket:
+        """Connection to the exchange"""
+        return self._ws
+
+    @property
+    def trading_ws(self) -> BlockchainWebsocket:
+        """Connection used for authenticated channels, the same as ``ws`` unless a separate one was given"""
+        return self._trading_ws
+
+    def get_channel_ws(self, name: str) -> BlockchainWebsocket:
+        """Connection used by channels with a given name"""
+        if name in AUTHENTICATED_CHANNELS:
+            return self._trading_ws
+        return self._ws
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """Connections sharing market data channels, ``None`` if a single connection is used"""
+        return self._pool
+
+    @property
+    def dispatcher(self) -> Dispatcher:
+        """Queue processing messages on worker threads, ``None`` if they are processed on the reader thread"""
+        return self._dispatcher
+
+    @property
+    def sequence_stats(self) -> Dict:
+        """Gaps, missed and duplicate messages of all connections and number of order book resyncs"""
+        stats = {"gaps": 0, "missed": 0, "duplicates": 0}
+        for tracker in self.sequences.values():
+            for key, value in tracker.stats.items():
+                stats[key] += value
+        stats["resyncs"] = sum(channel.resyncs for channel in self.get_all_channels()
+                               if isinstance(channel, OrderbookChannel))
+        return stats
 
     @property
     def available_channel_names(self) -> List[str]:
@@ -29,29 +136,241 @@ class ChannelManager:
             encoding = f"{encoding}-{channel_params[key]}"
         return encoding
 
-    def get_channel(self, name, **kwargs) -> Channel:
-        """Get connection to a channel of interest"""
+    def get_channel(self, name, options: Dict = None, **kwargs) -> Channel:
+        """Get connection to a channel of interest
+
+        Parameters
+        ----------
+        name : str
+            Name of the channel
+        options : Dict
+            Channel options, only used when the channel is created
+        kwargs : Dict
+            Parameters used to subscribe to channel
+        """
         channel_id = self._encode_channel(name, kwargs)
         if channel_id in self._channels[name]:
             channel = self._channels[name][channel_id]
+            if options:
+                logging.warning(f"Options {options} are ignored since {channel} already exists")
+        elif name == "prices" and self._get_prices_source(kwargs["symbol"]) is not None:
+            channel = self._derive_prices_channel(options=options, **kwargs)
+            if channel is None:
+                return None
+            self._channels[name][channel_id] = channel
         else:
+            ws = self.get_channel_ws(name)
+            if self._pool is not None and name not in AUTHENTICATED_CHANNELS:
+                ws = self._pool.assign((name, channel_id), kwargs.get("symbol"))
             channel = self._channels_factory.create_channel(
                 name=name,
-                ws=self._ws,
+                ws=ws,
+                options=options,
                 **kwargs
             )
-
-            if name == "prices":
-                for existing_channel in self._channels[name].values():
-                    if existing_channel.symbol == channel.symbol:
-                        logging.error("Can subscribe for a single granularity per channel. "
-                                      f"Already subscribed to {existing_channel}")
-                        return None
-
             self._channels[name][channel_id] = channel
 
+        if channel is not None:
+            self._add_route(name, kwargs, channel)
         return channel
 
+    def _add_route(self, name: str, channel_params: Dict, channel: Channel):
+        """Route messages of a channel straight to its event handler"""
+        if channel_params.keys() <= ROUTING_PARAMS:
+            route = (name, channel_params.get("symbol"), channel_params.get("granularity"))
+            if route not in self._routes:
+                self._routes[route] = channel.on_event
+
+    def _get_prices_source(self, symbol: str) -> PricesChannel:
+        """Prices channel of a symbol subscribed on the exchange"""
+        for channel in self._channels["prices"].values():
+            if channel.symbol == symbol and not isinstance(channel, DerivedPricesChannel):
+                return channel
+        return None
+
+    def _derive_prices_channel(self, symbol: str, granularity: int, options: Dict = None) -> DerivedPricesChannel:
+        """Prices channel with candles derived from the one already subscribed for this symbol"""
+        source = self._get_prices_source(symbol)
+        if granularity % source.granularity:
+            logging.error("Can subscribe for a single granularity per channel and derive coarser ones from it. "
+                          f"Can't derive granularity {granularity} from {source}")
+            return None
+        return DerivedPricesChannel(source=source, granularity=granularity, **(options or dict()))
+
+    def _reconnect_callback(self, ws: BlockchainWebsocket) -> callable:
+        def on_reconnect():
+            self._on_reconnect(ws)
+        return on_reconnect
+
+    def _on_reconnect(self, ws: BlockchainWebsocket, moves: Dict = None):
+        """Restore subscriptions of a connection once it is established again
+
+        Parameters
+        ----------
+        ws : BlockchainWebsocket
+            Connection which was reconnected
+        moves : Dict
+            New connections of channels assigned anew by the pool
+        """
+        started = ws.disconnected_at or time.time()
+        if ws in self.sequences:
+            self.sequences[ws].reset()
+        channels = [channel for channel in self.get_all_channels() if channel.ws is ws and channel.is_desired]
+        for (name, channel_id), new_ws in (moves or dict()).items():
+            channel = self._channels[name].get(channel_id)
+            if channel is not None:
+                channel.ws = new_ws
+        self.resubscribe(channels, started=started)
+
+    def _sequenced_handler(self, ws: BlockchainWebsocket, handler: callable) -> callable:
+        """Check sequence numbers of messages received by a connection before handling them"""
+        tracker = self.sequences[ws]
+
+        def sequenced_handler(message):
+            seqnum = frame_seqnum(message)
+            if seqnum is not None:
+                missed = tracker.check(seqnum)
+                if missed < 0:
+                    logging.debug(f"Dropped duplicate message {seqnum}")
+                    return
+                if missed:
+                    self._on_sequence_gap(ws, missed)
+            handler(message)
+        return sequenced_handler
+
+    def _on_sequence_gap(self, ws: BlockchainWebsocket, missed: int):
+        """Request fresh snapshots of order books of a connection which missed messages
+
+        Sequence numbers are shared by all channels of a connection, so it is
+        not known which channel the missed messages belonged to. Every order
+        book of the connection is resynced, even if the gap was in e.g. ticker
+        or heartbeat messages.
+        """
+        logging.warning(f"Missed {missed} messages of {ws.ws_uri}")
+        for channel in self.get_all_channels():
+            if channel.ws is ws and isinstance(channel, OrderbookChannel):
+                channel.resync()
+
+    def _on_frame_dropped(self, channel_name: str, symbol: str):
+        """Request a fresh snapshot of an order book whose update was dropped by the dispatcher"""
+        if channel_name not in ("l2", "l3"):
+            return
+        channel = self._channels[channel_name].get(self._encode_channel(channel_name, {"symbol": symbol}))
+        if isinstance(channel, OrderbookChannel):
+            channel.resync()
+
+    def resubscribe(self, channels: List[Channel], started: float = None):
+        """Reset state of channels and subscribe to them again
+
+        Authentication is sent first, then all subscriptions are sent at once
+        without waiting for acknowledgements. Once all of them are
+        acknowledged, time since ``started`` is added to ``recovery_times``.
+        Recovery is given up without a measurement if any of them is rejected.
+
+        Parameters
+        ----------
+        channels : List[Channel]
+        started : float
+            Epoch seconds when the channels stopped receiving messages, now if ``None``
+        """
+        if not channels:
+            return
+        started = started or time.time()
+        for channel in channels:
+            channel.on_reconnect()
+        with self._recoveries_lock:
+            self._recoveries.append((started, set(channels), set()))
+        logging.info(f"Subscribing again to {len(channels)} channels")
+        self.send_subscriptions(channels)
+
+    def send_subscriptions(self, channels: List[Channel]) -> Dict[Channel, Future]:
+        """Send subscriptions to channels back to back without waiting for acknowledgements
+
+        Authentication is sent first. Subscriptions to ``trading`` and
+        ``balances`` are sent once it is acknowledged, since the exchange
+        rejects them before, without blocking the calling thread. Channels
+        already subscribed or awaiting acknowledgement are skipped.
+
+        Returns
+        -------
+        subscriptions : Dict[Channel, Future]
+            Futures resolved once each subscription is acknowledged or rejected
+        """
+        subscriptions = dict()
+        for channel in sorted(channels, key=lambda channel: channel.name != "auth"):
+            if channel in subscriptions:
+                continue
+            if not channel.is_subscribed and not channel.is_pending:
+                auth = self._channels["auth"].get("auth") if channel.name in AUTHENTICATED_CHANNELS else None
+                if auth is not None and auth is not channel and not auth.is_subscribed:
+                    if not auth.is_pending:
+                        auth.subscribe()
+                    channel.subscribe_after(auth.subscription)
+                else:
+                    channel.subscribe()
+            subscriptions[channel] = channel.subscription
+        return subscriptions
+
+    def subscribe_many(self, channels: List[Channel], timeout: float = None) -> Dict[str, List[Channel]]:
+        """Subscribe to channels in a single burst and wait once for all acknowledgements
+
+        Parameters
+        ----------
+        channels : List[Channel]
+        timeout : float
+            Seconds to wait for acknowledgements, forever if ``None``
+
+        Returns
+        -------
+        result : Dict[str, List[Channel]]
+            Channels which were ``"subscribed"``, ``"rejected"`` or are still
+            ``"pending"`` when timeout expired
+        """
+        subscriptions = self.send_subscriptions(channels)
+        wait(list(subscriptions.values()), timeout)
+        return self.subscription_results(subscriptions)
+
+    @staticmethod
+    def subscription_results(subscriptions: Dict[Channel, Future]) -> Dict[str, List[Channel]]:
+        """Group channels by state of their subscriptions, see :meth:`subscribe_many`"""
+        result = {"subscribed": [], "rejected": [], "pending": []}
+        for channel, future in subscriptions.items():
+            if not future.done():
+                result["pending"].append(channel)
+            elif future.cancelled() or future.exception() is not None:
+                result["rejected"].append(channel)
+            else:
+                result["subscribed"].append(channel)
+        for channel in result["rejected"]:
+            logging.error(f"Subscription to {channel} was rejected")
+        return result
+
+    def _on_channel_recovered(self, channel: Channel, is_rejected: bool = False):
+        """Resolve recoveries waiting for a channel once its subscription is acknowledged or rejected
+
+        Called from every thread handling messages, e.g. the priority and
+        market data workers of the dispatcher, so recoveries are guarded by a lock.
+        """
+        finished = []
+        with self._recoveries_lock:
+            for recovery in list(self._recoveries):
+                started, pending, rejected = recovery
+                if channel not in pending:
+                    continue
+                pending.discard(channel)
+                if is_rejected:
+                    rejected.add(channel)
+                if not pending:
+                    self._recoveries.remove(recovery)
+                    finished.append(recovery)
+
+        for started, _, rejected in finished:
+            if rejected:
+                logging.warning(f"Recovered subscriptions except {len(rejected)} rejected channels")
+            else:
+                self.recovery_times.append(time.time() - started)
+                logging.info(f"Recovered subscriptions in {self.recovery_times[-1]:.3f} seconds")
+
     def get_all_channels(self) -> List[Channel]:
         """Get list of all opened connections to channels"""
         all_channels = []
@@ -59,18 +378,35 @@ class ChannelManager:
             all_channels += [channel for channel in channels.values()]
         return all_channels
 
-    def _handle_messages(self, message: str):
-        """A simple logic for handling message received from blockchain websocket"""
-        msg: Dict = json.loads(message)
+    def _handle_messages(self, message: Union[str, bytes, Dict]):
+        """A simple logic for handling message received from blockchain websocket
 
-        event_type = msg.pop("event")
+        Messages may be raw frames or already decoded by the connection.
+        """
+        msg: Dict = message if isinstance(message, dict) else self._codec.loads(message)
 
+        event_type = msg.pop("event")
         channel_name = msg.pop("channel")
-        channel_params = {}
-        for key in ["symbol", "granularity"]:
-            if key in msg and channel_name != "trading":
-                channel_params[key] = msg.pop(key)
+        if channel_name == "trading":
+            route = (channel_name, None, None)
+        else:
+            route = (channel_name, msg.pop("symbol", None), msg.pop("granularity", None))
 
-        channel = self.get_channel(channel_name, **channel_params)
+        handler = self._routes.get(route)
+        if handler is None:
+            handler = self._route_unknown(route)
 
-        channel.on_event(event_type, msg)
+        handler(event_type, msg)
+        if self._recoveries and event_type in ("subscribed", "rejected"):
+            self._on_channel_recovered(handler.__self__, is_rejected=event_type == "rejected")
+
+    def _route_unknown(self, route: tuple) -> callable:
+        """Slow path for messages of channels without a route, creates the channel if needed"""
+        channel_name, symbol, granularity = route
+        channel_params = {}
+        if symbol is not None:
+            channel_params["symbol"] = symbol
+        if granularity is not None:
+            channel_params["granularity"] = granularity
+        channel = self.get_channel(channel_name, **channel_params)
+        return self._routes.get(route, channel.on_event)
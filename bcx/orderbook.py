@@ -0,0 +1,713 @@
+import bisect
+import heapq
+from typing import Dict, List, Optional, Union
+
+from bcx.utils import import_numpy
+
+
+class PriceLevels:
+    """Sorted price levels for a single side of an order book
+
+    Prices are kept in a sorted list arranged so that the best level is
+    always the last element, and levels in a dict keyed by price. This gives
+    O(1) access to the top of the book and O(1) updates of existing levels,
+    the most frequent kind of update. Adding or removing a level is an
+    O(log n) binary search followed by shifting the keys behind it, which is
+    O(n) in theory but a single memory move in C. Since the best level is
+    at the end, changes near the top of the book shift only a few keys,
+    which is faster for books of thousands of levels than balanced trees or
+    skip lists written in Python.
+
+    Parameters
+    ----------
+    side : str
+        Either ``"bids"`` or ``"asks"``
+
+    Attributes
+    ----------
+    side : str
+    """
+    def __init__(self, side: str):
+        self.side = side
+        self._sign = 1 if side == "bids" else -1
+        self._keys = []
+        self._levels = dict()
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(side={self.side}, levels={len(self)})"
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, px):
+        return px in self._levels
+
+    def __iter__(self):
+        """Iterate over levels starting from the best one"""
+        sign = self._sign
+        levels = self._levels
+        for key in reversed(self._keys):
+            px = sign * key
+            qty, num = levels[px]
+            yield {"px": px, "qty": qty, "num": num}
+
+    def set(self, px: float, qty: float, num: int = 1):
+        """Insert, update or remove (when ``qty`` is 0) a price level"""
+        if not qty:
+            self.remove(px)
+            return
+        if px not in self._levels:
+            bisect.insort(self._keys, self._sign * px)
+        self._levels[px] = (qty, num)
+
+    def remove(self, px: float):
+        """Remove price level, does nothing if it does not exist"""
+        if self._levels.pop(px, None) is not None:
+            keys = self._keys
+            idx = bisect.bisect_left(keys, self._sign * px)
+            del keys[idx]
+
+    def clear(self):
+        """Remove all price levels"""
+        self._keys = []
+        self._levels = dict()
+
+    def get(self, px: float) -> Optional[Dict]:
+        """Get price level by its price"""
+        level = self._levels.get(px)
+        if level is None:
+            return None
+        return {"px": px, "qty": level[0], "num": level[1]}
+
+    def best(self) -> Optional[Dict]:
+        """Best price level of this side"""
+        if not self._keys:
+            return None
+        return self.get(self._sign * self._keys[-1])
+
+    def top(self, n: int) -> List[Dict]:
+        """Best ``n`` price levels starting from the best one"""
+        sign = self._sign
+        levels = self._levels
+        result = []
+        for key in self._keys[:-n - 1:-1] if n > 0 else []:
+            px = sign * key
+            qty, num = levels[px]
+            result.append({"px": px, "qty": qty, "num": num})
+        return result
+
+    def cumulative_depth(self, n: int) -> List[float]:
+        """Cumulative quantity of the best ``n`` price levels"""
+        levels = self._levels
+        result = []
+        total = 0.0
+        for px in self._prices(n):
+            total += levels[px][0]
+            result.append(total)
+        return result
+
+    def vwap(self, qty: float) -> Optional[float]:
+        """Volume weighted average price to fill ``qty`` walking from the best level
+
+        Returns ``None`` if there is not enough quantity on this side.
+        """
+        levels = self._levels
+        remaining = qty
+        notional = 0.0
+        for px in self._prices(len(self._keys)):
+            level_qty = levels[px][0]
+            if level_qty >= remaining:
+                notional += px * remaining
+                return notional / qty
+            notional += px * level_qty
+            remaining -= level_qty
+        return None
+
+    def _prices(self, n: int) -> List[float]:
+        sign = self._sign
+        return [sign * key for key in self._keys[:-n - 1:-1]] if n > 0 else []
+
+
+class PriceLadder:
+    """Price levels for a single side of an order book held in NumPy arrays
+
+    Levels are stored in preallocated arrays indexed by tick offset from a
+    reference price, so that updating a level never allocates and depth
+    queries are vectorized. The reference is chosen such that the best
+    level is in the upper part of the ladder, leaving room for the price to
+    improve. When the best level moves beyond the ladder it is recentered,
+    while levels that are too far from the best one to fit into the ladder
+    are kept aside and moved back into it on recentering.
+
+    Parameters
+    ----------
+    side : str
+        Either ``"bids"`` or ``"asks"``
+    tick_size : float
+        Minimal price increment of the symbol
+    size : int
+        Number of ticks covered by the ladder
+
+    Attributes
+    ----------
+    side : str
+    tick_size : float
+    size : int
+    """
+    def __init__(self, side: str, tick_size: float, size: int = 4096):
+        np = import_numpy()
+        self._np = np
+        self.side = side
+        self.tick_size = tick_size
+        self.size = size
+        self._sign = 1 if side == "bids" else -1
+        self._px = np.zeros(size, dtype=np.float64)
+        self._qty = np.zeros(size, dtype=np.float64)
+        self._num = np.zeros(size, dtype=np.int64)
+        self._base = None
+        self._best = -1
+        self._count = 0
+        self._overflow = dict()
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(side={self.side}, levels={len(self)}, tick_size={self.tick_size}, size={self.size})"
+
+    def __len__(self):
+        return self._count + len(self._overflow)
+
+    def __contains__(self, px):
+        return self.get(px) is not None
+
+    def __iter__(self):
+        """Iterate over levels starting from the best one"""
+        return iter(self.top(len(self)))
+
+    def _key(self, px: float) -> int:
+        return self._sign * int(round(px / self.tick_size))
+
+    def _recenter(self, key: int = None):
+        """Place the best of existing levels and ``key`` in the upper part of the ladder"""
+        levels = [(px, qty, num) for px, (qty, num) in self._overflow.items()]
+        for idx in self._np.flatnonzero(self._qty):
+            levels.append((float(self._px[idx]), float(self._qty[idx]), int(self._num[idx])))
+        levels.sort(key=lambda level: self._key(level[0]), reverse=True)
+
+        best_key = self._key(levels[0][0]) if levels else key
+        if key is not None and key > best_key:
+            best_key = key
+
+        self._px[:] = 0.0
+        self._qty[:] = 0.0
+        self._num[:] = 0
+        self._base = best_key - (self.size * 3) // 4
+        self._best = -1
+        self._count = 0
+        self._overflow = dict()
+        for px, qty, num in levels:
+            self._place(self._key(px) - self._base, px, qty, num)
+
+    def set(self, px: float, qty: float, num: int = 1):
+        """Insert, update or remove (when ``qty`` is 0) a price level"""
+        if not qty:
+            self.remove(px)
+            return
+
+        key = self._key(px)
+        if self._base is None:
+            self._base = key - (self.size * 3) // 4
+        idx = key - self._base
+        if idx >= self.size or (idx < 0 and not self._count):
+            self._recenter(key)
+            idx = key - self._base
+        self._place(idx, px, qty, num)
+
+    def _place(self, idx: int, px: float, qty: float, num: int):
+        if idx < 0:
+            self._overflow[px] = (qty, num)
+            return
+
+        if not self._qty[idx]:
+            self._count += 1
+        self._px[idx] = px
+        self._qty[idx] = qty
+        self._num[idx] = num
+        if idx > self._best:
+            self._best = idx
+
+    def remove(self, px: float):
+        """Remove price level, does nothing if it does not exist"""
+        if self._base is None:
+            return
+        idx = self._key(px) - self._base
+        if idx < 0 or idx >= self.size:
+            self._overflow.pop(px, None)
+            return
+        if not self._qty[idx]:
+            return
+
+        self._qty[idx] = 0.0
+        self._num[idx] = 0
+        self._count -= 1
+        if idx == self._best:
+            filled = next(self._scan(), None)
+            self._best = int(filled[0]) if filled is not None else -1
+            if self._best < 0 and self._overflow:
+                self._recenter()
+
+    def clear(self):
+        """Remove all price levels"""
+        self._px[:] = 0.0
+        self._qty[:] = 0.0
+        self._num[:] = 0
+        self._base = None
+        self._best = -1
+        self._count = 0
+        self._overflow = dict()
+
+    def get(self, px: float) -> Optional[Dict]:
+        """Get price level by its price"""
+        if self._base is None:
+            return None
+        idx = self._key(px) - self._base
+        if idx < 0 or idx >= self.size:
+            level = self._overflow.get(px)
+            if level is None:
+                return None
+            return {"px": px, "qty": level[0], "num": level[1]}
+        if not self._qty[idx]:
+            return None
+        return {"px": float(self._px[idx]), "qty": float(self._qty[idx]), "num": int(self._num[idx])}
+
+    def best(self) -> Optional[Dict]:
+        """Best price level of this side"""
+        if self._best < 0:
+            return None
+        idx = self._best
+        return {"px": float(self._px[idx]), "qty": float(self._qty[idx]), "num": int(self._num[idx])}
+
+    def top(self, n: int) -> List[Dict]:
+        """Best ``n`` price levels starting from the best one"""
+        px, qty, num = self.to_numpy(n)
+        return [
+            {"px": p, "qty": q, "num": k}
+            for p, q, k in zip(px.tolist(), qty.tolist(), num.tolist())
+        ]
+
+    def _scan(self, window: int = 64):
+        """Ladder indices of levels from the best one downwards, in chunks
+
+        Only the part of the ladder close to the best level is usually
+        needed, so it is searched in windows doubling in size instead of
+        scanning the whole ladder at once.
+        """
+        np = self._np
+        end = self._best + 1
+        while end > 0:
+            start = max(0, end - window)
+            idx = np.flatnonzero(self._qty[start:end])
+            end = start
+            window *= 2
+            if len(idx):
+                yield idx[::-1] + start
+
+    def _overflow_top(self, n: int) -> List[float]:
+        """Prices of the best ``n`` levels kept aside from the ladder"""
+        sign = self._sign
+        return heapq.nlargest(n, self._overflow, key=lambda x: sign * x)
+
+    def to_numpy(self, n: int = None):
+        """Best ``n`` (all by default) price levels as arrays of prices, quantities and number of orders"""
+        np = self._np
+        if n is None:
+            n = len(self)
+        if n <= 0 or self._best < 0:
+            return np.empty(0), np.empty(0), np.empty(0, dtype=np.int64)
+
+        chunks = []
+        found = 0
+        for idx in self._scan(max(2 * n, 64)):
+            chunks.append(idx)
+            found += len(idx)
+            if found >= n:
+                break
+        idx = (chunks[0] if len(chunks) == 1 else np.concatenate(chunks))[:n]
+        px, qty, num = self._px[idx], self._qty[idx], self._num[idx]
+        if len(idx) < n and self._overflow:
+            overflow = self._overflow_top(n - len(idx))
+            px = np.concatenate([px, overflow])
+            qty = np.concatenate([qty, [self._overflow[x][0] for x in overflow]])
+            num = np.concatenate([num, np.array([self._overflow[x][1] for x in overflow], dtype=np.int64)])
+        return px, qty, num
+
+    def cumulative_depth(self, n: int) -> List[float]:
+        """Cumulative quantity of the best ``n`` price levels"""
+        _, qty, _ = self.to_numpy(n)
+        return self._np.cumsum(qty).tolist()
+
+    def vwap(self, qty: float) -> Optional[float]:
+        """Volume weighted average price to fill ``qty`` walking from the best level
+
+        Returns ``None`` if there is not enough quantity on this side.
+        """
+        np = self._np
+        remaining = qty
+        notional = 0.0
+        for idx in self._scan():
+            level_qty = self._qty[idx]
+            cumulative = np.cumsum(level_qty)
+            k = int(np.searchsorted(cumulative, remaining))
+            if k < len(cumulative):
+                filled = level_qty[:k + 1].copy()
+                filled[k] = remaining - (cumulative[k - 1] if k else 0.0)
+                return (notional + float(np.dot(self._px[idx[:k + 1]], filled))) / qty
+            notional += float(np.dot(self._px[idx], level_qty))
+            remaining -= float(cumulative[-1])
+
+        for px in self._overflow_top(len(self._overflow)):
+            level_qty = self._overflow[px][0]
+            if level_qty >= remaining:
+                notional += px * remaining
+                return notional / qty
+            notional += px * level_qty
+            remaining -= level_qty
+        return None
+
+
+class Orderbook:
+    """Price level (L2) order book maintained from snapshots and incremental updates
+
+    Every update is applied as an upsert of a price level, where a level with
+    zero quantity is removed from the book.
+
+    Parameters
+    ----------
+    backend : str
+        Storage of price levels, either ``"python"`` for :class:`PriceLevels`
+        or ``"numpy"`` for :class:`PriceLadder`
+    tick_size : float
+        Minimal price increment, required for ``"numpy"`` backend
+    ladder_size : int
+        Number of ticks covered by each side for ``"numpy"`` backend
+
+    Attributes
+    ----------
+    bids : Union[PriceLevels, PriceLadder]
+    asks : Union[PriceLevels, PriceLadder]
+    """
+    def __init__(self, backend: str = "python", tick_size: float = None, ladder_size: int = 4096):
+        if backend == "python":
+            self.bids = PriceLevels("bids")
+            self.asks = PriceLevels("asks")
+        elif backend == "numpy":
+            if not tick_size:
+                raise ValueError("Order book with 'numpy' backend requires 'tick_size'")
+            self.bids = PriceLadder("bids", tick_size=tick_size, size=ladder_size)
+            self.asks = PriceLadder("asks", tick_size=tick_size, size=ladder_size)
+        else:
+            raise ValueError(f"Order book backend '{backend}' is not valid. Should be one of ['python', 'numpy']")
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(bids={len(self.bids)}, asks={len(self.asks)})"
+
+    def _get_side(self, side: str) -> Union[PriceLevels, PriceLadder]:
+        if side == "bids":
+            return self.bids
+        elif side == "asks":
+            return self.asks
+        raise ValueError(f"Order book side '{side}' is not valid. Should be one of ['bids', 'asks']")
+
+    def clear(self):
+        """Remove all price levels from both sides of the book"""
+        self.bids.clear()
+        self.asks.clear()
+
+    def apply_snapshot(self, snapshot: Dict[str, List[Dict]]):
+        """Replace content of the book with a snapshot
+
+        Parameters
+        ----------
+        snapshot : Dict[str, List[Dict]]
+            Price levels for ``bids`` and ``asks`` in the exchange format,
+            e.g. ``{"px": 8723.45, "qty": 1.45, "num": 1}``
+        """
+        self.clear()
+        self.apply_update(snapshot)
+
+    def apply_update(self, update: Dict[str, List[Dict]]):
+        """Apply incremental update to the book
+
+        Parameters
+        ----------
+        update : Dict[str, List[Dict]]
+            Changed price levels for ``bids`` and/or ``asks``
+        """
+        for side in (self.bids, self.asks):
+            for level in update.get(side.side) or ():
+                side.set(level["px"], level["qty"], level.get("num", 1))
+
+    def best_bid(self) -> Optional[Dict]:
+        """Best (highest) bid price level"""
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Dict]:
+        """Best (lowest) ask price level"""
+        return self.asks.best()
+
+    def spread(self) -> Optional[float]:
+        """Difference between best ask and best bid prices"""
+        bid = self.bids.best()
+        ask = self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask["px"] - bid["px"]
+
+    def depth(self, n: int = 10) -> Dict[str, List[Dict]]:
+        """Best ``n`` price levels for each side of the book"""
+        return {
+            "bids": self.bids.top(n),
+            "asks": self.asks.top(n),
+        }
+
+    def level(self, side: str, px: float) -> Optional[Dict]:
+        """Get price level by side and price
+
+        Parameters
+        ----------
+        side : str
+            Either ``"bids"`` or ``"asks"``
+        px : float
+
+        Returns
+        -------
+        level : Dict
+            ``None`` if there is no such price level in the book
+        """
+        return self._get_side(side).get(px)
+
+    def cumulative_depth(self, side: str, n: int = 10):
+        """Cumulative quantity of the best ``n`` price levels of one side"""
+        return self._get_side(side).cumulative_depth(n)
+
+    def vwap(self, side: str, qty: float) -> Optional[float]:
+        """Volume weighted average price to fill ``qty`` against one side of the book
+
+        Parameters
+        ----------
+        side : str
+            Side of the book to walk, i.e. ``"asks"`` when buying
+        qty : float
+
+        Returns
+        -------
+        price : float
+            ``None`` if there is not enough quantity in the book
+        """
+        return self._get_side(side).vwap(qty)
+
+    def imbalance(self, n: int = 10) -> Optional[float]:
+        """Order book imbalance over the best ``n`` price levels
+
+        Defined as ``(bid_qty - ask_qty) / (bid_qty + ask_qty)``, so it ranges
+        from -1 (only asks) to 1 (only bids). Returns ``None`` for an empty book.
+        """
+        bids = self.bids.cumulative_depth(n)
+        asks = self.asks.cumulative_depth(n)
+        bid_qty = float(bids[-1]) if len(bids) else 0.0
+        ask_qty = float(asks[-1]) if len(asks) else 0.0
+        total = bid_qty + ask_qty
+        if not total:
+            return None
+        return (bid_qty - ask_qty) / total
+
+
+class OrderQueue:
+    """FIFO queue of orders resting at a single price level
+
+    Attributes
+    ----------
+    orders : Dict[str, float]
+        Mapping of order id to its quantity in time priority order
+    qty : float
+        Total quantity of all orders at this price level
+    """
+    __slots__ = ("orders", "qty")
+
+    def __init__(self):
+        self.orders = dict()
+        self.qty = 0.0
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(orders={len(self.orders)}, qty={self.qty})"
+
+    def __len__(self):
+        return len(self.orders)
+
+
+class OrderbookL3:
+    """Order level (L3) order book maintained from snapshots and incremental updates
+
+    Orders are indexed by their id, so that adding, modifying or deleting an
+    order is O(1) plus the cost of updating aggregated price level. Orders at
+    the same price are kept in a FIFO queue, and L2 aggregates (total quantity
+    and number of orders per price level) are maintained alongside.
+
+    Parameters
+    ----------
+    backend : str
+        Storage of aggregated price levels, see :class:`Orderbook`
+    tick_size : float
+        Minimal price increment, required for ``"numpy"`` backend
+    ladder_size : int
+        Number of ticks covered by each side for ``"numpy"`` backend
+
+    Attributes
+    ----------
+    levels : Orderbook
+        Aggregated price level view of this book
+    """
+    def __init__(self, backend: str = "python", tick_size: float = None, ladder_size: int = 4096):
+        self.levels = Orderbook(backend=backend, tick_size=tick_size, ladder_size=ladder_size)
+        self._orders = dict()
+        self._queues = {"bids": dict(), "asks": dict()}
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(orders={len(self)}, bids={len(self.levels.bids)}, asks={len(self.levels.asks)})"
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def clear(self):
+        """Remove all orders from the book"""
+        self.levels.clear()
+        self._orders = dict()
+        self._queues = {"bids": dict(), "asks": dict()}
+
+    def apply_snapshot(self, snapshot: Dict[str, List[Dict]]):
+        """Replace content of the book with a snapshot
+
+        Parameters
+        ----------
+        snapshot : Dict[str, List[Dict]]
+            Orders for ``bids`` and ``asks`` in the exchange format,
+            e.g. ``{"id": "1234", "px": 8723.45, "qty": 1.45}``
+        """
+        self.clear()
+        self.apply_update(snapshot)
+
+    def apply_update(self, update: Dict[str, List[Dict]]):
+        """Apply incremental update to the book
+
+        Parameters
+        ----------
+        update : Dict[str, List[Dict]]
+            Added, modified or deleted (zero quantity) orders for ``bids`` and/or ``asks``
+        """
+        for side in ("bids", "asks"):
+            for order in update.get(side) or ():
+                self.set_order(side, order["id"], order["px"], order["qty"])
+
+    def set_order(self, side: str, order_id: str, px: float, qty: float):
+        """Add, modify or delete (when ``qty`` is 0) an order
+
+        An order keeps its time priority if it is modified without changing
+        its price, otherwise it is moved to the end of the queue at the new price.
+        """
+        existing = self._orders.get(order_id)
+        if not qty:
+            if existing is not None:
+                self.remove_order(order_id)
+            return
+
+        if existing is not None:
+            old_side, old_px, old_qty = existing
+            if old_side == side and old_px == px:
+                queue = self._queues[side][px]
+                queue.orders[order_id] = qty
+                queue.qty += qty - old_qty
+                self._orders[order_id] = (side, px, qty)
+                self.levels._get_side(side).set(px, queue.qty, len(queue))
+                return
+            self.remove_order(order_id)
+
+        queues = self._queues[side]
+        queue = queues.get(px)
+        if queue is None:
+            queue = queues[px] = OrderQueue()
+        queue.orders[order_id] = qty
+        queue.qty += qty
+        self._orders[order_id] = (side, px, qty)
+        self.levels._get_side(side).set(px, queue.qty, len(queue))
+
+    def remove_order(self, order_id: str):
+        """Remove order by its id, does nothing if it does not exist"""
+        existing = self._orders.pop(order_id, None)
+        if existing is None:
+            return
+        side, px, qty = existing
+        queues = self._queues[side]
+        queue = queues[px]
+        del queue.orders[order_id]
+        if queue.orders:
+            queue.qty -= qty
+            self.levels._get_side(side).set(px, queue.qty, len(queue))
+        else:
+            del queues[px]
+            self.levels._get_side(side).remove(px)
+
+    def order(self, order_id: str) -> Optional[Dict]:
+        """Get resting order by its id"""
+        existing = self._orders.get(order_id)
+        if existing is None:
+            return None
+        side, px, qty = existing
+        return {"id": order_id, "side": side, "px": px, "qty": qty}
+
+    def orders_at(self, side: str, px: float) -> List[Dict]:
+        """Orders resting at a price level in time priority order"""
+        queues = self._queues.get(side)
+        if queues is None:
+            raise ValueError(f"Order book side '{side}' is not valid. Should be one of ['bids', 'asks']")
+        queue = queues.get(px)
+        if queue is None:
+            return []
+        return [{"id": order_id, "px": px, "qty": qty} for order_id, qty in queue.orders.items()]
+
+    def best_bid(self) -> Optional[Dict]:
+        """Best (highest) bid price level"""
+        return self.levels.best_bid()
+
+    def best_ask(self) -> Optional[Dict]:
+        """Best (lowest) ask price level"""
+        return self.levels.best_ask()
+
+    def spread(self) -> Optional[float]:
+        """Difference between best ask and best bid prices"""
+        return self.levels.spread()
+
+    def depth(self, n: int = 10) -> Dict[str, List[Dict]]:
+        """Best ``n`` aggregated price levels for each side of the book"""
+        return self.levels.depth(n)
+
+    def level(self, side: str, px: float) -> Optional[Dict]:
+        """Get aggregated price level by side and price"""
+        return self.levels.level(side, px)
+
+    def cumulative_depth(self, side: str, n: int = 10):
+        """Cumulative quantity of the best ``n`` price levels of one side"""
+        return self.levels.cumulative_depth(side, n)
+
+    def vwap(self, side: str, qty: float) -> Optional[float]:
+        """Volume weighted average price to fill ``qty`` against one side of the book"""
+        return self.levels.vwap(side, qty)
+
+    def imbalance(self, n: int = 10) -> Optional[float]:
+        """Order book imbalance over the best ``n`` price levels"""
+        return self.levels.imbalance(n)
@@ -0,0 +1,260 @@
+import logging
+import time
+import zlib
+from typing import Dict, Hashable, List, Union
+
+from bcx.codec import JsonCodec, get_codec
+from bcx.websocket import BlockchainWebsocket
+
+
+SHARDING_POLICIES = ("hash", "least_loaded")
+
+
+class RateMeter:
+    """Count messages and estimate their rate over consecutive time windows
+
+    Parameters
+    ----------
+    window : float
+        Length of a window in seconds
+    clock : callable
+        Source of current monotonic time in seconds
+    """
+    def __init__(self, window: float = 1.0, clock: callable = time.monotonic):
+        self.window = window
+        self.count = 0
+        self._clock = clock
+        self._window_start = clock()
+        self._window_count = 0
+        self._rate = 0.0
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(count={self.count}, rate={self.rate:.1f})"
+
+    def add(self, n: int = 1):
+        """Count ``n`` new messages"""
+        self.count += n
+        self._roll()
+
+    @property
+    def rate(self) -> float:
+        """Messages per second during the last finished window"""
+        self._roll()
+        return self._rate
+
+    def reset(self):
+        """Forget the estimated rate, total count is kept"""
+        self._window_start = self._clock()
+        self._window_count = self.count
+        self._rate = 0.0
+
+    def _roll(self):
+        now = self._clock()
+        elapsed = now - self._window_start
+        if elapsed >= self.window:
+            self._rate = (self.count - self._window_count) / elapsed
+            self._window_start = now
+            self._window_count = self.count
+
+
+class ConnectionPool:
+    """Pool of websocket connections sharing market data subscriptions
+
+    Each channel is assigned to one of connections when it is created, either
+    by a stable hash of its symbol or to the connection with the lowest
+    message rate. When a connection is established again after it was lost,
+    channels it served are assigned anew, see :meth:`rebalance`, and handed
+    to the reconnect handler, which should move and resubscribe them.
+
+    Parameters
+    ----------
+    size : int
+        Number of connections
+    policy : str
+        One of ``"hash"`` or ``"least_loaded"``
+    codec : Union[str, JsonCodec]
+        JSON codec used to encode outgoing messages, the fastest installed one by default
+    ws_factory : callable
+        Creates a connection given a codec and connection settings,
+        :class:`BlockchainWebsocket` by default
+    reconnect_delay : float
+        Upper bound of delay in seconds before the second connection attempt,
+        doubled after every failed attempt
+    reconnect_max_delay : float
+        Ceiling of delay between connection attempts in seconds
+    max_attempts : int
+        Number of connection attempts before giving up with ``ConnectionError``,
+        unlimited if ``None``
+
+    Attributes
+    ----------
+    connections : List[BlockchainWebsocket]
+    meters : List[RateMeter]
+        Received messages of every connection
+    """
+    def __init__(self, size: int = 2, policy: str = "hash", codec: Union[str, JsonCodec] = None,
+                 ws_factory: callable = BlockchainWebsocket, reconnect_delay: float = 0.5,
+                 reconnect_max_delay: float = 30.0, max_attempts: int = None):
+        if size < 1:
+            raise ValueError(f"Connection pool needs at least one connection: {size}")
+        if policy not in SHARDING_POLICIES:
+            raise ValueError(f"Sharding policy '{policy}' is not supported. Should be one of {SHARDING_POLICIES}")
+
+        self.policy = policy
+        self.codec = get_codec(codec)
+        self.connections = [
+            ws_factory(codec=self.codec, reconnect_delay=reconnect_delay, reconnect_max_delay=reconnect_max_delay,
+                       max_attempts=max_attempts)
+            for _ in range(size)
+        ]
+        self.meters = [RateMeter() for _ in range(size)]
+        self._assignments = dict()
+        self._symbols = dict()
+        self._reconnect_handler = lambda connection, moves: None
+
+        for idx, connection in enumerate(self.connections):
+            connection.set_ws_reconnect_handler(self._reconnect_callback(idx))
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(size={len(self.connections)}, policy={self.policy}, channels={len(self._assignments)})"
+
+    @property
+    def message_rates(self) -> List[float]:
+        """Messages per second received by every connection"""
+        return [meter.rate for meter in self.meters]
+
+    @property
+    def stats(self) -> List[Dict]:
+        """Number of assigned channels, received messages and message rate of every connection"""
+        channels = [0] * len(self.connections)
+        for idx in list(self._assignments.values()):
+            channels[idx] += 1
+        return [
+            {
+                "channels": channels[idx],
+                "messages": meter.count,
+                "rate": meter.rate,
+            }
+            for idx, meter in enumerate(self.meters)
+        ]
+
+    def set_ws_message_handler(self, handler: callable):
+        """Set method responsible for handling messages received by any connection"""
+        for idx in range(len(self.connections)):
+            self.set_connection_message_handler(idx, handler)
+
+    def set_connection_message_handler(self, idx: int, handler: callable):
+        """Set method responsible for handling messages received by a single connection
+
+        Parameters
+        ----------
+        idx : int
+            Position of the connection in the pool
+        handler : callable
+        """
+        self.connections[idx].set_ws_message_handler(self._metered_handler(handler, self.meters[idx]))
+
+    def set_reconnect_handler(self, handler: callable):
+        """Set method called with reconnected connection and ``{key: connection}`` of channels assigned anew"""
+        self._reconnect_handler = handler
+
+    def assign(self, key: Hashable, symbol: str = None) -> BlockchainWebsocket:
+        """Assign channel to a connection
+
+        Parameters
+        ----------
+        key : Hashable
+            Unique identifier of the channel
+        symbol : str
+            Symbol of the channel, channels without symbol use the first connection
+
+        Returns
+        -------
+        connection : BlockchainWebsocket
+        """
+        if key in self._assignments:
+            return self.connections[self._assignments[key]]
+        idx = self._choose(symbol)
+        self._assignments[key] = idx
+        self._symbols[key] = symbol
+        return self.connections[idx]
+
+    def release(self, key: Hashable):
+        """Forget channel assignment"""
+        self._assignments.pop(key, None)
+        self._symbols.pop(key, None)
+
+    def rebalance(self, idx: int) -> Dict[Hashable, BlockchainWebsocket]:
+        """Assign anew channels of a connection
+
+        With ``"least_loaded"`` policy channels are spread over all connections,
+        each one going to the connection with the lowest load including channels
+        moved before it, where the rate of a channel is estimated as the average
+        one over the pool. The reconnected connection starts with no load, so it
+        takes back channels only until it is as loaded as the others. With
+        ``"hash"`` policy assignments are stable, so channels stay where they are.
+
+        Parameters
+        ----------
+        idx : int
+            Position of the connection in the pool
+
+        Returns
+        -------
+        moves : Dict[Hashable, BlockchainWebsocket]
+            New connection of every channel previously assigned to this one
+        """
+        rate_per_channel = self._rate_per_channel()
+        self.meters[idx].reset()
+        keys = [key for key, assigned in list(self._assignments.items()) if assigned == idx]
+        if self.policy == "hash":
+            return {key: self.connections[idx] for key in keys}
+
+        for key in keys:
+            del self._assignments[key]
+        loads = self._loads(rate_per_channel)
+        moves = dict()
+        for key in keys:
+            new_idx = 0 if self._symbols[key] is None else loads.index(min(loads))
+            loads[new_idx] += rate_per_channel + 1e-9
+            self._assignments[key] = new_idx
+            moves[key] = self.connections[new_idx]
+        return moves
+
+    def _choose(self, symbol: str) -> int:
+        if symbol is None or len(self.connections) == 1:
+            return 0
+        if self.policy == "hash":
+            return zlib.crc32(symbol.encode()) % len(self.connections)
+
+        loads = self._loads(self._rate_per_channel())
+        return loads.index(min(loads))
+
+    def _rate_per_channel(self) -> float:
+        total_rate = sum(meter.rate for meter in self.meters)
+        return total_rate / max(1, len(self._assignments))
+
+    def _loads(self, rate_per_channel: float) -> List[float]:
+        """Message rate of every connection, or estimated from its channels if higher"""
+        channels = [0] * len(self.connections)
+        for idx in self._assignments.values():
+            channels[idx] += 1
+        return [
+            max(meter.rate, channels[idx] * rate_per_channel) + channels[idx] * 1e-9
+            for idx, meter in enumerate(self.meters)
+        ]
+
+    def _metered_handler(self, handler: callable, meter: RateMeter) -> callable:
+        def metered_handler(message):
+            meter.add()
+            handler(message)
+        return metered_handler
+
+    def _reconnect_callback(self, idx: int) -> callable:
+        def on_reconnect():
+            moves = self.rebalance(idx)
+            logging.info(f"Reassigned {len(moves)} channels after connection {idx} reconnected")
+            self._reconnect_handler(self.connections[idx], moves)
+        return on_reconnect
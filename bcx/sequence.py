@@ -0,0 +1,103 @@
+from typing import Dict, Union
+
+
+def frame_seqnum(frame: Union[str, bytes, Dict]) -> int:
+    """Sequence number of a frame found by scanning raw JSON without decoding it
+
+    Parameters
+    ----------
+    frame : Union[str, bytes, Dict]
+        Raw JSON message received from the exchange or already decoded one
+
+    Returns
+    -------
+    seqnum : int
+        ``None`` if the frame has no sequence number
+    """
+    if isinstance(frame, dict):
+        return frame.get("seqnum")
+    if isinstance(frame, str):
+        key, separator = '"seqnum"', ":"
+    else:
+        key, separator = b'"seqnum"', b":"
+    idx = frame.find(key)
+    if idx < 0:
+        return None
+    start = frame.find(separator, idx + len(key))
+    if start < 0:
+        return None
+    start += 1
+    end = start
+    while end < len(frame) and frame[end:end + 1] not in (",", "}", b",", b"}"):
+        end += 1
+    try:
+        return int(frame[start:end])
+    except ValueError:
+        return None
+
+
+class SequenceTracker:
+    """Detect gaps and duplicates in sequence numbers of messages received by a connection
+
+    The exchange numbers all messages sent over a connection consecutively,
+    so that a missed number means a lost message of one of its channels.
+
+    Attributes
+    ----------
+    last : int
+        Sequence number of the last accepted message, ``None`` before the first one
+    gaps : int
+        Number of times sequence numbers skipped ahead
+    missed : int
+        Total number of skipped sequence numbers
+    duplicates : int
+        Number of messages with already seen sequence numbers
+    """
+    def __init__(self):
+        self.last = None
+        self.gaps = 0
+        self.missed = 0
+        self.duplicates = 0
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(last={self.last}, gaps={self.gaps}, duplicates={self.duplicates})"
+
+    @property
+    def stats(self) -> Dict:
+        """Number of gaps, missed and duplicate messages"""
+        return {
+            "gaps": self.gaps,
+            "missed": self.missed,
+            "duplicates": self.duplicates,
+        }
+
+    def check(self, seqnum: int) -> int:
+        """Check sequence number of a received message
+
+        Parameters
+        ----------
+        seqnum : int
+
+        Returns
+        -------
+        missed : int
+            Number of messages missed right before this one, ``-1`` if it is a duplicate
+        """
+        last = self.last
+        if last is None:
+            self.last = seqnum
+            return 0
+        if seqnum <= last:
+            self.duplicates += 1
+            return -1
+        self.last = seqnum
+        missed = seqnum - last - 1
+        if missed:
+            self.gaps += 1
+            self.missed += missed
+        return missed
+
+    def reset(self):
+        """Start tracking anew, e.g. once connection was established again"""
+        self.last = None
@@ -0,0 +1,380 @@
+import bisect
+import logging
+from array import array
+from typing import Dict, List, Tuple
+
+from bcx.utils import import_numpy, timestamp_to_nanoseconds
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Column:
+    """Growable column of fixed size values
+
+    Values are stored in a NumPy array with amortised O(1) appends when
+    ``numpy`` is installed and in a standard library ``array`` otherwise.
+    Removing the oldest values only moves the start of the column, they are
+    released once the array is reallocated, so trimming is amortised O(1) too.
+
+    Parameters
+    ----------
+    typecode : str
+        Type of values, one of ``array`` type codes, e.g. ``"q"`` for int64
+        or ``"d"`` for float64
+    capacity : int
+        Initial number of preallocated values
+    """
+    def __init__(self, typecode: str, capacity: int = 1024):
+        self.typecode = typecode
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+        if np is not None:
+            self._data = np.empty(capacity, dtype=np.dtype(typecode))
+        else:
+            self._data = array(typecode)
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(typecode={self.typecode}, size={self._size})"
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._data[self._start:self._start + self._size][index]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Column index out of range")
+        return self._data[self._start + index]
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Column index out of range")
+        self._data[self._start + index] = value
+
+    def append(self, value):
+        """Add value to the end of the column"""
+        if np is None:
+            self._data.append(value)
+        else:
+            end = self._start + self._size
+            if end == len(self._data):
+                # A new array keeps views returned earlier valid
+                data = np.empty(max(2 * self._size, self._capacity), dtype=self._data.dtype)
+                data[:self._size] = self._data[self._start:end]
+                self._data = data
+                self._start = 0
+                end = self._size
+            self._data[end] = value
+        self._size += 1
+
+    def clear(self):
+        """Remove all values"""
+        self._start = 0
+        self._size = 0
+        if np is None:
+            self._data = array(self.typecode)
+
+    def discard(self, n: int):
+        """Remove the first ``n`` values"""
+        n = min(n, self._size)
+        self._start += n
+        self._size -= n
+        if np is None and self._start >= max(self._size, self._capacity):
+            self._data = self._data[self._start:]
+            self._start = 0
+
+    def searchsorted(self, value, side: str = "left") -> int:
+        """Position of ``value`` in a column sorted in ascending order, see ``numpy.searchsorted``"""
+        lo, hi = self._start, self._start + self._size
+        if np is not None:
+            return int(np.searchsorted(self._data[lo:hi], value, side=side))
+        if side == "left":
+            return bisect.bisect_left(self._data, value, lo, hi) - lo
+        return bisect.bisect_right(self._data, value, lo, hi) - lo
+
+    def view(self):
+        """Zero-copy NumPy view of values
+
+        The view stays valid after more values are appended or the oldest
+        ones are discarded, but it does not reflect these changes.
+        """
+        import_numpy()
+        return self._data[self._start:self._start + self._size]
+
+
+def _trim(store, timestamp: int, max_items: int, max_age: int):
+    """Discard the oldest rows of a columnar store beyond ``max_items`` or older than ``timestamp - max_age``"""
+    n = 0
+    if max_items is not None:
+        n = len(store) - max_items
+    if max_age is not None and store.timestamps[0] < timestamp - max_age:
+        n = max(n, store.timestamps.searchsorted(timestamp - max_age, side="left"))
+    if n > 0:
+        for column in store._columns:
+            column.discard(n)
+
+
+class TradeStore:
+    """Columnar storage of trades
+
+    Each trade is kept as a row of fixed size values: timestamp as epoch
+    nanoseconds (int64), price and quantity (float64), side (int8, 1 for buy
+    and -1 for sell) and trade id (int64). Trades are expected to arrive in
+    chronological order, which allows time range lookups with binary search.
+
+    Parameters
+    ----------
+    max_items : int
+        Maximum number of trades to keep, unlimited if ``None``
+    max_age : float
+        Maximum age of trades in seconds, measured from the timestamp of the
+        latest trade, unlimited if ``None``
+
+    Attributes
+    ----------
+    timestamps : Column
+    prices : Column
+    quantities : Column
+    sides : Column
+    trade_ids : Column
+    """
+    SIDES = {"buy": 1, "sell": -1}
+
+    def __init__(self, max_items: int = None, max_age: float = None):
+        self.max_items = max_items
+        self.max_age = max_age
+        self.timestamps = Column("q")
+        self.prices = Column("d")
+        self.quantities = Column("d")
+        self.sides = Column("b")
+        self.trade_ids = Column("q")
+        self._columns = (self.timestamps, self.prices, self.quantities, self.sides, self.trade_ids)
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(size={len(self)})"
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, index: int) -> Dict:
+        return {
+            "timestamp": int(self.timestamps[index]),
+            "price": float(self.prices[index]),
+            "qty": float(self.quantities[index]),
+            "side": "buy" if self.sides[index] > 0 else "sell",
+            "trade_id": int(self.trade_ids[index]),
+        }
+
+    def append(self, timestamp: int, price: float, qty: float, side: int, trade_id: int):
+        """Add a single trade
+
+        Parameters
+        ----------
+        timestamp : int
+            Epoch nanoseconds
+        price : float
+        qty : float
+        side : int
+            1 for buy and -1 for sell
+        trade_id : int
+        """
+        self.timestamps.append(timestamp)
+        self.prices.append(price)
+        self.quantities.append(qty)
+        self.sides.append(side)
+        self.trade_ids.append(trade_id)
+        _trim(self, timestamp, self.max_items, None if self.max_age is None else int(self.max_age * 1e9))
+
+    def append_trade(self, trade: Dict):
+        """Add a trade in the exchange format
+
+        Parameters
+        ----------
+        trade : Dict
+            e.g. ``{"timestamp": "2019-08-13T11:30:06.100140Z", "side": "sell",
+            "qty": 8.5E-5, "price": 11252.4, "trade_id": "12884909920"}``
+        """
+        self.append(
+            timestamp=timestamp_to_nanoseconds(trade["timestamp"]),
+            price=trade["price"],
+            qty=trade["qty"],
+            side=self.SIDES[trade["side"]],
+            trade_id=int(trade["trade_id"]),
+        )
+
+    def clear(self):
+        """Remove all trades"""
+        for column in self._columns:
+            column.clear()
+
+    def index_range(self, start: int = None, end: int = None) -> Tuple[int, int]:
+        """Positions of trades with ``start <= timestamp < end``
+
+        Parameters
+        ----------
+        start : int
+            Epoch nanoseconds, from the first trade if ``None``
+        end : int
+            Epoch nanoseconds, up to the last trade if ``None``
+
+        Returns
+        -------
+        positions : Tuple[int, int]
+        """
+        i = 0 if start is None else self.timestamps.searchsorted(start, side="left")
+        j = len(self) if end is None else self.timestamps.searchsorted(end, side="left")
+        return i, max(i, j)
+
+    def to_numpy(self, start: int = None, end: int = None) -> Dict:
+        """Zero-copy NumPy views of trades with ``start <= timestamp < end``
+
+        Returns
+        -------
+        columns : Dict[str, numpy.ndarray]
+            Arrays for ``timestamp``, ``price``, ``qty``, ``side`` and ``trade_id``
+        """
+        i, j = self.index_range(start, end)
+        return {
+            "timestamp": self.timestamps.view()[i:j],
+            "price": self.prices.view()[i:j],
+            "qty": self.quantities.view()[i:j],
+            "side": self.sides.view()[i:j],
+            "trade_id": self.trade_ids.view()[i:j],
+        }
+
+    def last(self, seconds: float) -> Dict:
+        """Zero-copy NumPy views of trades within ``seconds`` of the latest one"""
+        if not len(self):
+            return self.to_numpy()
+        end = int(self.timestamps[-1])
+        return self.to_numpy(start=end - int(seconds * 1e9))
+
+
+class CandleStore:
+    """Columnar storage of OHLCV candles keyed by their open time
+
+    Updates of the still open candle overwrite it in place, so memory grows
+    with the number of candles rather than the number of messages. Candles
+    are expected to arrive in chronological order, which allows time range
+    lookups with binary search.
+
+    Parameters
+    ----------
+    max_candles : int
+        Maximum number of candles to keep, unlimited if ``None``
+    max_age : float
+        Maximum age of candles in seconds, measured from the open time of the
+        latest candle, unlimited if ``None``
+    timestamp_unit : int
+        Number of timestamp units per second, ``1000`` for epoch milliseconds
+        used by the exchange
+
+    Attributes
+    ----------
+    timestamps : Column
+        Open time of candles
+    opens : Column
+    highs : Column
+    lows : Column
+    closes : Column
+    volumes : Column
+    """
+    def __init__(self, max_candles: int = None, max_age: float = None, timestamp_unit: int = 1000):
+        self.max_candles = max_candles
+        self.max_age = max_age
+        self.timestamp_unit = timestamp_unit
+        self.timestamps = Column("q")
+        self.opens = Column("d")
+        self.highs = Column("d")
+        self.lows = Column("d")
+        self.closes = Column("d")
+        self.volumes = Column("d")
+        self._columns = (self.timestamps, self.opens, self.highs, self.lows, self.closes, self.volumes)
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(size={len(self)})"
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, index: int) -> List:
+        timestamp, *values = (column[index] for column in self._columns)
+        return [int(timestamp)] + [float(value) for value in values]
+
+    @property
+    def last(self) -> List:
+        """The latest candle as ``[timestamp, open, high, low, close, volume]``"""
+        return self[-1] if len(self) else []
+
+    def update(self, candle: List):
+        """Add a new candle or overwrite an existing one with the same open time
+
+        Parameters
+        ----------
+        candle : List
+            ``[timestamp, open, high, low, close, volume]``
+        """
+        timestamp = candle[0]
+        n = len(self)
+        if n and timestamp <= self.timestamps[n - 1]:
+            idx = n - 1 if timestamp == self.timestamps[n - 1] else self.timestamps.searchsorted(timestamp)
+            if self.timestamps[idx] != timestamp:
+                logging.warning(f"Ignoring out of order candle {candle}")
+                return
+            for column, value in zip(self._columns, candle):
+                column[idx] = value
+            return
+
+        self.append(candle)
+
+    def append(self, candle: List):
+        """Add a new candle even if the latest one has the same open time
+
+        Parameters
+        ----------
+        candle : List
+            ``[timestamp, open, high, low, close, volume]``
+        """
+        for column, value in zip(self._columns, candle):
+            column.append(value)
+        max_age = None if self.max_age is None else int(self.max_age * self.timestamp_unit)
+        _trim(self, candle[0], self.max_candles, max_age)
+
+    def clear(self):
+        """Remove all candles"""
+        for column in self._columns:
+            column.clear()
+
+    def index_range(self, start: int = None, end: int = None) -> Tuple[int, int]:
+        """Positions of candles with ``start <= timestamp < end``"""
+        i = 0 if start is None else self.timestamps.searchsorted(start, side="left")
+        j = len(self) if end is None else self.timestamps.searchsorted(end, side="left")
+        return i, max(i, j)
+
+    def to_list(self, start: int = None, end: int = None) -> List[List]:
+        """Candles with ``start <= timestamp < end`` as lists"""
+        i, j = self.index_range(start, end)
+        return [self[idx] for idx in range(i, j)]
+
+    def to_numpy(self, start: int = None, end: int = None) -> Dict:
+        """Zero-copy NumPy views of candles with ``start <= timestamp < end``
+
+        Returns
+        -------
+        columns : Dict[str, numpy.ndarray]
+            Arrays for ``timestamp``, ``open``, ``high``, ``low``, ``close`` and ``volume``
+        """
+        i, j = self.index_range(start, end)
+        names = ("timestamp", "open", "high", "low", "close", "volume")
+        return {name: column.view()[i:j] for name, column in zip(names, self._columns)}
@@ -0,0 +1,232 @@
+import asyncio
+import threading
+from collections import deque
+
+from bcx.channels import Channel
+from bcx.dispatch import OVERFLOW_POLICIES
+
+
+class EventStream:
+    """Bounded buffer of channel events consumed by iterating over it
+
+    Each stream is a separate listener of the channel with its own buffer, so
+    several consumers can read the same events at their own pace. When the
+    buffer is full, ``overflow`` policy decides what happens:
+
+    * ``"block"`` - thread handling messages waits for the consumer
+    * ``"drop_oldest"`` - the oldest buffered event is dropped
+    * ``"drop_newest"`` - the received event is dropped
+
+    Iteration blocks until an event arrives and stops once the stream is
+    closed and all buffered events are consumed.
+
+    Parameters
+    ----------
+    channel : Channel
+    event : str
+        One of ``channel.events``
+    max_size : int
+        Maximum number of buffered events
+    overflow : str
+        One of ``"block"``, ``"drop_oldest"`` or ``"drop_newest"``
+    conflate : float
+        Maximum number of events per second, events received in between are
+        merged into one with the latest value of every price level or ticker
+        field, see :class:`~bcx.conflation.Conflator`. Every event is buffered if ``None``
+
+    Attributes
+    ----------
+    dropped : int
+        Number of events dropped because the buffer was full
+    """
+    def __init__(self, channel: Channel, event: str, max_size: int = 1000, overflow: str = "drop_oldest",
+                 conflate: float = None):
+        if max_size < 1:
+            raise ValueError(f"Stream buffer size should be positive: {max_size}")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Overflow policy '{overflow}' is not supported. Should be one of {OVERFLOW_POLICIES}")
+
+        self.channel = channel
+        self.event = event
+        self.max_size = max_size
+        self.overflow = overflow
+        self.dropped = 0
+        self.is_closed = False
+        self._events = deque()
+        self._condition = threading.Condition()
+        channel.add_listener(event, self.put, conflate=conflate)
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(channel={self.channel}, event={self.event}, size={len(self)}, dropped={self.dropped})"
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        event = self.get()
+        if event is None and self.is_closed:
+            raise StopIteration
+        return event
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def put(self, event):
+        """Buffer an event, called by the channel"""
+        with self._condition:
+            if self.is_closed:
+                return
+            if len(self._events) >= self.max_size:
+                if self.overflow == "drop_newest":
+                    self.dropped += 1
+                    return
+                if self.overflow == "drop_oldest":
+                    self._events.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self._events) >= self.max_size and not self.is_closed:
+                        self._condition.wait()
+                    if self.is_closed:
+                        return
+            self._events.append(event)
+            self._condition.notify_all()
+
+    def get(self, timeout: float = None):
+        """The oldest buffered event, waiting for it up to ``timeout`` seconds
+
+        Returns
+        -------
+        event
+            ``None`` if there is no event after timeout or the stream is closed
+        """
+        with self._condition:
+            if not self._events and not self.is_closed:
+                self._condition.wait_for(lambda: self._events or self.is_closed, timeout)
+            if not self._events:
+                return None
+            event = self._events.popleft()
+            self._condition.notify_all()
+            return event
+
+    def close(self):
+        """Stop receiving events, iteration stops once buffered events are consumed"""
+        self.channel.remove_listener(self.event, self.put)
+        with self._condition:
+            self.is_closed = True
+            self._condition.notify_all()
+
+
+class AsyncEventStream:
+    """Bounded buffer of channel events consumed with ``async for``, see :class:`EventStream`
+
+    Events may be received on any thread and are handed to the running event
+    loop the stream was created in. Blocking the thread handling messages is not
+    possible there, so ``overflow`` is either ``"drop_oldest"`` or
+    ``"drop_newest"``.
+
+    Parameters
+    ----------
+    channel : Channel
+    event : str
+    max_size : int
+    overflow : str
+    conflate : float
+    subscribe : callable
+        Coroutine function awaited before the first event is consumed, e.g.
+        to subscribe to the channel
+
+    Attributes
+    ----------
+    dropped : int
+    """
+    def __init__(self, channel: Channel, event: str, max_size: int = 1000, overflow: str = "drop_oldest",
+                 conflate: float = None, subscribe: callable = None):
+        if max_size < 1:
+            raise ValueError(f"Stream buffer size should be positive: {max_size}")
+        if overflow not in ("drop_oldest", "drop_newest"):
+            raise ValueError(f"Overflow policy '{overflow}' is not supported. "
+                             f"Should be one of ('drop_oldest', 'drop_newest')")
+
+        self.channel = channel
+        self.event = event
+        self.max_size = max_size
+        self.overflow = overflow
+        self.dropped = 0
+        self.is_closed = False
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._events = deque()
+        self._ready = asyncio.Event()
+        self._subscribe = subscribe
+        channel.add_listener(event, self.put, conflate=conflate)
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return f"{class_name}(channel={self.channel}, event={self.event}, size={len(self)}, dropped={self.dropped})"
+
+    def __len__(self):
+        return len(self._events)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.get()
+        if event is None and self.is_closed:
+            raise StopAsyncIteration
+        return event
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def put(self, event):
+        """Buffer an event, called by the channel from any thread"""
+        if threading.get_ident() == self._loop_thread:
+            self._put(event)
+        else:
+            self._loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.is_closed:
+            return
+        if len(self._events) >= self.max_size:
+            self.dropped += 1
+            if self.overflow == "drop_newest":
+                return
+            self._events.popleft()
+        self._events.append(event)
+        self._ready.set()
+
+    async def get(self):
+        """The oldest buffered event, waiting for it
+
+        Returns
+        -------
+        event
+            ``None`` if the stream is closed and all events were consumed
+        """
+        if self._subscribe is not None:
+            subscribe, self._subscribe = self._subscribe, None
+            await subscribe()
+        while not self._events and not self.is_closed:
+            self._ready.clear()
+            await self._ready.wait()
+        if not self._events:
+            return None
+        return self._events.popleft()
+
+    def close(self):
+        """Stop receiving events, iteration stops once buffered events are consumed"""
+        self.channel.remove_listener(self.event, self.put)
+        self.is_closed = True
+        self._ready.set()
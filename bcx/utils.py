@@ -1,9 +1,68 @@
 from datetime import datetime
 
 
+def import_numpy():
+    """Import optional ``numpy`` dependency
+
+    Raises
+    ------
+    ImportError
+        If ``numpy`` is not installed
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("This functionality requires 'numpy'. Install it with: pip install 'bcx[numpy]'")
+    return numpy
+
+
+_EPOCH = datetime(1970, 1, 1)
+_NANOSECONDS_PER_SECOND = 1000000000
+_FRACTION_SCALE = tuple(10 ** (9 - n) for n in range(10))
+_DATES_CACHE = dict()
+
+
+def _date_to_nanoseconds(date: str) -> int:
+    """Nanoseconds since epoch at the start of ``YYYY-MM-DD`` date, cached as dates rarely change"""
+    ns = _DATES_CACHE.get(date)
+    if ns is None:
+        days = (datetime(int(date[0:4]), int(date[5:7]), int(date[8:10])) - _EPOCH).days
+        ns = days * 86400 * _NANOSECONDS_PER_SECOND
+        if len(_DATES_CACHE) >= 1024:
+            _DATES_CACHE.clear()
+        _DATES_CACHE[date] = ns
+    return ns
+
+
 def timestamp_to_datetime(ts: str) -> datetime:
-    """Convert UTC string to ``datetime``"""
-    return datetime.strptime(ts, "%Y-%m-%dT%H:%M:%S.%fZ")
+    """Convert UTC string to ``datetime``
+
+    Expects fixed layout of exchange timestamps ``%Y-%m-%dT%H:%M:%S.%fZ``,
+    which is parsed by slicing rather than with ``datetime.strptime``.
+    """
+    fraction = ts[20:-1]
+    return datetime(
+        int(ts[0:4]), int(ts[5:7]), int(ts[8:10]),
+        int(ts[11:13]), int(ts[14:16]), int(ts[17:19]),
+        int(fraction[:6].ljust(6, "0")) if fraction else 0,
+    )
+
+
+def timestamp_to_nanoseconds(ts: str) -> int:
+    """Convert UTC string to integer number of nanoseconds since epoch
+
+    Expects fixed layout of exchange timestamps ``%Y-%m-%dT%H:%M:%S.%fZ``
+    with up to 9 digits of fractional seconds. Date part is looked up in a
+    cache, so only time of day is parsed for most timestamps.
+    """
+    ns = _DATES_CACHE.get(ts[:10])
+    if ns is None:
+        ns = _date_to_nanoseconds(ts[:10])
+    ns += (int(ts[11:13]) * 3600 + int(ts[14:16]) * 60 + int(ts[17:19])) * _NANOSECONDS_PER_SECOND
+    fraction = ts[20:-1]
+    if fraction:
+        ns += int(fraction) * _FRACTION_SCALE[len(fraction)]
+    return ns
 
 
 def pretty_print(params, offset=0, printer=repr):
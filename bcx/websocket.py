@@ -1,17 +1,54 @@
-import json
+import asyncio
 import logging
+import random
 import time
-from threading import Lock, Thread
+from threading import Event, Lock, Thread, get_ident
+from typing import Union
 
 from websocket import WebSocketApp
 
+from bcx.codec import JsonCodec, get_codec
+
 
 class BlockchainWebsocket:
-    """Low level API to interact with Blockchain Exchange"""
-    def __init__(self):
+    """Low level API to interact with Blockchain Exchange
+
+    Failed connection attempts are retried after exponentially growing
+    delays with random jitter, so that clients do not hammer the exchange in
+    sync during outages.
+
+    Parameters
+    ----------
+    codec : Union[str, JsonCodec]
+        JSON codec used to encode outgoing messages, the fastest installed one by default
+    reconnect_delay : float
+        Upper bound of delay in seconds before the second connection attempt,
+        doubled after every failed attempt
+    reconnect_max_delay : float
+        Ceiling of delay between connection attempts in seconds
+    max_attempts : int
+        Number of connection attempts before giving up with ``ConnectionError``,
+        unlimited if ``None``
+
+    Attributes
+    ----------
+    disconnected_at : float
+        Epoch seconds when connection was lost the last time
+    """
+    def __init__(self, codec: Union[str, JsonCodec] = None, reconnect_delay: float = 0.5,
+                 reconnect_max_delay: float = 30.0, max_attempts: int = None):
+        self.codec = get_codec(codec)
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.max_attempts = max_attempts
         self._ws = None
         self._ws_connect_lock = Lock()
         self._ws_message_handler = lambda x: x
+        self._ws_reconnect_handler = lambda: None
+        self._was_connected = False
+        self._is_ready = Event()
+        self._attempt_done = Event()
+        self.disconnected_at = None
 
     @property
     def ws(self) -> WebSocketApp:
@@ -34,6 +71,25 @@ class BlockchainWebsocket:
         """Wait for socket to connect before dropping connection"""
         return 5
 
+    @property
+    def is_ready(self) -> bool:
+        """Whether connection is open and can be used to send messages"""
+        return self._is_ready.is_set()
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """Block until connection is open
+
+        Returns
+        -------
+        is_ready : bool
+            ``False`` if timeout expired first
+        """
+        return self._is_ready.wait(timeout)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Randomised delay in seconds before connection attempt following ``attempt`` failed ones"""
+        return random.uniform(0, min(self.reconnect_max_delay, self.reconnect_delay * 2 ** (attempt - 1)))
+
     @property
     def ws_connect_headers(self) -> list:
         """List of additional headers sent to blockchain exchange"""
@@ -43,6 +99,19 @@ class BlockchainWebsocket:
         """Set method responsible for handling messages received from blockchain exchange"""
         self._ws_message_handler = handler
 
+    def set_ws_reconnect_handler(self, handler: callable):
+        """Set method called without arguments once connection is established again after it was lost"""
+        self._ws_reconnect_handler = handler
+
+    def _on_open(self) -> None:
+        logging.info(f"Established connection to {self.ws_uri}")
+        if self._was_connected:
+            try:
+                self._ws_reconnect_handler()
+            except Exception as e:
+                logging.error(f"Error running reconnect handler: {e}")
+        self._was_connected = True
+
     def send_json(self, message: dict) -> None:
         """Send message represented as python dictionary to blockchain exchange
 
@@ -50,7 +119,7 @@ class BlockchainWebsocket:
         ----------
         message : Dict
         """
-        self.send(json.dumps(message))
+        self.send(self.codec.dumps(message))
 
     def send(self, message: str) -> None:
         """Send raw string message to blockchain exchange
@@ -67,10 +136,17 @@ class BlockchainWebsocket:
         if self._ws:
             return
         with self._ws_connect_lock:
+            attempt = 0
             while not self._ws:
                 self._connect()
                 if self._ws:
                     return
+                attempt += 1
+                if self.max_attempts is not None and attempt >= self.max_attempts:
+                    raise ConnectionError(f"Could not connect to {self.ws_uri} in {attempt} attempts")
+                delay = self._backoff_delay(attempt)
+                logging.warning(f"Connection attempt {attempt} to {self.ws_uri} failed, retrying in {delay:.2f}s")
+                time.sleep(delay)
 
     def reconnect(self) -> None:
         """Reconnect to blockchain exchange websocket"""
@@ -80,7 +156,9 @@ class BlockchainWebsocket:
     def _connect(self) -> None:
         assert not self._ws, "websocket should be closed before attempting to connect"
 
-        self._ws = WebSocketApp(
+        self._is_ready.clear()
+        self._attempt_done.clear()
+        ws = self._ws = WebSocketApp(
             url=self.ws_uri,
             on_message=self._wrap_callback(self._on_ws_message_callback),
             on_close=self._wrap_callback(self._on_ws_close_callback),
@@ -92,13 +170,11 @@ class BlockchainWebsocket:
         ws_thread.daemon = True
         ws_thread.start()
 
-        # Wait for socket to connect
-        ts = time.time()
-        while self._ws and (not self._ws.sock or not self._ws.sock.connected):
-            if time.time() - ts > self.ws_connect_timeout_seconds:
-                self._ws = None
-                return
-            time.sleep(0.1)
+        # Wait for socket to open or fail
+        self._attempt_done.wait(self.ws_connect_timeout_seconds)
+        if self._ws is ws and not self._is_ready.is_set():
+            self._ws = None
+            ws.close()
 
     def _run_websocket(self, ws: WebSocketApp) -> None:
         try:
@@ -112,16 +188,27 @@ class BlockchainWebsocket:
     def _reconnect(self, ws: WebSocketApp) -> None:
         assert ws is not None, '_reconnect should only be called with an existing ws'
         if ws is self._ws:
+            was_ready = self._is_ready.is_set()
+            self._is_ready.clear()
+            self._attempt_done.set()
             self._ws = None
             ws.close()
-            self.connect()
+            # Failed attempts are retried by the connecting thread
+            if was_ready:
+                self.disconnected_at = time.time()
+                try:
+                    self.connect()
+                except ConnectionError as e:
+                    logging.error(e)
 
     def _on_ws_message_callback(self, ws: WebSocketApp, message: str):
         logging.info(message)
         self._ws_message_handler(message)
 
     def _on_ws_open_callback(self, ws: WebSocketApp):
-        logging.info(f"Established connection to {self.ws_uri}")
+        self._is_ready.set()
+        self._attempt_done.set()
+        self._on_open()
 
     def _on_ws_close_callback(self, ws: WebSocketApp):
         self._reconnect(ws)
@@ -138,3 +225,138 @@ class BlockchainWebsocket:
                 except Exception as e:
                     raise Exception(f'Error running websocket callback: {e}')
         return wrapped_f
+
+
+class AsyncBlockchainWebsocket(BlockchainWebsocket):
+    """Low level asyncio API to interact with Blockchain Exchange
+
+    Implements the same message handler contract as :class:`BlockchainWebsocket`,
+    but runs a reader and a writer task on an event loop instead of a thread
+    per connection. Outgoing messages are queued, so :meth:`send` can be called
+    from synchronous code, including other threads. Requires ``websockets``.
+
+    Parameters
+    ----------
+    codec : Union[str, JsonCodec]
+        JSON codec used to encode outgoing messages, the fastest installed one by default
+    reconnect_delay : float
+        Upper bound of delay in seconds before the second connection attempt,
+        doubled after every failed attempt
+    reconnect_max_delay : float
+        Ceiling of delay between connection attempts in seconds
+    max_attempts : int
+        Number of connection attempts before giving up with ``ConnectionError``,
+        unlimited if ``None``
+    """
+    def __init__(self, codec: Union[str, JsonCodec] = None, reconnect_delay: float = 0.5,
+                 reconnect_max_delay: float = 30.0, max_attempts: int = None):
+        super().__init__(codec=codec, reconnect_delay=reconnect_delay, reconnect_max_delay=reconnect_max_delay,
+                         max_attempts=max_attempts)
+        try:
+            import websockets
+        except ImportError:
+            raise ImportError("asyncio connection requires 'websockets'. Install it with: pip install 'bcx[asyncio]'")
+        self._websockets = websockets
+        self._loop = None
+        self._loop_thread_id = None
+        self._outbox = None
+        self._unsent = None
+        self._is_open = None
+        self._task = None
+        self._is_closing = False
+
+    @property
+    def ws(self):
+        """Connection to blockchain exchange websocket"""
+        return self._ws
+
+    def send(self, message: str) -> None:
+        """Queue raw string message to be sent to blockchain exchange
+
+        Parameters
+        ----------
+        message : str
+        """
+        if self._loop is None:
+            raise RuntimeError("Connection should be established with 'await connect()' before sending messages")
+        if get_ident() == self._loop_thread_id:
+            self._outbox.put_nowait(message)
+        else:
+            self._loop.call_soon_threadsafe(self._outbox.put_nowait, message)
+
+    async def connect(self) -> None:
+        """Connect to blockchain exchange websocket and wait until it is open"""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread_id = get_ident()
+            self._outbox = asyncio.Queue()
+            self._is_open = asyncio.Event()
+            self._is_closing = False
+            self._task = self._loop.create_task(self._run())
+        if self._is_open.is_set():
+            return
+
+        is_open = self._loop.create_task(self._is_open.wait())
+        done, _ = await asyncio.wait([is_open, self._task], return_when=asyncio.FIRST_COMPLETED)
+        if is_open not in done:
+            is_open.cancel()
+            task, self._task = self._task, None
+            task.result()
+
+    def reconnect(self) -> None:
+        """Reconnect to blockchain exchange websocket"""
+        if self._ws is not None:
+            self._loop.create_task(self._ws.close())
+
+    async def close(self) -> None:
+        """Close connection to blockchain exchange websocket"""
+        self._is_closing = True
+        if self._ws is not None:
+            await self._ws.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        attempt = 0
+        while not self._is_closing:
+            is_opened = False
+            try:
+                async with self._websockets.connect(self.ws_uri, origin=self.ws_origin) as ws:
+                    is_opened = True
+                    attempt = 0
+                    self._ws = ws
+                    self._is_open.set()
+                    self._is_ready.set()
+                    self._on_open()
+                    writer = self._loop.create_task(self._write(ws))
+                    try:
+                        async for message in ws:
+                            logging.info(message)
+                            self._ws_message_handler(message)
+                    finally:
+                        writer.cancel()
+                        self._is_open.clear()
+                        self._is_ready.clear()
+                        self._ws = None
+                        self.disconnected_at = time.time()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Websocket connection error: {e}")
+            if not self._is_closing and not is_opened:
+                attempt += 1
+                if self.max_attempts is not None and attempt >= self.max_attempts:
+                    raise ConnectionError(f"Could not connect to {self.ws_uri} in {attempt} attempts")
+                await asyncio.sleep(self._backoff_delay(attempt))
+
+    async def _write(self, ws) -> None:
+        while True:
+            if self._unsent is None:
+                self._unsent = await self._outbox.get()
+            await ws.send(self._unsent)
+            self._unsent = None
@@ -0,0 +1,73 @@
+"""
+=====================
+JSON codec benchmarks
+=====================
+
+Compare decoding and encoding of exchange messages with all installed JSON
+codecs from :mod:`bcx.codec`. Payloads mimic messages recorded from ``l2``,
+``l3`` and ``trades`` channels.
+"""
+import json
+import random
+import timeit
+
+from bcx.codec import CODECS
+
+N_REPEATS = 2000
+
+
+def make_payloads(seed=0):
+    rnd = random.Random(seed)
+    l2_snapshot = {
+        "seqnum": 2, "event": "snapshot", "channel": "l2", "symbol": "BTC-USD",
+        "bids": [{"px": round(8723.45 - 0.5 * i, 2), "qty": round(rnd.uniform(0, 5), 8), "num": rnd.randint(1, 5)}
+                 for i in range(500)],
+        "asks": [{"px": round(8724.45 + 0.5 * i, 2), "qty": round(rnd.uniform(0, 5), 8), "num": rnd.randint(1, 5)}
+                 for i in range(500)],
+    }
+    l2_update = {
+        "seqnum": 3, "event": "updated", "channel": "l2", "symbol": "BTC-USD",
+        "bids": [{"px": 8723.45, "qty": 1.45, "num": 1}],
+        "asks": [],
+    }
+    l3_update = {
+        "seqnum": 4, "event": "updated", "channel": "l3", "symbol": "BTC-USD",
+        "bids": [{"id": "1234567890", "px": 8723.45, "qty": 1.45}],
+        "asks": [{"id": "1234567891", "px": 8724.45, "qty": 0}],
+    }
+    trade = {
+        "seqnum": 5, "event": "updated", "channel": "trades", "symbol": "BTC-USD",
+        "timestamp": "2019-08-13T11:30:06.100140Z", "side": "sell", "qty": 8.5E-5,
+        "price": 11252.4, "trade_id": "12884909920",
+    }
+    return {
+        "l2 snapshot": json.dumps(l2_snapshot),
+        "l2 update": json.dumps(l2_update),
+        "l3 update": json.dumps(l3_update),
+        "trade": json.dumps(trade),
+    }
+
+
+def run(codec, payloads):
+    results = []
+    for name, payload in payloads.items():
+        number = N_REPEATS // 100 if "snapshot" in name else N_REPEATS * 10
+        t = timeit.timeit(lambda: codec.loads(payload), number=number) / number
+        results.append(f"{name} {t * 1e6:8.2f} us")
+    message = {"action": "subscribe", "channel": "l3", "symbol": "BTC-USD"}
+    t = timeit.timeit(lambda: codec.dumps(message), number=N_REPEATS * 10) / (N_REPEATS * 10)
+    results.append(f"encode {t * 1e6:6.2f} us")
+    print(f"{codec.name:>8}: " + " | ".join(results))
+
+
+if __name__ == "__main__":
+    payloads = make_payloads()
+    for codec_class in CODECS.values():
+        try:
+            codec = codec_class()
+        except ImportError:
+            print(f"{codec_class.name:>8}: not installed")
+            continue
+        for payload in payloads.values():
+            assert codec.loads(payload) == json.loads(payload)
+        run(codec, payloads)
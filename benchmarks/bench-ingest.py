@@ -0,0 +1,95 @@
+"""
+===========================
+Ingestion worker benchmarks
+===========================
+
+Compare the work left to the process handling messages with and without
+:class:`bcx.ingest.ProcessConnection`. Without the worker process every
+frame is decoded from JSON, with it frames arrive as binary records written
+by :class:`bcx.ingest.EventEncoder` and only have to be unpacked by
+:class:`bcx.ingest.EventDecoder`. Encoding runs in the worker process and is
+shown for reference.
+
+By default records are packed only for the ``ujson`` and ``json`` codecs,
+``orjson`` and ``msgspec`` decode JSON faster than records are unpacked.
+"""
+import json
+import random
+import timeit
+
+from bcx.codec import CODECS
+from bcx.ingest import EventDecoder, EventEncoder
+
+N_REPEATS = 2000
+
+
+def make_payloads(seed=0):
+    rnd = random.Random(seed)
+
+    def l2_levels(start, step):
+        return [{"px": round(start + step * i, 2), "qty": round(rnd.uniform(0, 5), 8), "num": rnd.randint(1, 5)}
+                for i in range(500)]
+
+    def l3_levels(start, step):
+        return [{"id": str(1234567890 + i), "px": round(start + step * (i // 2), 2), "qty": round(rnd.uniform(0, 5), 8)}
+                for i in range(500)]
+
+    messages = {
+        "l2 snapshot": {
+            "seqnum": 1, "event": "snapshot", "channel": "l2", "symbol": "BTC-USD",
+            "bids": l2_levels(8723.45, -0.5), "asks": l2_levels(8724.45, 0.5),
+        },
+        "l3 snapshot": {
+            "seqnum": 2, "event": "snapshot", "channel": "l3", "symbol": "BTC-USD",
+            "bids": l3_levels(8723.45, -0.5), "asks": l3_levels(8724.45, 0.5),
+        },
+        "l2 update": {
+            "seqnum": 3, "event": "updated", "channel": "l2", "symbol": "BTC-USD",
+            "bids": [{"px": 8723.45, "qty": 1.45, "num": 1}],
+            "asks": [],
+        },
+        "l3 update": {
+            "seqnum": 4, "event": "updated", "channel": "l3", "symbol": "BTC-USD",
+            "bids": [{"id": "1234567890", "px": 8723.45, "qty": 1.45}],
+            "asks": [{"id": "1234567891", "px": 8724.45, "qty": 0}],
+        },
+        "trade": {
+            "seqnum": 5, "event": "updated", "channel": "trades", "symbol": "BTC-USD",
+            "timestamp": "2019-08-13T11:30:06.100140Z", "side": "sell", "qty": 8.5E-5,
+            "price": 11252.4, "trade_id": "12884909920",
+        },
+    }
+    return {name: json.dumps(message) for name, message in messages.items()}
+
+
+def measure(func, number):
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def run(codec, payloads):
+    encoder = EventEncoder(codec, pack=True)
+    decoder = EventDecoder()
+    for name, payload in payloads.items():
+        *internal, record = encoder.encode(payload)
+        for message in internal:
+            decoder.decode(message)
+        assert decoder.decode(record) == codec.loads(payload)
+
+        number = N_REPEATS // 100 if "snapshot" in name else N_REPEATS * 10
+        t_json = measure(lambda: codec.loads(payload), number)
+        t_decode = measure(lambda: decoder.decode(record), number)
+        t_encode = measure(lambda: encoder.encode(payload), number)
+        print(f"{name:>12}: json {t_json:8.2f} us | record {t_decode:8.2f} us "
+              f"({t_json / t_decode:4.1f}x) | worker encode {t_encode:8.2f} us")
+
+
+if __name__ == "__main__":
+    payloads = make_payloads()
+    for codec_class in CODECS.values():
+        try:
+            codec = codec_class()
+        except ImportError:
+            print(f"{codec_class.name}: not installed")
+            continue
+        print(f"{codec.name}:")
+        run(codec, payloads)
@@ -0,0 +1,66 @@
+"""
+=====================
+Order book benchmarks
+=====================
+
+Compare pure python order book (:class:`bcx.orderbook.PriceLevels`) against
+NumPy price ladder (:class:`bcx.orderbook.PriceLadder`) on a synthetic stream
+of L2 updates around a slowly drifting mid price.
+"""
+import random
+import timeit
+
+from bcx.orderbook import Orderbook
+
+TICK_SIZE = 0.01
+N_LEVELS = 500
+N_UPDATES = 100000
+
+
+def make_updates(n_updates, seed=0):
+    rnd = random.Random(seed)
+    mid = 10000.0
+    updates = []
+    for _ in range(n_updates):
+        mid += rnd.choice([-TICK_SIZE, 0.0, TICK_SIZE])
+        side = rnd.choice(["bids", "asks"])
+        offset = int(rnd.expovariate(1 / 20)) % N_LEVELS + 1
+        px = round(mid - offset * TICK_SIZE if side == "bids" else mid + offset * TICK_SIZE, 2)
+        qty = 0.0 if rnd.random() < 0.3 else round(rnd.uniform(0.01, 5.0), 4)
+        updates.append({"bids": [], "asks": [], side: [{"px": px, "qty": qty, "num": 1}]})
+    return updates
+
+
+def make_snapshot():
+    mid = 10000.0
+    return {
+        "bids": [{"px": round(mid - i * TICK_SIZE, 2), "qty": 1.0, "num": 1} for i in range(1, N_LEVELS)],
+        "asks": [{"px": round(mid + i * TICK_SIZE, 2), "qty": 1.0, "num": 1} for i in range(1, N_LEVELS)],
+    }
+
+
+def run(backend, updates, snapshot):
+    book = Orderbook(backend=backend, tick_size=TICK_SIZE)
+    book.apply_snapshot(snapshot)
+
+    def apply_updates():
+        for update in updates:
+            book.apply_update(update)
+
+    def query():
+        book.best_bid()
+        book.best_ask()
+        book.depth(10)
+        book.vwap("asks", 25.0)
+        book.imbalance(50)
+
+    t_update = timeit.timeit(apply_updates, number=1) / len(updates)
+    t_query = timeit.timeit(query, number=1000) / 1000
+    print(f"{backend:>8}: update {t_update * 1e6:8.2f} us/msg | queries {t_query * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    updates = make_updates(N_UPDATES)
+    snapshot = make_snapshot()
+    for backend in ["python", "numpy"]:
+        run(backend, updates, snapshot)
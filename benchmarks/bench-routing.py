@@ -0,0 +1,73 @@
+"""
+==========================
+Message routing benchmarks
+==========================
+
+Compare the cost of finding the channel of every message in
+:class:`bcx.manager.ChannelManager`: the original lookup, which builds
+channel parameters and encodes channel id for every message, against the
+precomputed routing table. Messages are already decoded and channels do
+nothing with them, so that only routing is measured.
+"""
+import random
+import time
+
+from bcx.manager import ChannelManager
+
+N_SYMBOLS = 50
+N_MESSAGES = 200000
+
+
+def route_with_lookup(manager: ChannelManager, msg: dict):
+    """Routing as it was done before the routing table"""
+    event_type = msg.pop("event")
+
+    channel_name = msg.pop("channel")
+    channel_params = {}
+    for key in ["symbol", "granularity"]:
+        if key in msg and channel_name != "trading":
+            channel_params[key] = msg.pop(key)
+
+    channel = manager.get_channel(channel_name, **channel_params)
+
+    channel.on_event(event_type, msg)
+
+
+def make_manager(symbols):
+    manager = ChannelManager(codec="json")
+    for symbol in symbols:
+        for name in ("l2", "l3", "trades"):
+            channel = manager.get_channel(name, symbol=symbol)
+            channel.on_event = lambda event_type, msg: None
+    # Register routes to the replaced handlers
+    manager._routes.clear()
+    for symbol in symbols:
+        for name in ("l2", "l3", "trades"):
+            manager.get_channel(name, symbol=symbol)
+    return manager
+
+
+def make_messages(symbols, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {"seqnum": i, "event": "updated", "channel": rnd.choice(("l2", "l3", "trades")),
+         "symbol": rnd.choice(symbols), "bids": [], "asks": []}
+        for i in range(N_MESSAGES)
+    ]
+
+
+def run(name, route, messages):
+    batch = [dict(msg) for msg in messages]
+    t = time.perf_counter()
+    for msg in batch:
+        route(msg)
+    t = time.perf_counter() - t
+    print(f"{name:>14}: {t / len(batch) * 1e9:8.1f} ns per message")
+
+
+if __name__ == "__main__":
+    symbols = [f"SYM{i}-USD" for i in range(N_SYMBOLS)]
+    manager = make_manager(symbols)
+    messages = make_messages(symbols)
+    run("lookup", lambda msg: route_with_lookup(manager, msg), messages)
+    run("routing table", manager._handle_messages, messages)
@@ -0,0 +1,46 @@
+"""
+====================
+Timestamp benchmarks
+====================
+
+Compare parsing of exchange timestamps with ``datetime.strptime`` against
+slice based parsers from :mod:`bcx.utils`.
+"""
+import timeit
+from datetime import datetime, timedelta
+
+from bcx.utils import timestamp_to_datetime, timestamp_to_nanoseconds
+
+N_TIMESTAMPS = 100000
+
+
+def strptime_to_nanoseconds(ts):
+    dt = datetime.strptime(ts, "%Y-%m-%dT%H:%M:%S.%fZ")
+    return (dt - datetime(1970, 1, 1)) // timedelta(microseconds=1) * 1000
+
+
+def make_timestamps(n):
+    start = datetime(2020, 5, 17, 23, 50)
+    return [
+        (start + timedelta(microseconds=137 * i)).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        for i in range(n)
+    ]
+
+
+def run(name, parser, timestamps):
+    t = timeit.timeit(lambda: [parser(ts) for ts in timestamps], number=1) / len(timestamps)
+    print(f"{name:>26}: {t * 1e9:8.1f} ns/timestamp")
+    return t
+
+
+if __name__ == "__main__":
+    timestamps = make_timestamps(N_TIMESTAMPS)
+    for ts in timestamps[::997]:
+        assert strptime_to_nanoseconds(ts) == timestamp_to_nanoseconds(ts)
+        assert datetime.strptime(ts, "%Y-%m-%dT%H:%M:%S.%fZ") == timestamp_to_datetime(ts)
+
+    t_strptime = run("strptime", lambda ts: datetime.strptime(ts, "%Y-%m-%dT%H:%M:%S.%fZ"), timestamps)
+    run("timestamp_to_datetime", timestamp_to_datetime, timestamps)
+    run("strptime (nanoseconds)", strptime_to_nanoseconds, timestamps)
+    t_fast = run("timestamp_to_nanoseconds", timestamp_to_nanoseconds, timestamps)
+    print(f"Speedup of timestamp_to_nanoseconds over strptime: {t_strptime / t_fast:.1f}x")
@@ -18,6 +18,15 @@ def readme():
 
 def extras_requires():
     extra_requirements = {
+        'numpy': [
+            'numpy>=1.16.0',
+        ],
+        'orjson': [
+            'orjson>=3.0.0',
+        ],
+        'asyncio': [
+            'websockets>=8.0',
+        ],
         'tests': [
             'pytest>=5.0.0',
             'pytest-cov>=2.7.1'
@@ -80,7 +89,7 @@ def do_setup():
             'websocket',
             'api',
         ],
-        python_requires='>=3.6',
+        python_requires='>=3.7',
         install_requires=[
             "websocket_client>=0.57.0",
         ],
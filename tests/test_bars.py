@@ -0,0 +1,130 @@
+import pytest
+
+from bcx.bars import (
+    CandleAggregator, DollarBarBuilder, ThresholdBarBuilder, TickBarBuilder, TimeBarBuilder, VolumeBarBuilder,
+)
+from bcx.channels import TradesChannel
+
+
+MINUTE_MS = 60 * 1000
+SECOND_NS = 10 ** 9
+
+
+def test_candle_aggregator_millisecond_timestamps():
+    start = 1559039400000
+    aggregator = CandleAggregator(300)
+    for i in range(10):
+        aggregator.update([start + i * MINUTE_MS, 100 + i, 110 + i, 90 + i, 105 + i, 1.0])
+
+    assert aggregator.candles.to_list() == [
+        [start, 100.0, 114.0, 90.0, 109.0, 5.0],
+        [start + 5 * MINUTE_MS, 105.0, 119.0, 95.0, 114.0, 5.0],
+    ]
+
+
+def test_candle_aggregator_open_candle_updates():
+    start = 1559039400000
+    aggregator = CandleAggregator(300)
+    aggregator.update([start, 100, 101, 99, 100, 1.0])
+    aggregator.update([start, 100, 103, 98, 102, 2.0])
+    aggregator.update([start + MINUTE_MS, 102, 104, 101, 103, 1.0])
+
+    assert aggregator.candles.to_list() == [[start, 100.0, 104.0, 98.0, 103.0, 3.0]]
+
+
+def test_threshold_bar_builder_is_abstract():
+    with pytest.raises(TypeError):
+        ThresholdBarBuilder(threshold=1.0)
+
+
+
+def test_tick_bars():
+    builder = TickBarBuilder(threshold=3)
+    for i, price in enumerate([10.0, 12.0, 9.0, 11.0, 13.0]):
+        builder.update(i * SECOND_NS, price, 1.0)
+
+    assert builder.bars.to_list() == [[0, 10.0, 12.0, 9.0, 9.0, 3.0]]
+    assert builder.current == [3 * SECOND_NS, 11.0, 13.0, 11.0, 13.0, 2.0]
+
+
+def test_volume_bars():
+    builder = VolumeBarBuilder(threshold=2.0)
+    for i, (price, qty) in enumerate([(10.0, 1.0), (11.0, 1.0), (12.0, 1.5), (9.0, 1.0), (10.0, 0.5)]):
+        builder.update(i * SECOND_NS, price, qty)
+
+    assert builder.bars.to_list() == [
+        [0, 10.0, 11.0, 10.0, 11.0, 2.0],
+        [2 * SECOND_NS, 12.0, 12.0, 9.0, 9.0, 2.5],
+    ]
+    assert builder.current == [4 * SECOND_NS, 10.0, 10.0, 10.0, 10.0, 0.5]
+
+
+def test_dollar_bars():
+    builder = DollarBarBuilder(threshold=100.0)
+    builder.update(0, 10.0, 5.0)
+    builder.update(SECOND_NS, 20.0, 3.0)
+    builder.update(2 * SECOND_NS, 20.0, 1.0)
+
+    assert builder.bars.to_list() == [[0, 10.0, 20.0, 10.0, 20.0, 8.0]]
+    assert builder.current[5] == 1.0
+
+
+def test_time_bars_are_aligned_and_closed_by_next_period():
+    builder = TimeBarBuilder(seconds=10)
+    builder.update(12 * SECOND_NS, 10.0, 1.0)
+    builder.update(19 * SECOND_NS, 11.0, 1.0)
+    assert len(builder.bars) == 0
+
+    builder.update(35 * SECOND_NS, 12.0, 1.0)
+    assert builder.bars.to_list() == [[10 * SECOND_NS, 10.0, 11.0, 10.0, 11.0, 2.0]]
+    assert builder.current[0] == 30 * SECOND_NS
+
+    builder.flush(39 * SECOND_NS)
+    assert builder.current is not None
+    builder.flush(40 * SECOND_NS)
+    assert builder.current is None
+    assert len(builder.bars) == 2
+
+
+def test_bar_callbacks():
+    closed = []
+    builder = TickBarBuilder(threshold=1)
+
+    def fail(bar):
+        raise ValueError("failing callback")
+
+    builder.add_callback(fail)
+    builder.add_callback(closed.append)
+    builder.update(0, 10.0, 1.0)
+    builder.remove_callback(closed.append)
+    builder.update(SECOND_NS, 11.0, 1.0)
+
+    assert closed == [[0, 10.0, 10.0, 10.0, 10.0, 1.0]]
+    assert len(builder.bars) == 2
+
+
+def test_bar_builder_keeps_max_bars():
+    builder = TickBarBuilder(threshold=1, max_bars=3)
+    for i in range(10):
+        builder.update(i * SECOND_NS, float(i), 1.0)
+
+    assert [bar[1] for bar in builder.bars.to_list()] == [7.0, 8.0, 9.0]
+
+
+def test_trades_channel_updates_bar_builders():
+    channel = TradesChannel(symbol="BTC-USD", ws=None, name="trades")
+    ticks = channel.add_bar_builder(TickBarBuilder(threshold=2))
+    volume = channel.add_bar_builder(VolumeBarBuilder(threshold=10.0))
+    for i, qty in enumerate([1.0, 2.0, 3.0]):
+        channel.on_event("updated", {
+            "seqnum": i, "event": "updated", "channel": "trades", "symbol": "BTC-USD",
+            "timestamp": f"2019-08-13T11:30:0{i}.000000Z", "side": "buy", "qty": qty,
+            "price": 100.0 + i, "trade_id": str(i),
+        })
+
+    start = 1565695800 * SECOND_NS
+    assert ticks.bars.to_list() == [[start, 100.0, 101.0, 100.0, 101.0, 3.0]]
+    assert volume.current == [start, 100.0, 102.0, 100.0, 102.0, 6.0]
+
+    channel.remove_bar_builder(ticks)
+    assert channel.bar_builders == [volume]
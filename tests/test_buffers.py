@@ -0,0 +1,46 @@
+import pytest
+
+from bcx.buffers import RetentionPolicy, RingBuffer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ring_buffer_keeps_latest_items():
+    buffer = RingBuffer(RetentionPolicy(max_items=3))
+    for i in range(10):
+        buffer.append(i)
+
+    assert buffer == [7, 8, 9]
+    assert buffer[0] == 7 and buffer[-1] == 9
+    assert buffer[1:] == [8, 9]
+    assert len(buffer._items) == 3
+
+
+def test_ring_buffer_unbounded_grows():
+    buffer = RingBuffer()
+    for i in range(100):
+        buffer.append(i)
+    assert buffer.to_list() == list(range(100))
+
+
+def test_ring_buffer_expires_old_items():
+    clock = FakeClock()
+    buffer = RingBuffer(RetentionPolicy(max_age=10.0), clock=clock)
+    for i in range(30):
+        clock.now = float(i)
+        buffer.append(i)
+
+    clock.now = 35.0
+    assert buffer.to_list() == list(range(25, 30))
+
+
+@pytest.mark.parametrize("kwargs", [{"max_items": 0}, {"max_age": -1.0}])
+def test_retention_policy_validation(kwargs):
+    with pytest.raises(ValueError):
+        RetentionPolicy(**kwargs)
@@ -0,0 +1,188 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bcx.buffers import RetentionPolicy
+from bcx.channels import ChannelFactory, SubscriptionRejected, SymbolsChannel, TickerChannel, TradingChannel
+
+
+class FakeWebsocket:
+    def __init__(self):
+        self.sent = []
+
+    def send_json(self, message):
+        self.sent.append(message)
+
+
+def order(order_id, status="open"):
+    return {"orderID": order_id, "ordStatus": status, "symbol": "BTC-USD"}
+
+
+def test_trading_snapshot_replaces_open_orders():
+    ws = FakeWebsocket()
+    channel = TradingChannel(ws=ws, name="trading")
+    channel.on_event("snapshot", {"orders": [order("1"), order("2")]})
+    channel.on_event("updated", order("3"))
+    channel.on_event("updated", order("1", "filled"))
+    assert channel.open_orders == {"2", "3"}
+
+    channel.on_event("snapshot", {"orders": [order("3")]})
+    assert channel.open_orders == {"3"}
+
+    channel.cancel_all_orders()
+    assert [message["orderID"] for message in ws.sent] == ["3"]
+
+
+def test_trading_state_reset_on_reconnect():
+    channel = TradingChannel(ws=FakeWebsocket(), name="trading")
+    channel.on_event("subscribed", {})
+    channel.on_event("snapshot", {"orders": [order("1")]})
+
+    channel.on_reconnect()
+
+    assert not channel.is_subscribed
+    assert channel.open_orders == set()
+    assert channel.snapshot == []
+
+
+def test_wait_subscribed():
+    channel = TickerChannel(symbol="BTC-USD", ws=FakeWebsocket(), name="ticker")
+    with pytest.raises(TimeoutError):
+        channel.wait_subscribed(timeout=0.01)
+
+    channel.subscribe()
+    threading.Timer(0.01, channel.on_event, args=("subscribed", {})).start()
+    assert channel.wait_subscribed(timeout=5) is channel
+    assert channel.subscription.result() is channel
+
+
+def test_wait_subscribed_raises_on_reject():
+    channel = TickerChannel(symbol="BTC-USD", ws=FakeWebsocket(), name="ticker")
+    channel.subscribe()
+    channel.on_event("rejected", {"text": "Unknown symbol"})
+
+    with pytest.raises(SubscriptionRejected):
+        channel.wait_subscribed(timeout=0)
+    assert not channel.is_pending
+
+
+def test_subscription_renewed_after_unsubscribe():
+    channel = TickerChannel(symbol="BTC-USD", ws=FakeWebsocket(), name="ticker")
+    channel.subscribe()
+    channel.on_event("subscribed", {})
+    channel.unsubscribe()
+    channel.on_event("unsubscribed", {})
+
+    assert not channel.subscription.done()
+    assert channel.wait_unsubscribed(timeout=0) is channel
+    with pytest.raises(TimeoutError):
+        channel.wait_subscribed(timeout=0.01)
+
+    channel.subscribe()
+    channel.on_event("subscribed", {})
+    assert channel.subscription.done()
+    with pytest.raises(TimeoutError):
+        channel._wait(channel._unsubscribed, timeout=0.01)
+
+
+@pytest.mark.parametrize("name, params", [
+    ("heartbeat", {}),
+    ("l2", {"symbol": "BTC-USD"}),
+    ("l3", {"symbol": "BTC-USD"}),
+    ("prices", {"symbol": "BTC-USD", "granularity": 60}),
+    ("symbols", {}),
+    ("ticker", {"symbol": "BTC-USD"}),
+    ("trades", {"symbol": "BTC-USD"}),
+    ("auth", {}),
+    ("trading", {}),
+    ("balances", {}),
+])
+def test_every_channel_accepts_retention(name, params):
+    retention = RetentionPolicy(max_items=2)
+    channel = ChannelFactory().create_channel(name, ws=FakeWebsocket(), options={"retention": retention}, **params)
+    assert channel.retention is retention
+
+
+def test_histories_are_bounded():
+    retention = RetentionPolicy(max_items=2)
+    ticker = TickerChannel(symbol="BTC-USD", ws=FakeWebsocket(), name="ticker", retention=retention)
+    symbols = SymbolsChannel(ws=FakeWebsocket(), name="symbols", retention=retention)
+    for i in range(5):
+        ticker.on_event("updated", {"last_trade_price": i})
+        symbols.on_event("updated", {"symbol": "BTC-USD", "status": i})
+
+    assert ticker.updates == [{"last_trade_price": 3}, {"last_trade_price": 4}]
+    assert symbols.updates["BTC-USD"] == [{"status": 3}, {"status": 4}]
+
+
+def trade(i):
+    return {
+        "timestamp": "2019-08-13T11:30:06.100140Z", "side": "buy", "qty": 1.0,
+        "price": 100.0 + i, "trade_id": str(i),
+    }
+
+
+def test_listeners_are_called_as_events_are_applied():
+    channel = ChannelFactory().create_channel("trades", ws=FakeWebsocket(), symbol="BTC-USD")
+    first, second = [], []
+    channel.add_listener("trade", first.append)
+    channel.add_listener("trade", second.append)
+    channel.on_event("updated", trade(0))
+    channel.remove_listener("trade", first.append)
+    channel.on_event("updated", trade(1))
+
+    assert [message["trade_id"] for message in first] == ["0"]
+    assert [message["trade_id"] for message in second] == ["0", "1"]
+
+
+def test_listener_of_unknown_event_is_rejected():
+    channel = ChannelFactory().create_channel("trades", ws=FakeWebsocket(), symbol="BTC-USD")
+    with pytest.raises(ValueError):
+        channel.add_listener("book_update", print)
+
+
+def test_failing_listener_is_logged(caplog):
+    channel = ChannelFactory().create_channel("trades", ws=FakeWebsocket(), symbol="BTC-USD")
+    received = []
+
+    def fail(message):
+        raise ValueError("failing listener")
+
+    channel.add_listener("trade", fail)
+    channel.add_listener("trade", received.append)
+    channel.on_event("updated", trade(0))
+
+    assert len(received) == 1
+    assert "failing listener" in caplog.text
+
+
+def test_listener_runs_on_executor(caplog):
+    channel = ChannelFactory().create_channel("trades", ws=FakeWebsocket(), symbol="BTC-USD")
+    threads = []
+
+    def fail(message):
+        raise ValueError("failing listener")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        channel.add_listener("trade", lambda message: threads.append(threading.current_thread()), executor)
+        channel.add_listener("trade", fail, executor)
+        channel.on_event("updated", trade(0))
+
+    assert threads and threads[0] is not threading.current_thread()
+    assert "failing listener" in caplog.text
+
+
+@pytest.mark.parametrize("name, event, message_event, message", [
+    ("trading", "execution_report", "updated", order("1")),
+    ("trading", "order_rejected", "rejected", {"text": "Invalid price"}),
+    ("balances", "balance", "snapshot", {"balances": [{"currency": "BTC", "balance": 0.5}]}),
+    ("ticker", "ticker", "updated", {"price_24h": 4988.0, "volume_24h": 0.3015, "last_trade_price": 5000.0}),
+])
+def test_channels_emit_typed_events(name, event, message_event, message):
+    params = {"symbol": "BTC-USD"} if name == "ticker" else {}
+    channel = ChannelFactory().create_channel(name, ws=FakeWebsocket(), **params)
+    received = []
+    channel.add_listener(event, received.append)
+    channel.on_event(message_event, dict(message))
+    assert len(received) == 1
@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+import pytest
+
+from bcx.client import AsyncBlockchainWebsocketClient, BlockchainWebsocketClient
+from bcx.streams import AsyncEventStream
+from bcx.websocket import AsyncBlockchainWebsocket
+
+
+def test_async_client_has_no_blocking_api():
+    assert not issubclass(AsyncBlockchainWebsocketClient, BlockchainWebsocketClient)
+    assert not hasattr(AsyncBlockchainWebsocketClient, "stream")
+    for name in ("subscribe_many", "subscribe_to_trades", "on_trade", "create_order", "get_trading_channel"):
+        assert asyncio.iscoroutinefunction(getattr(AsyncBlockchainWebsocketClient, name))
+
+
+def test_async_stream_is_created_on_running_loop():
+    async def create_stream():
+        client = AsyncBlockchainWebsocketClient(codec="json")
+        stream = client.astream("trades", symbol="BTC-USD")
+        assert isinstance(stream, AsyncEventStream)
+        assert stream.channel is client.get_channel("trades", symbol="BTC-USD")
+        stream.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(create_stream())
+    finally:
+        loop.close()
+
+
+def test_async_stream_requires_running_loop():
+    client = AsyncBlockchainWebsocketClient(codec="json")
+    with pytest.raises(RuntimeError):
+        client.astream("trades", symbol="BTC-USD")
+
+
+TRADE = {
+    "event": "updated", "channel": "trades", "symbol": "BTC-USD", "timestamp": "2019-08-13T11:30:06.100140Z",
+    "side": "sell", "qty": 8.5e-5, "price": 11252.4, "trade_id": "12884909920",
+}
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    """Local websocket server acknowledging subscriptions and sending a trade after each ``trades`` subscription"""
+    websockets = pytest.importorskip("websockets")
+    received = []
+
+    async def handle(ws):
+        seqnum = 0
+        async for message in ws:
+            message = json.loads(message)
+            received.append(message)
+            seqnum += 1
+            await ws.send(json.dumps({
+                "seqnum": seqnum, "event": "subscribed", "channel": message["channel"],
+                **{key: value for key, value in message.items() if key not in ("action", "channel", "token")},
+            }))
+            if message["channel"] == "trades":
+                seqnum += 1
+                await ws.send(json.dumps({"seqnum": seqnum, **TRADE}))
+
+    async def serve(main):
+        async with websockets.serve(handle, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            monkeypatch.setattr(AsyncBlockchainWebsocket, "ws_uri", property(lambda self: f"ws://127.0.0.1:{port}"))
+            return await asyncio.wait_for(main(), 5)
+
+    def run(main):
+        return asyncio.run(serve(main))
+
+    run.received = received
+    return run
+
+
+def test_async_client_receives_trades(exchange):
+    async def main():
+        client = AsyncBlockchainWebsocketClient(codec="json")
+        trades = []
+        channel = await client.on_trade("BTC-USD", trades.append)
+        await client._wait_subscribed(channel)
+        while not trades:
+            await asyncio.sleep(0.01)
+        await client.close()
+        return channel, trades
+
+    channel, trades = exchange(main)
+    assert channel.is_subscribed
+    assert trades[0]["trade_id"] == TRADE["trade_id"]
+    assert exchange.received == [{"action": "subscribe", "channel": "trades", "symbol": "BTC-USD"}]
+
+
+def test_async_stream_yields_updates(exchange):
+    async def main():
+        client = AsyncBlockchainWebsocketClient(codec="json")
+        async with client.astream("trades", symbol="BTC-USD") as stream:
+            update = await stream.__anext__()
+        await client.close()
+        return update
+
+    assert exchange(main)["price"] == TRADE["price"]
+
+
+def test_async_trading_subscription_waits_for_auth(exchange, monkeypatch):
+    monkeypatch.setenv("BLOCKCHAIN_API_SECRET", "secret")
+
+    async def main():
+        client = AsyncBlockchainWebsocketClient(codec="json", trading_connection=True)
+        await client.subscribe_to_trading()
+        channel = await client._wait_subscribed(client.get_channel("trading"))
+        await client.close()
+        return client, channel
+
+    client, channel = exchange(main)
+    assert channel.is_subscribed
+    assert client.get_channel("auth").is_subscribed
+    assert [message["channel"] for message in exchange.received] == ["auth", "trading"]
+
+
+def test_async_connection_gives_up_after_max_attempts(monkeypatch):
+    pytest.importorskip("websockets")
+    monkeypatch.setattr(AsyncBlockchainWebsocket, "ws_uri", property(lambda self: "ws://127.0.0.1:9"))
+
+    async def main():
+        ws = AsyncBlockchainWebsocket(codec="json", reconnect_delay=0.01, max_attempts=2)
+        with pytest.raises(ConnectionError):
+            await ws.connect()
+
+    asyncio.run(main())
+
+
+def test_client_listener_is_added_before_subscription():
+    client = BlockchainWebsocketClient(codec="json")
+    ws = client.channel_manager.ws
+    sent = []
+    ws.send = lambda message: sent.append(json.loads(message))
+    trades = []
+    channel = client.on_trade("BTC-USD", trades.append)
+    ws._ws_message_handler(json.dumps({"seqnum": 1, "event": "subscribed", "channel": "trades", "symbol": "BTC-USD"}))
+    ws._ws_message_handler(json.dumps({"seqnum": 2, **TRADE}))
+
+    assert sent == [{"action": "subscribe", "channel": "trades", "symbol": "BTC-USD"}]
+    assert channel is client.get_channel("trades", symbol="BTC-USD")
+    assert [trade["trade_id"] for trade in trades] == [TRADE["trade_id"]]
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from bcx.client import BlockchainWebsocketClient
+from bcx.codec import CODECS, JsonCodec, get_codec
+from bcx.manager import ChannelManager
+from bcx.websocket import BlockchainWebsocket
+
+MESSAGES = [
+    {"seqnum": 1, "event": "subscribed", "channel": "heartbeat"},
+    {"seqnum": 2, "event": "snapshot", "channel": "l2", "symbol": "BTC-USD",
+     "bids": [{"px": 8723.45, "qty": 1.45, "num": 1}], "asks": []},
+    {"seqnum": 3, "event": "updated", "channel": "trades", "symbol": "BTC-USD",
+     "timestamp": "2019-08-13T11:30:06.100140Z", "side": "sell", "qty": 8.5e-5,
+     "price": 11252.4, "trade_id": "12884909920"},
+]
+
+
+def make_codec(name):
+    try:
+        return get_codec(name)
+    except ImportError:
+        pytest.skip(f"JSON codec '{name}' is not installed")
+
+
+@pytest.mark.parametrize("name", list(CODECS))
+@pytest.mark.parametrize("message", MESSAGES)
+def test_codec_round_trip(name, message):
+    codec = make_codec(name)
+    encoded = codec.dumps(message)
+    assert isinstance(encoded, str)
+    assert json.loads(encoded) == message
+    assert codec.loads(encoded) == message
+    assert codec.loads(encoded.encode()) == message
+
+
+def test_get_codec():
+    codec = JsonCodec()
+    assert get_codec(codec) is codec
+    assert get_codec("json").name == "json"
+    assert get_codec().name in CODECS
+    with pytest.raises(ValueError):
+        get_codec("simplejson")
+
+
+def test_codec_is_selected_per_client():
+    client = BlockchainWebsocketClient(codec="json")
+    assert client.channel_manager._codec.name == "json"
+    assert client.channel_manager.ws.codec is client.channel_manager._codec
+
+
+def test_manager_uses_codec_of_connection():
+    ws = BlockchainWebsocket(codec="json")
+    assert ChannelManager(ws=ws)._codec is ws.codec
+
+
+class RecordingCodec(JsonCodec):
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self.decoded = []
+        self.encoded = []
+        self.loads = self._loads
+        self.dumps = self._dumps
+
+    def _loads(self, message):
+        self.decoded.append(message)
+        return json.loads(message)
+
+    def _dumps(self, message):
+        self.encoded.append(message)
+        return json.dumps(message)
+
+
+def test_manager_decodes_and_encodes_with_codec():
+    codec = RecordingCodec()
+    sent = []
+    ws = BlockchainWebsocket(codec=codec)
+    ws.send = sent.append
+    manager = ChannelManager(ws=ws)
+    channel = manager.get_channel("ticker", symbol="BTC-USD")
+    channel.subscribe()
+    frame = json.dumps({"seqnum": 1, "event": "subscribed", "channel": "ticker", "symbol": "BTC-USD"})
+    ws._ws_message_handler(frame)
+
+    assert codec.encoded == [{"action": "subscribe", "channel": "ticker", "symbol": "BTC-USD"}]
+    assert json.loads(sent[0]) == codec.encoded[0]
+    assert codec.decoded == [frame]
+    assert channel.is_subscribed
@@ -0,0 +1,57 @@
+from bcx.conflation import Conflator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_conflator(event):
+    delivered = []
+    conflator = Conflator(event, delivered.append, rate=1.0, clock=FakeClock())
+    return conflator, delivered
+
+
+def test_candles_keep_final_state_of_closed_candle():
+    conflator, delivered = make_conflator("candle")
+    conflator.put([0, 100.0, 101.0, 99.0, 100.0, 1.0])
+    conflator.put([0, 100.0, 103.0, 99.0, 102.0, 2.0])
+    conflator.put([0, 100.0, 103.0, 98.0, 101.0, 3.0])
+    conflator.put([60, 101.0, 101.0, 101.0, 101.0, 0.5])
+    conflator.flush()
+    conflator.cancel()
+
+    assert delivered == [
+        [0, 100.0, 101.0, 99.0, 100.0, 1.0],
+        [0, 100.0, 103.0, 98.0, 101.0, 3.0],
+        [60, 101.0, 101.0, 101.0, 101.0, 0.5],
+    ]
+    assert conflator.received == 4
+    assert conflator.delivered == 3
+
+
+def test_book_updates_merged_per_level():
+    conflator, delivered = make_conflator("book_update")
+    conflator.put({"bids": [{"px": 10.0, "qty": 1.0}], "asks": []})
+    conflator.put({"bids": [{"px": 10.0, "qty": 2.0}], "asks": [{"px": 11.0, "qty": 1.0}]})
+    conflator.put({"bids": [{"px": 9.0, "qty": 1.0}], "asks": [{"px": 11.0, "qty": 0.0}]})
+    conflator.flush()
+    conflator.cancel()
+
+    assert delivered == [
+        {"bids": [{"px": 10.0, "qty": 1.0}], "asks": []},
+        {"bids": [{"px": 10.0, "qty": 2.0}, {"px": 9.0, "qty": 1.0}], "asks": [{"px": 11.0, "qty": 0.0}]},
+    ]
+
+
+def test_other_events_deliver_latest():
+    conflator, delivered = make_conflator("trade")
+    for i in range(4):
+        conflator.put({"trade_id": i})
+    conflator.flush()
+    conflator.cancel()
+
+    assert delivered == [{"trade_id": 0}, {"trade_id": 3}]
@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+
+import pytest
+
+from bcx.dispatch import Dispatcher, classify_frame
+from bcx.manager import ChannelManager
+from bcx.websocket import BlockchainWebsocket
+
+
+def frame(channel, event="updated", symbol=None, **fields):
+    message = {"event": event, "channel": channel, **fields}
+    if symbol is not None:
+        message["symbol"] = symbol
+    return json.dumps(message)
+
+
+def test_classify_frame():
+    assert classify_frame(frame("l2", symbol="BTC-USD")) == ("l2", "BTC-USD")
+    assert classify_frame(frame("trading").encode()) == ("trading", None)
+    assert classify_frame({"channel": "ticker", "symbol": "ETH-USD"}) == ("ticker", "ETH-USD")
+
+
+def test_per_channel_order_is_preserved():
+    received = []
+    dispatcher = Dispatcher(workers=4)
+    dispatcher.set_message_handler(lambda message: received.append(json.loads(message)))
+    for i in range(200):
+        dispatcher.put(frame("l2", symbol=f"S{i % 5}", i=i))
+    dispatcher.stop(timeout=5)
+
+    for symbol in range(5):
+        values = [message["i"] for message in received if message["symbol"] == f"S{symbol}"]
+        assert values == sorted(values) and len(values) == 40
+
+
+def test_trading_frame_runs_ahead_of_market_data_burst():
+    processed = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def handler(message):
+        message = json.loads(message)
+        if message["channel"] == "l2":
+            if message["i"] == 0:
+                started.set()
+                release.wait(5)
+            time.sleep(0.001)
+        processed.append(message)
+
+    dispatcher = Dispatcher(workers=1, max_size=1000)
+    dispatcher.set_message_handler(handler)
+    for i in range(500):
+        dispatcher.put(frame("l2", symbol="BTC-USD", i=i))
+    assert started.wait(5)
+    dispatcher.put(frame("trading", orderID="1", ordStatus="filled"))
+    put_at = time.monotonic()
+    release.set()
+
+    while not any(message["channel"] == "trading" for message in processed):
+        time.sleep(0.001)
+    latency = time.monotonic() - put_at
+    dispatcher.stop(timeout=10)
+
+    position = next(i for i, message in enumerate(processed) if message["channel"] == "trading")
+    assert position <= 2
+    assert latency < 0.25
+    assert dispatcher.processed == 501
+
+
+@pytest.mark.parametrize("overflow, expected_drops", [("drop_oldest", 2), ("drop_newest", 1)])
+def test_only_updates_are_dropped(overflow, expected_drops):
+    dropped = []
+    dispatcher = Dispatcher(max_size=2, overflow=overflow)
+    dispatcher.set_drop_handler(lambda channel, symbol: dropped.append((channel, symbol)))
+    dispatcher._is_running = True  # keep frames queued without worker threads
+    frames = [
+        frame("l2", symbol="BTC-USD", i=0),
+        frame("l2", symbol="BTC-USD", i=1),
+        frame("l2", event="subscribed", symbol="ETH-USD"),
+        frame("l2", symbol="BTC-USD", i=2),
+    ]
+    for message in frames:
+        dispatcher.put(message)
+
+    queued = list(dispatcher._lanes[0].frames)
+    assert frames[2] in queued
+    assert dropped == [("l2", "BTC-USD")] * expected_drops
+    assert dispatcher.dropped == {"l2": expected_drops}
+
+
+@pytest.mark.parametrize("options", [{"workers": 0}, {"max_size": 0}, {"overflow": "drop_all"}])
+def test_invalid_settings(options):
+    with pytest.raises(ValueError):
+        Dispatcher(**options)
+
+
+def test_block_policy_pushes_back_on_reader():
+    release = threading.Event()
+    processed = []
+
+    def handler(message):
+        release.wait(5)
+        processed.append(json.loads(message)["i"])
+
+    dispatcher = Dispatcher(max_size=2, overflow="block")
+    dispatcher.set_message_handler(handler)
+    reader = threading.Thread(target=lambda: [dispatcher.put(frame("l2", symbol="BTC-USD", i=i)) for i in range(5)])
+    reader.start()
+    reader.join(0.2)
+    assert reader.is_alive()
+    assert dispatcher.depth == 2
+
+    release.set()
+    reader.join(5)
+    dispatcher.stop(timeout=5)
+    assert processed == list(range(5))
+    assert dispatcher.dropped == {}
+
+
+def test_priority_frames_are_never_dropped():
+    dispatcher = Dispatcher(max_size=1, overflow="drop_newest")
+    dispatcher._is_running = True  # keep frames queued without worker threads
+    for i in range(5):
+        dispatcher.put(frame("trading", orderID=str(i)))
+        dispatcher.put(frame("l2", symbol="BTC-USD", i=i))
+
+    assert dispatcher.priority_depth == 5
+    assert dispatcher.dropped == {"l2": 4}
+
+
+def test_stats():
+    dispatcher = Dispatcher(workers=2, max_size=10)
+    dispatcher._is_running = True  # keep frames queued without worker threads
+    for i in range(3):
+        dispatcher.put(frame("l2", symbol="BTC-USD", i=i))
+    dispatcher.put(frame("balances"))
+    assert dispatcher.stats == {
+        "depth": 4, "priority_depth": 1, "max_depth": 3, "received": 4, "processed": 0, "dropped": {},
+    }
+
+    dispatcher._is_running = False
+    dispatcher.start()
+    dispatcher.stop(timeout=5)
+    assert dispatcher.depth == 0
+    assert dispatcher.processed == 4
+
+
+def test_handler_errors_do_not_stop_workers():
+    processed = []
+
+    def handler(message):
+        message = json.loads(message)
+        if message["i"] == 0:
+            raise ValueError("failing handler")
+        processed.append(message["i"])
+
+    dispatcher = Dispatcher()
+    dispatcher.set_message_handler(handler)
+    for i in range(3):
+        dispatcher.put(frame("ticker", symbol="BTC-USD", i=i))
+    dispatcher.stop(timeout=5)
+    assert processed == [1, 2]
+    assert dispatcher.processed == 3
+
+
+def test_dropped_book_update_requests_snapshot():
+    ws = BlockchainWebsocket(codec="json")
+    sent = []
+    ws.send = lambda message: sent.append(json.loads(message))
+    dispatcher = Dispatcher(max_size=1, overflow="drop_newest")
+    manager = ChannelManager(ws=ws, dispatcher=dispatcher)
+    book = manager.get_channel("l2", symbol="BTC-USD")
+    book.subscribe()
+    sent.clear()
+
+    dispatcher._is_running = True  # keep frames queued without worker threads
+    dispatcher.put(frame("l2", symbol="BTC-USD", seqnum=1, bids=[], asks=[]))
+    dispatcher.put(frame("l2", symbol="BTC-USD", seqnum=2, bids=[], asks=[]))
+
+    assert book.resyncs == 1
+    assert [message["action"] for message in sent] == ["unsubscribe", "subscribe"]
@@ -0,0 +1,188 @@
+import json
+from threading import current_thread
+from types import SimpleNamespace
+
+import pytest
+
+from bcx.codec import get_codec
+from bcx.ingest import (
+    ProcessConnection, SharedRingBuffer, EventEncoder, EventDecoder, RAW, SYMBOL, L2_UPDATE, L3_UPDATE, TRADE, L2_SNAPSHOT, L3_SNAPSHOT,
+)
+
+
+def test_ring_buffer_fifo():
+    ring = SharedRingBuffer(capacity=64)
+    assert ring.get() is None
+    for record in [b"a", b"bb", b"ccc"]:
+        assert ring.put(record)
+    assert [ring.get() for _ in range(4)] == [b"a", b"bb", b"ccc", None]
+    assert len(ring) == 0
+
+
+def test_ring_buffer_full():
+    ring = SharedRingBuffer(capacity=32)
+    assert ring.put(b"x" * 12)
+    assert ring.put(b"y" * 10)
+    assert not ring.put(b"z")
+    assert ring.get() == b"x" * 12
+    assert ring.put(b"z")
+
+
+def test_ring_buffer_wraps_with_padding():
+    ring = SharedRingBuffer(capacity=32)
+    assert ring.put(b"a" * 10)
+    assert ring.put(b"b" * 10)
+    assert ring.get() == b"a" * 10
+    # 8 bytes left before the end, the record is written at the start after padding
+    assert ring.put(b"c" * 10)
+    assert ring.get() == b"b" * 10
+    assert ring.get() == b"c" * 10
+    assert ring.get() is None
+
+
+def test_ring_buffer_wraps_without_room_for_padding_marker():
+    ring = SharedRingBuffer(capacity=32)
+    assert ring.put(b"a" * 12)
+    assert ring.put(b"b" * 10)
+    assert ring.get() == b"a" * 12
+    # 2 bytes left before the end, too few for a padding marker
+    assert ring.put(b"c" * 6)
+    assert ring.get() == b"b" * 10
+    assert ring.get() == b"c" * 6
+
+
+def test_ring_buffer_many_wraps():
+    ring = SharedRingBuffer(capacity=100)
+    records = [bytes([i % 256]) * (1 + i % 17) for i in range(500)]
+    received = []
+    for record in records:
+        while not ring.put(record):
+            received.append(ring.get())
+    while len(ring):
+        received.append(ring.get())
+    assert received == records
+
+
+def test_ring_buffer_record_too_large():
+    ring = SharedRingBuffer(capacity=32)
+    with pytest.raises(ValueError):
+        ring.put(b"x" * 20)
+
+
+@pytest.fixture
+def codec():
+    return get_codec("json")
+
+
+def round_trip(codec, message):
+    encoder = EventEncoder(codec)
+    decoder = EventDecoder()
+    records = encoder.encode(json.dumps(message))
+    decoded = [decoder.decode(record) for record in records]
+    return records, [message for message in decoded if message is not None]
+
+
+def test_l2_update_round_trip(codec):
+    message = {
+        "seqnum": 2, "event": "updated", "channel": "l2", "symbol": "BTC-USD",
+        "bids": [{"px": 8723.45, "qty": 1.45, "num": 1}],
+        "asks": [{"px": 8724.0, "qty": 0.0, "num": 0}, {"px": 8725.5, "qty": 2.5, "num": 3}],
+    }
+    records, decoded = round_trip(codec, message)
+    assert [record[0] for record in records] == [SYMBOL, L2_UPDATE]
+    assert decoded == [message]
+
+
+def test_l3_update_round_trip(codec):
+    message = {
+        "seqnum": 3, "event": "updated", "channel": "l3", "symbol": "ETH-USD",
+        "bids": [{"id": "1234", "px": 180.5, "qty": 1.0}],
+        "asks": [],
+    }
+    records, decoded = round_trip(codec, message)
+    assert records[-1][0] == L3_UPDATE
+    assert decoded == [message]
+
+
+@pytest.mark.parametrize("channel, levels, kind", [
+    ("l2", [{"px": 8723.45, "qty": 1.45, "num": 1}, {"px": 8722.0, "qty": 0.5, "num": 2}], L2_SNAPSHOT),
+    ("l3", [{"id": "1234", "px": 180.5, "qty": 1.0}, {"id": "1235", "px": 180.5, "qty": 2.0}], L3_SNAPSHOT),
+])
+def test_snapshot_round_trip(codec, channel, levels, kind):
+    message = {
+        "seqnum": 1, "event": "snapshot", "channel": channel, "symbol": "BTC-USD",
+        "bids": levels, "asks": [dict(level, px=level["px"] + 10) for level in levels],
+    }
+    records, decoded = round_trip(codec, message)
+    assert records[-1][0] == kind
+    assert decoded == [message]
+
+
+def test_trade_round_trip(codec):
+    message = {
+        "seqnum": 21, "event": "updated", "channel": "trades", "symbol": "BTC-USD",
+        "timestamp": "2019-08-13T11:30:06.100140Z", "side": "sell", "qty": 8.5e-5,
+        "price": 11252.4, "trade_id": "12884909920",
+    }
+    records, decoded = round_trip(codec, message)
+    assert records[-1][0] == TRADE
+    assert decoded == [message]
+
+
+def test_symbol_is_sent_once(codec):
+    encoder = EventEncoder(codec)
+    message = {"seqnum": 1, "event": "updated", "channel": "l2", "symbol": "BTC-USD", "bids": [], "asks": []}
+    assert [record[0] for record in encoder.encode(json.dumps(message))] == [SYMBOL, L2_UPDATE]
+    assert [record[0] for record in encoder.encode(json.dumps(message))] == [L2_UPDATE]
+
+
+@pytest.mark.parametrize("message", [
+    {"seqnum": 0, "event": "subscribed", "channel": "l2", "symbol": "BTC-USD"},
+    {"seqnum": 1, "event": "snapshot", "channel": "trades", "symbol": "BTC-USD"},
+    {"seqnum": 2, "event": "updated", "channel": "ticker", "symbol": "BTC-USD", "price_24h": 4988.0},
+    {"seqnum": 3, "event": "updated", "channel": "l2", "symbol": "BTC-USD", "bids": [], "asks": [], "extra": 1},
+    {"seqnum": 4, "event": "updated", "channel": "l2", "symbol": "BTC-USD", "bids": [], "extra": 1},
+    {"seqnum": 5, "event": "updated", "channel": "trades", "symbol": "BTC-USD", "timestamp": "2019-08-13T11:30:06Z",
+     "side": "sell", "qty": 1.0, "price": 11252.4, "id": "12884909920"},
+])
+def test_other_frames_are_passed_raw(codec, message):
+    frame = json.dumps(message)
+    records, decoded = round_trip(codec, message)
+    assert records[-1][0] == RAW
+    assert decoded[-1] == frame.encode()
+
+
+@pytest.mark.parametrize("name, is_packed", [("orjson", False), ("msgspec", False), ("ujson", True), ("json", True)])
+def test_frames_are_packed_for_slow_codecs(name, is_packed):
+    assert EventEncoder(SimpleNamespace(name=name)).pack is is_packed
+
+
+def test_frames_are_passed_raw_without_packing(codec):
+    message = {"seqnum": 3, "event": "updated", "channel": "l2", "symbol": "BTC-USD", "bids": [], "asks": []}
+    frame = json.dumps(message).encode()
+    assert EventEncoder(codec, pack=False).encode(frame) == [bytes((RAW,)) + frame]
+
+
+class FakeControl:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, command):
+        self.sent.append(command)
+
+
+def test_send_to_running_worker_does_not_connect(monkeypatch):
+    connection = ProcessConnection(codec="json", capacity=64)
+    connection._process = SimpleNamespace(is_alive=lambda: True)
+    connection._control = FakeControl()
+    monkeypatch.setattr(connection, "connect", lambda: pytest.fail("connect called for a running worker"))
+    connection.send("message")
+    assert connection._control.sent == [("send", "message")]
+
+
+def test_forget_process_from_reader_thread():
+    connection = ProcessConnection(codec="json", capacity=64)
+    connection._process = SimpleNamespace(is_alive=lambda: False)
+    connection._reader = current_thread()
+    connection._forget_process()
+    assert connection._process is None
@@ -0,0 +1,287 @@
+import json
+
+import pytest
+
+from bcx.channels import SubscriptionRejected
+from bcx.client import BlockchainWebsocketClient
+from bcx.manager import ChannelManager
+from bcx.websocket import BlockchainWebsocket
+
+
+class FakeWebsocket(BlockchainWebsocket):
+    def __init__(self, codec=None):
+        super().__init__(codec=codec)
+        self.sent = []
+        self.seqnum = 0
+
+    def send(self, message):
+        self.sent.append(json.loads(message))
+
+    def receive(self, event, channel, **fields):
+        self.seqnum += 1
+        self._ws_message_handler(json.dumps({"seqnum": self.seqnum, "event": event, "channel": channel, **fields}))
+
+
+def subscribed_manager():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    channels = [manager.get_channel(name, symbol="BTC-USD") for name in ("ticker", "trades")]
+    for channel in channels:
+        channel.subscribe()
+        ws.receive("subscribed", channel.name, symbol="BTC-USD")
+    return ws, manager, channels
+
+
+def test_recovery_time_measured_once_all_channels_subscribed():
+    ws, manager, channels = subscribed_manager()
+    manager.resubscribe(channels, started=0.0)
+    ws.receive("subscribed", "ticker", symbol="BTC-USD")
+    assert len(manager.recovery_times) == 0
+
+    ws.receive("subscribed", "trades", symbol="BTC-USD")
+    assert len(manager.recovery_times) == 1
+    assert not manager._recoveries
+
+
+def test_recovery_resolved_when_channel_rejected():
+    ws, manager, channels = subscribed_manager()
+    manager.resubscribe(channels)
+    ws.receive("subscribed", "ticker", symbol="BTC-USD")
+    ws.receive("rejected", "trades", symbol="BTC-USD", text="Subscription rejected")
+
+    assert not manager._recoveries
+    assert len(manager.recovery_times) == 0
+
+
+def book_manager():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    book = manager.get_channel("l2", symbol="BTC-USD")
+    book.subscribe()
+    ws.receive("subscribed", "l2", symbol="BTC-USD")
+    ws.receive("snapshot", "l2", symbol="BTC-USD", bids=[{"px": 100.0, "qty": 1.0, "num": 1}], asks=[])
+    return ws, manager, book
+
+
+def test_sequence_gap_resyncs_order_book():
+    ws, manager, book = book_manager()
+    ws.sent.clear()
+    ws.seqnum += 2
+    ws.receive("updated", "l2", symbol="BTC-USD", bids=[{"px": 101.0, "qty": 1.0, "num": 1}], asks=[])
+
+    assert book.awaiting_snapshot
+    assert book.best_bid() is None
+    assert [message["action"] for message in ws.sent] == ["unsubscribe", "subscribe"]
+    assert manager.sequence_stats == {"gaps": 1, "missed": 2, "duplicates": 0, "resyncs": 1}
+
+    ws.receive("updated", "l2", symbol="BTC-USD", bids=[{"px": 102.0, "qty": 1.0, "num": 1}], asks=[])
+    assert book.best_bid() is None
+
+    ws.receive("snapshot", "l2", symbol="BTC-USD", bids=[{"px": 99.0, "qty": 2.0, "num": 1}], asks=[])
+    assert not book.awaiting_snapshot
+    assert book.best_bid() == {"px": 99.0, "qty": 2.0, "num": 1}
+
+
+def test_duplicate_messages_are_dropped():
+    ws, manager, book = book_manager()
+    ws.seqnum -= 1
+    ws.receive("updated", "l2", symbol="BTC-USD", bids=[{"px": 100.0, "qty": 0.0, "num": 0}], asks=[])
+
+    assert book.best_bid() == {"px": 100.0, "qty": 1.0, "num": 1}
+    assert manager.sequence_stats["duplicates"] == 1
+
+
+def test_send_subscriptions_in_one_burst():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    channels = [manager.get_channel(name, symbol=symbol) for name in ("l2", "trades") for symbol in ("BTC-USD", "ETH-USD")]
+
+    subscriptions = manager.send_subscriptions(channels)
+    assert [(message["channel"], message["symbol"]) for message in ws.sent] == [
+        (channel.name, channel.symbol) for channel in channels
+    ]
+
+    ws.receive("subscribed", "l2", symbol="BTC-USD")
+    ws.receive("subscribed", "l2", symbol="ETH-USD")
+    ws.receive("rejected", "trades", symbol="BTC-USD", text="Unknown symbol")
+    result = manager.subscription_results(subscriptions)
+    assert result == {"subscribed": channels[:2], "rejected": [channels[2]], "pending": [channels[3]]}
+
+
+def test_send_subscriptions_skips_pending_channels():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    channel = manager.get_channel("ticker", symbol="BTC-USD")
+    first = manager.send_subscriptions([channel])
+    second = manager.send_subscriptions([channel])
+
+    assert len(ws.sent) == 1
+    assert first[channel] is second[channel]
+    ws.receive("subscribed", "ticker", symbol="BTC-USD")
+    assert first[channel].result() is channel
+
+
+def test_trading_subscription_waits_for_authentication():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    auth, trading = manager.get_channel("auth"), manager.get_channel("trading")
+
+    subscriptions = manager.send_subscriptions([trading, auth])
+    assert [message["channel"] for message in ws.sent] == ["auth"]
+    assert trading.is_pending and not subscriptions[trading].done()
+
+    ws.receive("subscribed", "auth")
+    assert [message["channel"] for message in ws.sent] == ["auth", "trading"]
+    ws.receive("subscribed", "trading")
+    assert subscriptions[trading].result() is trading
+
+
+def test_derived_prices_channel_follows_source_subscription():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    source = manager.get_channel("prices", symbol="BTC-USD", granularity=60)
+    derived = manager.get_channel("prices", symbol="BTC-USD", granularity=300)
+
+    derived.subscribe()
+    assert [message["granularity"] for message in ws.sent] == [60]
+    assert not derived.subscription.done()
+
+    ws.receive("subscribed", "prices", symbol="BTC-USD", granularity=60)
+    assert derived.wait_subscribed(timeout=0) is derived
+
+    start = 1559039400000
+    for i in range(6):
+        ws.receive("updated", "prices", symbol="BTC-USD", granularity=60,
+                   price=[start + i * 60000, 100 + i, 101 + i, 99 + i, 100 + i, 1.0])
+    assert source.candles.to_list()[-1][0] == start + 5 * 60000
+    assert derived.candles.to_list() == [[start, 100.0, 105.0, 99.0, 104.0, 5.0], [start + 300000, 105.0, 106.0, 104.0, 105.0, 1.0]]
+
+
+def test_derived_prices_channel_rejected_with_source():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    manager.get_channel("prices", symbol="BTC-USD", granularity=60)
+    derived = manager.get_channel("prices", symbol="BTC-USD", granularity=300)
+
+    derived.subscribe()
+    ws.receive("rejected", "prices", symbol="BTC-USD", granularity=60, text="Unsupported")
+
+    with pytest.raises(SubscriptionRejected):
+        derived.wait_subscribed(timeout=0)
+    assert not derived.is_subscribed
+
+
+def trading_manager():
+    ws, trading_ws = FakeWebsocket(codec="json"), FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws, trading_ws=trading_ws)
+    return ws, trading_ws, manager
+
+
+def test_authenticated_channels_use_trading_connection(monkeypatch):
+    monkeypatch.setenv("BLOCKCHAIN_API_SECRET", "secret")
+    ws, trading_ws, manager = trading_manager()
+    for name in ("auth", "trading", "balances"):
+        assert manager.get_channel_ws(name) is trading_ws
+        assert manager.get_channel(name).ws is trading_ws
+    assert manager.get_channel_ws("l2") is ws
+    assert manager.get_channel("l2", symbol="BTC-USD").ws is ws
+
+    manager.get_channel("auth").subscribe()
+    manager.get_channel("ticker", symbol="BTC-USD").subscribe()
+    assert [message["channel"] for message in trading_ws.sent] == ["auth"]
+    assert [message["channel"] for message in ws.sent] == ["ticker"]
+
+
+def test_connections_are_sequenced_and_routed_separately():
+    ws, trading_ws, manager = trading_manager()
+    ticker = manager.get_channel("ticker", symbol="BTC-USD")
+    trading = manager.get_channel("trading")
+    ticker.subscribe()
+    trading.subscribe()
+    ws.receive("subscribed", "ticker", symbol="BTC-USD")
+    ws.receive("updated", "ticker", symbol="BTC-USD", price_24h=4988.0, volume_24h=0.3015, last_trade_price=5000.0)
+    trading_ws.receive("subscribed", "trading")
+    trading_ws.receive("updated", "trading", orderID="1", ordStatus="open", symbol="BTC-USD")
+
+    assert ticker.is_subscribed and trading.is_subscribed
+    assert manager.sequence_stats["gaps"] == 0
+    assert "1" in trading.open_orders
+
+
+def test_market_data_reconnect_keeps_trading_subscription():
+    ws, trading_ws, manager = trading_manager()
+    ticker = manager.get_channel("ticker", symbol="BTC-USD")
+    trading = manager.get_channel("trading")
+    ticker.subscribe()
+    trading.subscribe()
+    ws.receive("subscribed", "ticker", symbol="BTC-USD")
+    trading_ws.receive("subscribed", "trading")
+    ws.sent.clear()
+    trading_ws.sent.clear()
+
+    ws._was_connected = True
+    ws._on_open()
+
+    assert trading.is_subscribed
+    assert not ticker.is_subscribed
+    assert [message["channel"] for message in ws.sent] == ["ticker"]
+    assert trading_ws.sent == []
+
+
+def test_client_opens_separate_trading_connection():
+    manager = BlockchainWebsocketClient(codec="json", trading_connection=True).channel_manager
+    assert manager.trading_ws is not manager.ws
+    manager = BlockchainWebsocketClient(codec="json").channel_manager
+    assert manager.trading_ws is manager.ws
+
+
+def test_routes_are_filled_when_channels_are_created():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    btc = manager.get_channel("prices", symbol="BTC-USD", granularity=60)
+    eth = manager.get_channel("prices", symbol="ETH-USD", granularity=60)
+    heartbeat = manager.get_channel("heartbeat")
+
+    assert manager._routes[("prices", "BTC-USD", 60)] == btc.on_event
+    assert manager._routes[("prices", "ETH-USD", 60)] == eth.on_event
+    assert manager._routes[("heartbeat", None, None)] == heartbeat.on_event
+
+
+def test_frames_are_routed_by_symbol_and_granularity():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    btc = manager.get_channel("prices", symbol="BTC-USD", granularity=60)
+    eth = manager.get_channel("prices", symbol="ETH-USD", granularity=60)
+    for channel in (btc, eth):
+        channel.subscribe()
+        ws.receive("subscribed", "prices", symbol=channel.symbol, granularity=60)
+    ws.receive("updated", "prices", symbol="ETH-USD", granularity=60, price=[1559039640000, 8.0, 9.0, 7.0, 8.5, 1.0])
+
+    assert btc.is_subscribed and eth.is_subscribed
+    assert len(btc.candles) == 0
+    assert eth.candles.to_list() == [[1559039640000, 8.0, 9.0, 7.0, 8.5, 1.0]]
+
+
+def test_unknown_route_takes_slow_path_once():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    assert ("ticker", "BTC-USD", None) not in manager._routes
+
+    ws.receive("subscribed", "ticker", symbol="BTC-USD")
+    channel = manager.get_channel("ticker", symbol="BTC-USD")
+    assert manager._routes[("ticker", "BTC-USD", None)] == channel.on_event
+    assert channel.is_subscribed
+    assert len(manager.get_all_channels()) == 1
+
+
+def test_trading_frames_are_routed_regardless_of_symbol():
+    ws = FakeWebsocket(codec="json")
+    manager = ChannelManager(ws=ws)
+    trading = manager.get_channel("trading")
+    trading.subscribe()
+    ws.receive("subscribed", "trading")
+    ws.receive("updated", "trading", orderID="1", ordStatus="open", symbol="BTC-USD")
+    ws.receive("updated", "trading", orderID="2", ordStatus="open", symbol="ETH-USD")
+
+    assert set(trading.open_orders) == {"1", "2"}
+    assert len(manager.get_all_channels()) == 1
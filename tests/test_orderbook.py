@@ -0,0 +1,167 @@
+import random
+
+import pytest
+
+from bcx.channels import OrderbookL2Channel, OrderbookL3Channel
+from bcx.orderbook import Orderbook, OrderbookL3
+
+TICK_SIZE = 0.01
+
+
+def make_books(ladder_size):
+    pytest.importorskip("numpy")
+    return Orderbook(backend="python"), Orderbook(backend="numpy", tick_size=TICK_SIZE, ladder_size=ladder_size)
+
+
+def random_updates(n, seed=0):
+    rnd = random.Random(seed)
+    mid = 100.0
+    for _ in range(n):
+        mid += rnd.choice([-TICK_SIZE, 0.0, TICK_SIZE])
+        side = rnd.choice(["bids", "asks"])
+        offset = int(rnd.expovariate(1 / 30)) + 1
+        px = round(mid - offset * TICK_SIZE if side == "bids" else mid + offset * TICK_SIZE, 2)
+        qty = 0.0 if rnd.random() < 0.3 else round(rnd.uniform(0.01, 5.0), 4)
+        yield {side: [{"px": px, "qty": qty, "num": 1}]}
+
+
+@pytest.mark.parametrize("ladder_size", [4096, 64])
+def test_numpy_backend_matches_python(ladder_size):
+    python_book, numpy_book = make_books(ladder_size)
+    for i, update in enumerate(random_updates(5000)):
+        python_book.apply_update(update)
+        numpy_book.apply_update(update)
+        if i % 250:
+            continue
+        assert numpy_book.depth(20) == python_book.depth(20)
+        assert len(numpy_book.bids) == len(python_book.bids)
+        for side in ("bids", "asks"):
+            assert numpy_book.cumulative_depth(side, 100) == pytest.approx(python_book.cumulative_depth(side, 100))
+            for qty in (0.5, 10.0, 200.0, 1e6):
+                expected = python_book.vwap(side, qty)
+                if expected is None:
+                    assert numpy_book.vwap(side, qty) is None
+                else:
+                    assert numpy_book.vwap(side, qty) == pytest.approx(expected)
+        assert numpy_book.imbalance(50) == pytest.approx(python_book.imbalance(50))
+
+
+def test_cumulative_depth_is_list_for_both_backends():
+    snapshot = {"bids": [{"px": 99.99, "qty": 1.0, "num": 1}, {"px": 99.98, "qty": 2.0, "num": 1}], "asks": []}
+    for book in make_books(4096):
+        book.apply_snapshot(snapshot)
+        assert book.cumulative_depth("bids", 10) == [1.0, 3.0]
+        assert book.cumulative_depth("asks", 10) == []
+
+
+def test_l2_book_applies_updates():
+    book = Orderbook()
+    book.apply_snapshot({
+        "bids": [{"px": 99.0, "qty": 1.0, "num": 1}, {"px": 98.0, "qty": 2.0, "num": 2}],
+        "asks": [{"px": 101.0, "qty": 1.5, "num": 1}],
+    })
+    book.apply_update({"bids": [{"px": 99.5, "qty": 0.5, "num": 1}], "asks": []})
+    book.apply_update({"bids": [{"px": 99.0, "qty": 0.0, "num": 0}], "asks": [{"px": 100.5, "qty": 1.0, "num": 1}]})
+
+    assert book.best_bid() == {"px": 99.5, "qty": 0.5, "num": 1}
+    assert book.best_ask() == {"px": 100.5, "qty": 1.0, "num": 1}
+    assert book.spread() == 1.0
+    assert book.depth(2) == {
+        "bids": [{"px": 99.5, "qty": 0.5, "num": 1}, {"px": 98.0, "qty": 2.0, "num": 2}],
+        "asks": [{"px": 100.5, "qty": 1.0, "num": 1}, {"px": 101.0, "qty": 1.5, "num": 1}],
+    }
+    assert book.level("bids", 99.0) is None
+    assert book.vwap("asks", 2.0) == pytest.approx((100.5 + 101.0) / 2)
+    assert book.vwap("asks", 3.0) is None
+    assert book.imbalance(2) == pytest.approx((2.5 - 2.5) / 5.0)
+
+
+def test_order_book_channel_keeps_bounded_raw_updates():
+    channel = OrderbookL2Channel(symbol="BTC-USD", ws=None, name="l2")
+    channel.on_event("snapshot", {"bids": [], "asks": []})
+    for i in range(1500):
+        channel.on_event("updated", {"bids": [{"px": 100.0, "qty": float(i + 1), "num": 1}], "asks": []})
+
+    assert len(channel.updates["bids"]) == 1000
+    assert channel.best_bid() == {"px": 100.0, "qty": 1500.0, "num": 1}
+
+
+def make_l3_book():
+    book = OrderbookL3()
+    book.apply_snapshot({
+        "bids": [{"id": "1", "px": 99.0, "qty": 1.0}, {"id": "2", "px": 99.0, "qty": 2.0},
+                 {"id": "3", "px": 98.0, "qty": 0.5}],
+        "asks": [{"id": "4", "px": 101.0, "qty": 1.5}],
+    })
+    return book
+
+
+def test_l3_book_aggregates_orders_into_levels():
+    book = make_l3_book()
+    assert len(book) == 4
+    assert "2" in book
+    assert book.order("3") == {"id": "3", "side": "bids", "px": 98.0, "qty": 0.5}
+    assert book.orders_at("bids", 99.0) == [{"id": "1", "px": 99.0, "qty": 1.0}, {"id": "2", "px": 99.0, "qty": 2.0}]
+    assert book.best_bid() == {"px": 99.0, "qty": 3.0, "num": 2}
+    assert book.best_ask() == {"px": 101.0, "qty": 1.5, "num": 1}
+    assert book.spread() == 2.0
+
+
+def test_l3_book_modifies_order_in_place():
+    book = make_l3_book()
+    book.apply_update({"bids": [{"id": "1", "px": 99.0, "qty": 4.0}]})
+    assert [order["id"] for order in book.orders_at("bids", 99.0)] == ["1", "2"]
+    assert book.level("bids", 99.0) == {"px": 99.0, "qty": 6.0, "num": 2}
+
+
+def test_l3_book_moves_repriced_order_to_end_of_queue():
+    book = make_l3_book()
+    book.apply_update({"bids": [{"id": "1", "px": 98.0, "qty": 1.0}]})
+    assert [order["id"] for order in book.orders_at("bids", 98.0)] == ["3", "1"]
+    assert book.level("bids", 99.0) == {"px": 99.0, "qty": 2.0, "num": 1}
+    assert book.level("bids", 98.0) == {"px": 98.0, "qty": 1.5, "num": 2}
+
+
+def test_l3_book_deletes_orders():
+    book = make_l3_book()
+    book.apply_update({"bids": [{"id": "3", "px": 98.0, "qty": 0}], "asks": [{"id": "4", "px": 101.0, "qty": 0}]})
+    book.remove_order("unknown")
+    assert len(book) == 2
+    assert book.order("3") is None
+    assert book.level("bids", 98.0) is None
+    assert book.best_ask() is None
+    assert book.orders_at("asks", 101.0) == []
+    with pytest.raises(ValueError):
+        book.orders_at("buy", 99.0)
+
+
+def test_l3_book_snapshot_replaces_orders():
+    book = make_l3_book()
+    book.apply_snapshot({"bids": [], "asks": [{"id": "5", "px": 102.0, "qty": 1.0}]})
+    assert len(book) == 1
+    assert book.depth(5) == {"bids": [], "asks": [{"px": 102.0, "qty": 1.0, "num": 1}]}
+
+
+def test_l3_book_numpy_backend_matches_python():
+    pytest.importorskip("numpy")
+    rnd = random.Random(0)
+    python_book = OrderbookL3()
+    numpy_book = OrderbookL3(backend="numpy", tick_size=TICK_SIZE, ladder_size=256)
+    for i in range(3000):
+        side = rnd.choice(["bids", "asks"])
+        offset = rnd.randint(1, 50) * TICK_SIZE
+        px = round(100.0 - offset if side == "bids" else 100.0 + offset, 2)
+        qty = 0.0 if rnd.random() < 0.3 else round(rnd.uniform(0.01, 5.0), 4)
+        update = {side: [{"id": str(rnd.randint(0, 200)), "px": px, "qty": qty}]}
+        python_book.apply_update(update)
+        numpy_book.apply_update(update)
+    assert len(numpy_book) == len(python_book)
+    assert numpy_book.depth(20) == python_book.depth(20)
+
+
+def test_l3_channel_maintains_book():
+    channel = OrderbookL3Channel(symbol="BTC-USD", ws=None, name="l3")
+    channel.on_event("snapshot", {"bids": [{"id": "1", "px": 99.0, "qty": 1.0}], "asks": []})
+    channel.on_event("updated", {"bids": [{"id": "2", "px": 99.0, "qty": 2.0}], "asks": []})
+    assert channel.book.best_bid() == {"px": 99.0, "qty": 3.0, "num": 2}
+    assert [order["id"] for order in channel.book.orders_at("bids", 99.0)] == ["1", "2"]
@@ -0,0 +1,76 @@
+from bcx.pool import ConnectionPool, RateMeter
+
+
+class FakeWebsocket:
+    def __init__(self, codec=None, **kwargs):
+        self.codec = codec
+
+    def set_ws_message_handler(self, handler):
+        pass
+
+    def set_ws_reconnect_handler(self, handler):
+        self.reconnect_handler = handler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_pool(policy, size=3):
+    clock = FakeClock()
+    pool = ConnectionPool(size=size, policy=policy, codec="json", ws_factory=FakeWebsocket)
+    pool.meters = [RateMeter(clock=clock) for _ in range(size)]
+    return pool, clock
+
+
+def test_least_loaded_spreads_channels():
+    pool, _ = make_pool("least_loaded")
+    for i in range(9):
+        pool.assign(("l2", i), symbol=f"S{i}")
+    assert [stats["channels"] for stats in pool.stats] == [3, 3, 3]
+
+
+def test_rebalance_spreads_channels_against_other_loads():
+    pool, clock = make_pool("least_loaded")
+    for i in range(9):
+        pool.assign(("l2", i), symbol=f"S{i}")
+    for key, idx in list(pool._assignments.items()):
+        if idx == 2:
+            pool.release(key)
+    pool.meters[0].add(300)
+    pool.meters[1].add(300)
+    clock.now = 1.0
+
+    moves = pool.rebalance(0)
+
+    new_connections = sorted(pool.connections.index(connection) for connection in moves.values())
+    assert new_connections == [0, 0, 2]
+    assert [stats["channels"] for stats in pool.stats] == [2, 3, 1]
+
+
+def test_rebalance_takes_back_channels_of_balanced_pool():
+    pool, clock = make_pool("least_loaded")
+    for i in range(9):
+        pool.assign(("l2", i), symbol=f"S{i}")
+    for meter in pool.meters:
+        meter.add(300)
+    clock.now = 1.0
+
+    pool.rebalance(0)
+
+    assert [stats["channels"] for stats in pool.stats] == [3, 3, 3]
+
+
+def test_rebalance_keeps_hashed_channels():
+    pool, _ = make_pool("hash")
+    assigned = {i: pool.assign(("l2", i), symbol=f"S{i}") for i in range(9)}
+    connection = assigned[0]
+    idx = pool.connections.index(connection)
+
+    moves = pool.rebalance(idx)
+
+    assert moves == {("l2", i): connection for i, ws in assigned.items() if ws is connection}
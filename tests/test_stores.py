@@ -0,0 +1,114 @@
+import pytest
+
+from bcx import stores
+from bcx.stores import CandleStore, Column, TradeStore
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(stores, "np", None)
+    return request.param
+
+
+def append_trades(store, timestamps):
+    for i, timestamp in enumerate(timestamps):
+        store.append(timestamp=timestamp, price=100.0 + i, qty=1.0, side=1, trade_id=i)
+
+
+def trade_ids(store):
+    return [store[i]["trade_id"] for i in range(len(store))]
+
+
+def test_column_discard_and_growth(backend):
+    column = Column("q", capacity=4)
+    for i in range(10):
+        column.append(i)
+    column.discard(3)
+    for i in range(10, 20):
+        column.append(i)
+        column.discard(1)
+
+    assert len(column) == 7
+    assert list(column[:]) == list(range(13, 20))
+    assert column[0] == 13 and column[-1] == 19
+    assert column.searchsorted(15) == 2
+    assert column.searchsorted(15, side="right") == 3
+
+
+def test_column_view_stays_valid():
+    pytest.importorskip("numpy")
+    column = Column("q", capacity=2)
+    column.append(1)
+    column.append(2)
+    view = column.view()
+    for i in range(3, 10):
+        column.append(i)
+        column.discard(1)
+
+    assert view.tolist() == [1, 2]
+    assert column.view().tolist() == [8, 9]
+
+
+def test_trade_store_max_items(backend):
+    store = TradeStore(max_items=3)
+    append_trades(store, range(10))
+
+    assert len(store) == 3
+    assert trade_ids(store) == [7, 8, 9]
+
+
+def test_trade_store_max_age(backend):
+    store = TradeStore(max_age=2.0)
+    append_trades(store, [int(i * 0.5e9) for i in range(10)])
+
+    assert [store[i]["timestamp"] for i in range(len(store))] == [int(i * 0.5e9) for i in range(5, 10)]
+
+
+def test_trade_store_time_range(backend):
+    store = TradeStore()
+    for i in range(10):
+        store.append(timestamp=i * 1000, price=100.0, qty=1.0, side=-1, trade_id=i)
+
+    assert store.index_range(start=2000, end=5000) == (2, 5)
+    assert store[3] == {"timestamp": 3000, "price": 100.0, "qty": 1.0, "side": "sell", "trade_id": 3}
+
+
+def test_trade_store_to_numpy():
+    pytest.importorskip("numpy")
+    store = TradeStore(max_items=5)
+    append_trades(store, [i * 1000 for i in range(8)])
+
+    columns = store.to_numpy(start=4000)
+    assert columns["timestamp"].tolist() == [4000, 5000, 6000, 7000]
+    assert columns["trade_id"].tolist() == [4, 5, 6, 7]
+
+
+def test_candle_store_updates_open_candle_in_place(backend):
+    store = CandleStore()
+    store.update([0, 1.0, 2.0, 0.5, 1.5, 10.0])
+    store.update([0, 1.0, 3.0, 0.5, 2.5, 12.0])
+    store.update([60000, 2.5, 2.5, 2.5, 2.5, 1.0])
+    store.update([0, 1.0, 3.0, 0.5, 2.0, 13.0])
+
+    assert store.to_list() == [[0, 1.0, 3.0, 0.5, 2.0, 13.0], [60000, 2.5, 2.5, 2.5, 2.5, 1.0]]
+    assert store.last == [60000, 2.5, 2.5, 2.5, 2.5, 1.0]
+    assert store.to_list(start=30000) == [[60000, 2.5, 2.5, 2.5, 2.5, 1.0]]
+
+
+def test_candle_store_max_candles(backend):
+    store = CandleStore(max_candles=3)
+    for i in range(10):
+        store.update([i * 60000, 1.0, 1.0, 1.0, 1.0, 1.0])
+
+    assert [candle[0] for candle in store.to_list()] == [7 * 60000, 8 * 60000, 9 * 60000]
+
+
+def test_candle_store_max_age(backend):
+    store = CandleStore(max_age=180.0)
+    for i in range(10):
+        store.update([i * 60000, 1.0, 1.0, 1.0, 1.0, 1.0])
+
+    assert [candle[0] for candle in store.to_list()] == [6 * 60000, 7 * 60000, 8 * 60000, 9 * 60000]
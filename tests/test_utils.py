@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from bcx.channels import HeartbeatChannel
+from bcx.utils import timestamp_to_datetime, timestamp_to_nanoseconds
+
+FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def strptime_to_nanoseconds(ts):
+    dt = datetime.strptime(ts, FORMAT)
+    return (dt - datetime(1970, 1, 1)) // timedelta(microseconds=1) * 1000
+
+
+@pytest.mark.parametrize("ts", [
+    "1970-01-01T00:00:00.000000Z",
+    "2019-08-13T11:30:06.100140Z",
+    "2020-02-29T23:59:59.999999Z",
+    "2020-03-01T00:00:00.000001Z",
+])
+def test_timestamps_match_strptime(ts):
+    assert timestamp_to_datetime(ts) == datetime.strptime(ts, FORMAT)
+    assert timestamp_to_nanoseconds(ts) == strptime_to_nanoseconds(ts)
+
+
+def test_timestamps_across_dates():
+    start = datetime(2020, 5, 17, 23, 59, 59)
+    for i in range(0, 3000000, 7919):
+        ts = (start + timedelta(microseconds=i)).strftime(FORMAT)
+        assert timestamp_to_nanoseconds(ts) == strptime_to_nanoseconds(ts)
+
+
+@pytest.mark.parametrize("ts, fraction_ns", [
+    ("2019-08-13T11:30:06Z", 0),
+    ("2019-08-13T11:30:06.1Z", 100000000),
+    ("2019-08-13T11:30:06.123Z", 123000000),
+    ("2019-08-13T11:30:06.123456789Z", 123456789),
+])
+def test_nanoseconds_with_any_fraction_precision(ts, fraction_ns):
+    assert timestamp_to_nanoseconds(ts) == 1565695806 * 10 ** 9 + fraction_ns
+
+
+def test_datetime_truncates_nanoseconds():
+    assert timestamp_to_datetime("2019-08-13T11:30:06.123456789Z") == datetime(2019, 8, 13, 11, 30, 6, 123456)
+    assert timestamp_to_datetime("2019-08-13T11:30:06Z") == datetime(2019, 8, 13, 11, 30, 6)
+
+
+def test_heartbeat_channel_parses_timestamp():
+    channel = HeartbeatChannel(ws=None, name="heartbeat")
+    channel.on_event("updated", {"timestamp": "2019-05-31T08:36:45.666753Z"})
+    assert channel.last_heartbeat == datetime(2019, 5, 31, 8, 36, 45, 666753)